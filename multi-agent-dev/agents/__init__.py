@@ -4,4 +4,5 @@ from agents.ui_ux import UIUXAgent
 from agents.integration import IntegrationAgent
 from agents.testing import TestingAgent
 from agents.documentation import DocumentationAgent
-from agents.error_handling import ErrorHandlingAgent
\ No newline at end of file
+from agents.error_handling import ErrorHandlingAgent
+from agents.registry import get_agent_instances
@@ -399,34 +399,27 @@ class ErrorHandlingAgent:
         if not self.db_connector:
             return {"error": "Database connector not available"}
         
-        # Retrieve errors from database
-        errors = self.db_connector.get_all_errors()
+        # Retrieve errors from database as a DataFrame so counting is columnar
+        errors = self.db_connector.get_all_errors(as_frame=True)
+        error_types = errors["error_type"].fillna("Unknown")
         
         # Count errors by type
-        error_counts = {}
-        for error in errors:
-            error_type = error.get("error_type", "Unknown")
-            if error_type not in error_counts:
-                error_counts[error_type] = 0
-            error_counts[error_type] += 1
+        error_counts = {error_type: int(count)
+                        for error_type, count in error_types.value_counts(sort=False).items()}
         
         # Count errors by agent
-        agent_error_counts = {}
-        for error in errors:
-            agent_id = error.get("agent_id", "Unknown")
-            if agent_id not in agent_error_counts:
-                agent_error_counts[agent_id] = 0
-            agent_error_counts[agent_id] += 1
+        agent_error_counts = {agent_id: int(count)
+                              for agent_id, count in errors["agent_id"].fillna("Unknown").value_counts(sort=False).items()}
         
         # Identify recurring patterns
         recurring_patterns = []
         for error_type, count in error_counts.items():
             if count >= 3:  # Threshold for considering a pattern recurring
-                recurring_errors = [e for e in errors if e.get("error_type") == error_type]
+                recurring_errors = errors[error_types == error_type].head(3).astype(object)
                 pattern = {
                     "error_type": error_type,
                     "count": count,
-                    "examples": recurring_errors[:3],  # First 3 examples
+                    "examples": recurring_errors.where(recurring_errors.notna(), None).to_dict("records"),  # First 3 examples
                     "recommendation": f"Implement systemic fix for recurring {error_type} errors"
                 }
                 recurring_patterns.append(pattern)
@@ -145,12 +145,15 @@ class ProjectManagerAgent:
                 "feature": feature
             })
 
+        # Testing and documentation cover every component and feature
+        implementation_ids = [task["id"] for task in tasks]
+
         # Add testing tasks
         tasks.append({
             "id": "testing-1",
             "title": "Create test plan and test cases",
             "description": "Develop a comprehensive test plan and test cases covering all components and features.",
-            "dependencies": [],
+            "dependencies": list(implementation_ids),
             "estimated_effort": "medium",
             "aspect": "testing"
         })
@@ -160,7 +163,7 @@ class ProjectManagerAgent:
             "id": "documentation-1",
             "title": "Create project documentation",
             "description": "Create comprehensive documentation for the project including setup instructions, user guide, and API documentation.",
-            "dependencies": [],
+            "dependencies": list(implementation_ids),
             "estimated_effort": "medium",
             "aspect": "documentation"
         })
@@ -0,0 +1,75 @@
+"""
+Process-wide registry of agent instances.
+
+Agents keep no per-project state, only their database connector, so each
+agent type is instantiated once per connector and shared by every
+orchestrator and project in the process. Orchestrators bind the shared
+instances to project-scoped AgentState records.
+"""
+import threading
+from typing import Dict, Any
+
+from agents.project_manager import ProjectManagerAgent
+from agents.developer import DeveloperAgent
+from agents.ui_ux import UIUXAgent
+from agents.integration import IntegrationAgent
+from agents.testing import TestingAgent
+from agents.documentation import DocumentationAgent
+from agents.error_handling import ErrorHandlingAgent
+
+# Agent classes by agent type, in the order orchestrators create their agents
+AGENT_CLASSES = {
+    "project_manager": ProjectManagerAgent,
+    "developer": DeveloperAgent,
+    "ui_ux": UIUXAgent,
+    "integration": IntegrationAgent,
+    "testing": TestingAgent,
+    "documentation": DocumentationAgent,
+    "error_handling": ErrorHandlingAgent,
+}
+
+# Agent types whose instances refer back to the orchestrator running them
+ORCHESTRATOR_BOUND_AGENTS = frozenset({"error_handling"})
+
+# Shared instances live on their connector in this attribute, so the
+# registry never keeps a closed connector alive
+_CONNECTOR_ATTRIBUTE = "_agent_instances"
+_unconnected_instances: Dict[str, Any] = {}  # Shared instances without a database connector
+_lock = threading.Lock()
+
+
+def get_agent_instances(db_connector=None, orchestrator=None) -> Dict[str, Any]:
+    """
+    Get an instance of every agent type.
+
+    Instances are created on first use and then shared by every caller with
+    the same database connector. Agents that refer to an orchestrator are
+    created for the given orchestrator instead, so callers should keep the
+    result rather than calling again for each project.
+
+    Args:
+        db_connector: Database connector the agents use
+        orchestrator: Orchestrator the agents run under
+
+    Returns:
+        Dictionary mapping agent types to agent instances
+    """
+    with _lock:
+        if db_connector is None:
+            shared = _unconnected_instances
+        else:
+            shared = getattr(db_connector, _CONNECTOR_ATTRIBUTE, None)
+            if shared is None:
+                shared = {}
+                setattr(db_connector, _CONNECTOR_ATTRIBUTE, shared)
+        for agent_type, agent_class in AGENT_CLASSES.items():
+            if agent_type not in ORCHESTRATOR_BOUND_AGENTS and agent_type not in shared:
+                shared[agent_type] = agent_class(db_connector=db_connector)
+
+    agents = {}
+    for agent_type, agent_class in AGENT_CLASSES.items():
+        if agent_type in ORCHESTRATOR_BOUND_AGENTS:
+            agents[agent_type] = agent_class(db_connector=db_connector, orchestrator=orchestrator)
+        else:
+            agents[agent_type] = shared[agent_type]
+    return agents
@@ -14,6 +14,7 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 # Import modules
 from core.database import DatabaseConnector
 from core.orchestration_simple import SimpleOrchestrator, SystemState, AgentState, Message
+from core.scheduling import link_task_ids
 from utils import format_timestamp, time_difference, truncate_text, set_log_function, log_agent_activity
 from utils.llm_client import claude_client
 
@@ -31,8 +32,9 @@ st.set_page_config(
     layout="wide",
 )
 
-# Initialize database connection
-db_connector = DatabaseConnector()
+# Get the process-wide database connection (shared across reruns and sessions)
+db_connector = DatabaseConnector.shared()
+db_connector.start_checkpoint_compaction()
 
 # Initialize session state
 if "project_id" not in st.session_state:
@@ -152,19 +154,23 @@ def process_requirements(requirements):
                 log_agent_activity("project_manager", "Assigning tasks to agents...")
                 assigned_tasks = agent.agent_instance.assign_tasks_to_agents(tasks)
                 
-                # Store tasks in database and session state
-                for task in assigned_tasks:
-                    # Create task in database
-                    task_id = orchestrator.db_connector.create_task(
-                        project_id=st.session_state.project_id,
-                        title=task.get("title", "Untitled Task"),
-                        description=task.get("description", ""),
-                        assigned_agent=task.get("assigned_agent", "developer")
-                    )
-                    
-                    # Update task with ID
-                    task["id"] = task_id
-                    
+                # Store all tasks in the database at once
+                task_ids = orchestrator.db_connector.create_tasks_bulk(
+                    st.session_state.project_id,
+                    [{
+                        "title": task.get("title", "Untitled Task"),
+                        "description": task.get("description", ""),
+                        "assigned_agent": task.get("assigned_agent", "developer"),
+                        "id": task.get("id"),
+                        "dependencies": task.get("dependencies")
+                    } for task in assigned_tasks]
+                )
+                
+                # Replace provisional IDs, including those in dependencies
+                link_task_ids(assigned_tasks, task_ids)
+                
+                task_messages = []
+                for task, task_id in zip(assigned_tasks, task_ids):
                     # Add to session state
                     st.session_state.tasks.append(task)
                     
@@ -174,7 +180,7 @@ def process_requirements(requirements):
                     # Send task to assigned agent via message bus
                     target_agent = orchestrator.system_state.get_agent_by_type(task.get("assigned_agent", "developer"))
                     if target_agent:
-                        orchestrator.message_bus.send_message(Message(
+                        task_messages.append(Message(
                             sender_id=agent.agent_id,
                             receiver_id=target_agent.agent_id,
                             content=task,
@@ -182,6 +188,7 @@ def process_requirements(requirements):
                             task_id=task_id,
                             project_id=st.session_state.project_id
                         ))
+                orchestrator.message_bus.send_many(task_messages)
                 
                 log_agent_activity("project_manager", f"Created {len(assigned_tasks)} tasks")
                 return True
@@ -6,7 +6,9 @@ import os
 import re
 import sys
 import subprocess
+import threading
 import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx, add_script_run_ctx
 from typing import Dict, Any, List, Optional, Union, Tuple
 
 # Add project root to path
@@ -15,6 +17,7 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 # Import utility functions
 from utils import log_agent_activity
 from templates.project_utils import create_app_from_task, get_app_name_from_task, get_project_type, get_project_dir
+from core.scheduling import TaskGraph, CycleError
 
 def run_task(task_id):
     """
@@ -382,6 +385,41 @@ class ApiService {
         # Return failure
         return False
 
+def run_tasks():
+    """
+    Execute all unfinished tasks in dependency order, one at a time.
+    
+    Every task writes to and builds in the session's project directory, so
+    the tasks cannot run in parallel.
+    
+    Returns:
+        Dictionary mapping task IDs to "completed", "failed" or "blocked",
+        or None if the task dependencies form a cycle
+    """
+    tasks = st.session_state.tasks
+    try:
+        graph = TaskGraph(tasks)
+    except CycleError as e:
+        log_agent_activity("system", f"Cannot run tasks: {str(e)}")
+        return None
+    
+    # Worker threads need the script context to reach the session state
+    ctx = get_script_run_ctx()
+    
+    def execute(task_id):
+        if ctx is not None:
+            add_script_run_ctx(threading.current_thread(), ctx)
+        return run_task(task_id)
+    
+    def report(task_id, status):
+        progress = graph.progress(t["id"] for t in tasks if t.get("status") == "completed")
+        log_agent_activity("system", f"Task {graph.tasks[task_id].get('title', task_id)} {status}; "
+                                     f"{progress['completed']}/{progress['total']} tasks done, "
+                                     f"critical path {progress['critical_path_progress']:.0%} complete")
+    
+    completed = [task["id"] for task in tasks if task.get("status") == "completed"]
+    return graph.run(execute, max_workers=1, completed=completed, on_complete=report)
+
 def run_build_command(project_dir, project_type):
     """Run appropriate build command based on project type"""
     try:
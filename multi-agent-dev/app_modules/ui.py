@@ -14,6 +14,7 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 # Import utility functions
 from utils import format_timestamp, time_difference, truncate_text
+from core.scheduling import TaskGraph, CycleError
 
 def create_sidebar():
     """Create the sidebar UI elements"""
@@ -149,6 +150,21 @@ def render_task_list():
             progress = completed_tasks / total_tasks
             st.progress(progress)
         
+        # Critical path progress and execution in dependency order
+        try:
+            graph = TaskGraph(st.session_state.tasks)
+            critical = graph.progress(task["id"] for task in st.session_state.tasks
+                                      if task.get("status") == "completed")
+            st.caption(f"Critical path: {critical['critical_path_completed']}/{len(critical['critical_path'])} "
+                       f"tasks, {critical['critical_path_progress']:.0%} of its effort done")
+            if pending_tasks + in_progress_tasks > 0 and st.button("Run All Tasks", key="run_all_tasks"):
+                from app_modules.task_execution import run_tasks
+                run_tasks()
+                st.success("Task execution complete!")
+                st.rerun()
+        except CycleError as e:
+            st.error(str(e))
+        
         # Display tasks
         for i, task in enumerate(st.session_state.tasks):
             with st.expander(f"{i+1}. {task.get('title', 'Untitled Task')}"):
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Benchmark DatabaseConnector lookup latency as the tables grow.
+
+Populates a temporary database with synthetic projects, tasks, agent outputs
+and errors, then times the hot lookups with and without the secondary
+indexes created by the schema migrations.
+
+Usage:
+    python benchmark_database.py [--sizes 10000 100000 1000000] [--lookups 200]
+"""
+import os
+import sys
+import time
+import random
+import shutil
+import argparse
+import tempfile
+
+# Add the project root to the path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from core.database import DatabaseConnector
+
+# Indexes from the schema migrations, as (name, definition)
+INDEXES = [
+    ("idx_tasks_project_id", "tasks (project_id)"),
+    ("idx_agent_outputs_task_agent", "agent_outputs (task_id, agent_id)"),
+    ("idx_errors_task_id", "errors (task_id)"),
+]
+
+TASKS_PER_PROJECT = 100
+OUTPUTS_PER_TASK = 10
+
+def populate(db, output_count):
+    """Fill the database with output_count agent outputs and matching parents."""
+    task_count = max(1, output_count // OUTPUTS_PER_TASK)
+    project_count = max(1, task_count // TASKS_PER_PROJECT)
+
+    db.conn.execute("""
+        INSERT INTO projects
+        SELECT 'p' || i, 'Project ' || i, NULL, 'created', now(), now()
+        FROM range(?) t(i)
+    """, (project_count,))
+    db.conn.execute("""
+        INSERT INTO tasks
+        SELECT 't' || i, 'p' || (i % ?), 'Task ' || i, NULL, 'developer',
+               CASE WHEN i % 3 = 0 THEN 'completed' ELSE 'created' END, now(), now()
+        FROM range(?) t(i)
+    """, (project_count, task_count))
+    db.conn.execute("""
+        INSERT INTO agent_outputs
+        SELECT 'o' || i, 't' || (i % ?), 'agent_' || (i % 7), 'code', '{"code": "pass"}',
+               now() + to_microseconds(i)
+        FROM range(?) t(i)
+    """, (task_count, output_count))
+    db.conn.execute("""
+        INSERT INTO errors
+        SELECT 'e' || i, 't' || (i % ?), 'agent_' || (i % 7), 'TestFailure', 'failed', NULL,
+               CASE WHEN i % 2 = 0 THEN 'open' ELSE 'resolved' END, now(), NULL, NULL
+        FROM range(?) t(i)
+    """, (task_count, task_count))
+
+    return project_count, task_count
+
+def time_lookups(db, project_count, task_count, lookups):
+    """Time each hot lookup and return mean latencies in milliseconds."""
+    rng = random.Random(42)
+    project_ids = [f"p{rng.randrange(project_count)}" for _ in range(lookups)]
+    task_ids = [f"t{rng.randrange(task_count)}" for _ in range(lookups)]
+
+    cases = {
+        "get_tasks_by_project": lambda i: db.get_tasks_by_project(project_ids[i]),
+        "get_agent_outputs": lambda i: db.get_agent_outputs(task_ids[i], f"agent_{i % 7}"),
+        "get_errors_by_task": lambda i: db.get_errors_by_task(task_ids[i]),
+    }
+
+    results = {}
+    for name, lookup in cases.items():
+        start = time.perf_counter()
+        for i in range(lookups):
+            lookup(i)
+        results[name] = (time.perf_counter() - start) / lookups * 1000
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 1000000],
+                        help="agent_outputs row counts to benchmark")
+    parser.add_argument("--lookups", type=int, default=200, help="lookups per measurement")
+    args = parser.parse_args()
+
+    print("Benchmarking DatabaseConnector lookups (mean ms per call)")
+    print(f"{'outputs':>10} {'lookup':<22} {'no index':>10} {'indexed':>10}")
+
+    for size in args.sizes:
+        test_dir = tempfile.mkdtemp()
+        try:
+            db = DatabaseConnector(db_path=os.path.join(test_dir, "benchmark.duckdb"))
+            project_count, task_count = populate(db, size)
+
+            for name, _ in INDEXES:
+                db.conn.execute(f"DROP INDEX IF EXISTS {name}")
+            unindexed = time_lookups(db, project_count, task_count, args.lookups)
+
+            for name, definition in INDEXES:
+                db.conn.execute(f"CREATE INDEX {name} ON {definition}")
+            db.recluster_agent_outputs()
+            indexed = time_lookups(db, project_count, task_count, args.lookups)
+
+            for name in unindexed:
+                print(f"{size:>10} {name:<22} {unindexed[name]:>10.3f} {indexed[name]:>10.3f}")
+            db.close()
+        finally:
+            shutil.rmtree(test_dir)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Microbenchmarks for state serialization over realistic checkpoint payloads.
+
+Builds checkpoint states the size of real projects (tasks, generated code,
+test reports and messages with timestamps) and times serialize_state and
+deserialize_state with every available backend, alongside plain json and
+the previous decoder, which tried datetime.fromisoformat on every string.
+
+Usage:
+    python benchmark_serialization.py [--tasks 10 100 500] [--repeat 20]
+"""
+import os
+import sys
+import json
+import time
+import datetime
+import argparse
+
+# Add the project root to the path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from utils import serialization
+from utils.serialization import serialize_state, deserialize_state
+
+CODE_TEMPLATE = '''import React, { useState } from "react";
+
+export default function ComponentNAME() {
+  const [items, setItems] = useState([]);
+  return <ul>{items.map(item => <li key={item.id}>{item.name}</li>)}</ul>;
+}
+''' * 8
+
+TEST_OUTPUT = "test_component_renders ... ok\ntest_component_updates ... ok\n" * 40
+
+def build_state(task_count):
+    """Build a checkpoint state with task_count tasks and their artifacts."""
+    now = datetime.datetime.now()
+    tasks = [{
+        "id": f"task-{n}",
+        "title": f"Implement component {n}",
+        "description": "Build the component described in the requirements. " * 5,
+        "status": "completed" if n % 3 else "in_progress",
+        "assigned_to": "developer",
+        "dependencies": [f"task-{n - 1}"] if n else [],
+        "created_at": now,
+        "updated_at": now,
+    } for n in range(task_count)]
+    return {
+        "tasks": tasks,
+        "implementations": [{"task_id": t["id"], "code": CODE_TEMPLATE.replace("NAME", str(n)),
+                             "files": [f"src/Component{n}.jsx"], "created_at": now}
+                            for n, t in enumerate(tasks)],
+        "test_reports": [{"task_id": t["id"], "output": TEST_OUTPUT, "passed": True,
+                          "execution_time": 0.5, "executed_at": now} for t in tasks],
+        "messages": [{"id": f"msg-{n}", "sender_id": "developer_1", "receiver_id": "testing_1",
+                      "content": {"summary": "Implementation ready for testing"},
+                      "timestamp": now} for n in range(task_count * 2)],
+        "next": "testing",
+    }
+
+def speculative_deserialize(state_json):
+    """The previous decoder: tries fromisoformat on every string value."""
+    def datetime_parser(dct):
+        for k, v in dct.items():
+            if isinstance(v, str):
+                try:
+                    dct[k] = datetime.datetime.fromisoformat(v)
+                except (ValueError, TypeError):
+                    pass
+        return dct
+
+    return json.loads(state_json, object_hook=datetime_parser)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--tasks", type=int, nargs="+", default=[10, 100, 500],
+                        help="tasks per checkpoint state")
+    parser.add_argument("--repeat", type=int, default=20, help="decodes per measurement")
+    args = parser.parse_args()
+
+    print("Benchmarking state serialization (mean ms per call)")
+    print(f"{'tasks':>6} {'size KB':>8} {'case':<28} {'ms':>9}")
+
+    for task_count in args.tasks:
+        state = build_state(task_count)
+        state_json = serialize_state(state)
+        cases = {
+            "json.loads": lambda: json.loads(state_json),
+            "speculative fromisoformat": lambda: speculative_deserialize(state_json),
+        }
+        for backend in serialization.BACKENDS:
+            serialization.set_backend(backend)
+            assert speculative_deserialize(state_json) == deserialize_state(state_json)
+            cases[f"{backend} serialize"] = lambda backend=backend: serialization.BACKENDS[backend][0](state)
+            cases[f"{backend} deserialize"] = lambda backend=backend: serialization.BACKENDS[backend][1](state_json)
+
+        for name, case in cases.items():
+            start = time.perf_counter()
+            for _ in range(args.repeat):
+                case()
+            elapsed = (time.perf_counter() - start) / args.repeat * 1000
+            print(f"{task_count:>6} {len(state_json) // 1024:>8} {name:<28} {elapsed:>9.3f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,280 @@
+"""
+Binary encoding for system checkpoints.
+
+A checkpoint is stored as a frame of independently encoded top-level values,
+optionally compressed, so that reading one key (such as "next") only decodes
+that key. Codecs and compressors are pluggable and named by a spec such as
+"msgpack+zstd" that is stored alongside each checkpoint.
+"""
+import struct
+import zlib
+import datetime
+from collections.abc import MutableMapping
+from typing import Dict, Any, List, Optional, Tuple, Callable, Iterator
+
+from utils import serialize_state, deserialize_state
+from utils.serialization import encode_default
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+
+class CheckpointCodec:
+    """Encodes single checkpoint values to bytes and back (JSON text)."""
+
+    name = "json"
+
+    def encode(self, value: Any) -> bytes:
+        return serialize_state(value).encode("utf-8")
+
+    def decode(self, data) -> Any:
+        return deserialize_state(str(data, "utf-8"))
+
+
+# msgpack extension type used for datetimes
+_MSGPACK_DATETIME = 1
+
+
+def _msgpack_default(obj):
+    if isinstance(obj, datetime.datetime):
+        return msgpack.ExtType(_MSGPACK_DATETIME, obj.isoformat().encode("utf-8"))
+    # Match serialize_state for anything else that is not serializable
+    return encode_default(obj)
+
+
+def _bytes_to_text(value: Any) -> Any:
+    """Replace bytes with base64 text, which msgpack would otherwise pack natively."""
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return encode_default(value)
+    if value.__class__ is dict:
+        return {key: _bytes_to_text(item) for key, item in value.items()}
+    if value.__class__ is list or value.__class__ is tuple:
+        return [_bytes_to_text(item) for item in value]
+    return value
+
+
+def _msgpack_ext_hook(code: int, data: bytes):
+    if code == _MSGPACK_DATETIME:
+        return datetime.datetime.fromisoformat(data.decode("utf-8"))
+    return msgpack.ExtType(code, data)
+
+
+class MsgpackCodec(CheckpointCodec):
+    """Encodes checkpoint values with msgpack, keeping datetimes typed."""
+
+    name = "msgpack"
+
+    def encode(self, value: Any) -> bytes:
+        # Decode to the same values as the JSON codec, so bytes come back as base64
+        return msgpack.packb(_bytes_to_text(value), default=_msgpack_default, use_bin_type=True)
+
+    def decode(self, data) -> Any:
+        return msgpack.unpackb(data, raw=False, ext_hook=_msgpack_ext_hook, strict_map_key=False)
+
+
+# Packages that provide the optional codecs and compressors, by name
+OPTIONAL_CODEC_PACKAGES = {"msgpack": "msgpack", "zstd": "zstandard"}
+
+
+class UnknownCodecError(ValueError):
+    """Raised when a checkpoint names a codec or compressor that is not available."""
+
+    def __init__(self, kind: str, name: str):
+        self.name = name
+        message = f"Unknown checkpoint {kind}: {name}"
+        if name in OPTIONAL_CODEC_PACKAGES:
+            message += f" (install the {OPTIONAL_CODEC_PACKAGES[name]} package, see requirements.txt)"
+        super().__init__(message)
+
+
+# Registered codecs by name
+CHECKPOINT_CODECS: Dict[str, CheckpointCodec] = {"json": CheckpointCodec()}
+if msgpack is not None:
+    CHECKPOINT_CODECS["msgpack"] = MsgpackCodec()
+
+# Registered compressors by name, as (compress, decompress)
+CHECKPOINT_COMPRESSORS: Dict[str, Tuple[Callable[[bytes], bytes], Callable[[bytes], bytes]]] = {
+    "zlib": (lambda data: zlib.compress(data, 6), zlib.decompress),
+}
+if zstandard is not None:
+    CHECKPOINT_COMPRESSORS["zstd"] = (
+        lambda data: zstandard.ZstdCompressor(level=3).compress(data),
+        lambda data: zstandard.ZstdDecompressor().decompress(data),
+    )
+
+# Best available codec and compressor
+DEFAULT_CHECKPOINT_CODEC = "+".join([
+    "msgpack" if "msgpack" in CHECKPOINT_CODECS else "json",
+    "zstd" if "zstd" in CHECKPOINT_COMPRESSORS else "zlib",
+])
+
+
+def register_codec(codec: CheckpointCodec) -> None:
+    """
+    Register a checkpoint codec under its name.
+
+    Args:
+        codec: Codec instance
+    """
+    CHECKPOINT_CODECS[codec.name] = codec
+
+
+def parse_codec_spec(spec: str) -> Tuple[CheckpointCodec, Optional[str]]:
+    """
+    Resolve a codec spec such as "msgpack+zstd" or "json".
+
+    Args:
+        spec: Codec name, optionally followed by "+" and a compressor name
+
+    Returns:
+        Tuple of (codec, compressor name or None)
+
+    Raises:
+        UnknownCodecError: If the codec or compressor is not available
+    """
+    name, _, compression = spec.partition("+")
+    if name not in CHECKPOINT_CODECS:
+        raise UnknownCodecError("codec", name)
+    if compression and compression not in CHECKPOINT_COMPRESSORS:
+        raise UnknownCodecError("compression", compression)
+    return CHECKPOINT_CODECS[name], compression or None
+
+
+# Frame layout: count, then (key length, key, value length, value) per changed
+# key, then count and (key length, key) per removed key
+_COUNT = struct.Struct("<I")
+_ENTRY = struct.Struct("<HI")
+_KEY = struct.Struct("<H")
+
+
+def encode_frame(spec: str, changed: Dict[str, bytes], removed: List[str] = ()) -> bytes:
+    """
+    Pack encoded values and removed keys into a checkpoint blob.
+
+    Args:
+        spec: Codec spec the values were encoded with
+        changed: Encoded value per key
+        removed: Keys removed since the parent checkpoint
+
+    Returns:
+        Checkpoint blob
+    """
+    parts = [_COUNT.pack(len(changed))]
+    for key, value in changed.items():
+        key_bytes = key.encode("utf-8")
+        parts.append(_ENTRY.pack(len(key_bytes), len(value)))
+        parts.append(key_bytes)
+        parts.append(value)
+    parts.append(_COUNT.pack(len(removed)))
+    for key in removed:
+        key_bytes = key.encode("utf-8")
+        parts.append(_KEY.pack(len(key_bytes)))
+        parts.append(key_bytes)
+
+    frame = b"".join(parts)
+    _, compression = parse_codec_spec(spec)
+    if compression:
+        frame = CHECKPOINT_COMPRESSORS[compression][0](frame)
+    return frame
+
+
+def decode_frame(spec: str, blob: bytes) -> Tuple[Dict[str, memoryview], List[str]]:
+    """
+    Unpack a checkpoint blob without decoding its values.
+
+    Args:
+        spec: Codec spec the blob was written with
+        blob: Checkpoint blob
+
+    Returns:
+        Tuple of (encoded value per changed key, removed keys)
+    """
+    _, compression = parse_codec_spec(spec)
+    if compression:
+        blob = CHECKPOINT_COMPRESSORS[compression][1](blob)
+    view = memoryview(blob)
+
+    changed = {}
+    (count,), offset = _COUNT.unpack_from(view), _COUNT.size
+    for _ in range(count):
+        key_length, value_length = _ENTRY.unpack_from(view, offset)
+        offset += _ENTRY.size
+        key = str(view[offset:offset + key_length], "utf-8")
+        offset += key_length
+        changed[key] = view[offset:offset + value_length]
+        offset += value_length
+
+    removed = []
+    (count,), offset = _COUNT.unpack_from(view, offset), offset + _COUNT.size
+    for _ in range(count):
+        (key_length,) = _KEY.unpack_from(view, offset)
+        offset += _KEY.size
+        removed.append(str(view[offset:offset + key_length], "utf-8"))
+        offset += key_length
+
+    return changed, removed
+
+
+# Marks values of a LazyState that have not been decoded yet
+_UNDECODED = object()
+
+
+class LazyState(MutableMapping):
+    """
+    Checkpoint state whose values are decoded on first access.
+
+    Values that were never accessed keep their encoded form, so storing the
+    state again can reuse those bytes instead of re-encoding them.
+    """
+
+    __slots__ = ("_values", "_encoded")
+
+    def __init__(self):
+        self._values: Dict[str, Any] = {}
+        self._encoded: Dict[str, Tuple[CheckpointCodec, memoryview]] = {}
+
+    def set_encoded(self, key: str, codec: CheckpointCodec, data) -> None:
+        """Set a value from its encoded form without decoding it."""
+        self._values[key] = _UNDECODED
+        self._encoded[key] = (codec, data)
+
+    def encoded(self, key: str, codec: CheckpointCodec):
+        """Get the undecoded bytes of a value if it was encoded with codec, else None."""
+        entry = self._encoded.get(key)
+        if entry is not None and entry[0] is codec:
+            return entry[1]
+        return None
+
+    def __getitem__(self, key: str) -> Any:
+        value = self._values[key]
+        if value is _UNDECODED:
+            codec, data = self._encoded.pop(key)
+            value = self._values[key] = codec.decode(data)
+        return value
+
+    def __setitem__(self, key: str, value: Any) -> None:
+        self._encoded.pop(key, None)
+        self._values[key] = value
+
+    def __delitem__(self, key: str) -> None:
+        del self._values[key]
+        self._encoded.pop(key, None)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._values)
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def __contains__(self, key) -> bool:
+        return key in self._values
+
+    def __repr__(self) -> str:
+        return f"LazyState({list(self._values)})"
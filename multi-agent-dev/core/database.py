@@ -5,99 +5,585 @@ import json
 import uuid
 import duckdb
 import sys
-from typing import Dict, Any, List, Optional, Union
+import threading
+import weakref
+from contextlib import contextmanager
+from collections import OrderedDict
+from collections.abc import Mapping
+from typing import TYPE_CHECKING, Callable, Dict, Any, List, Optional, Union, Tuple
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+if TYPE_CHECKING:
+    import pandas
 
 # Import custom utility function for serialization with datetime support
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from utils import serialize_state, deserialize_state
+from core.checkpoints import (
+    DEFAULT_CHECKPOINT_CODEC, CheckpointCodec, LazyState, UnknownCodecError, parse_codec_spec,
+    encode_frame, decode_frame
+)
+
+
+def _release_cursor(cursors: Dict[int, duckdb.DuckDBPyConnection], lock: threading.Lock,
+                    cursor_key: int) -> None:
+    """Close a per-thread cursor of a connector."""
+    with lock:
+        cursor = cursors.pop(cursor_key, None)
+    if cursor is not None:
+        try:
+            cursor.close()
+        except duckdb.Error:
+            pass
+
+
+def _flush_output_buffer(conn, buffer: List[tuple], lock: threading.Lock, retry_rows: bool = True) -> int:
+    """
+    Write all buffered agent outputs with a single multi-row INSERT.
+
+    Kept at module level so it can also run from the connector's finalizer
+    without holding a reference to the connector itself.
+
+    Args:
+        conn: DuckDB connection
+        buffer: Pending agent_outputs rows
+        lock: Lock guarding the buffer
+        retry_rows: Retry row by row if the batch fails; otherwise raise
+            (a failed statement aborts an open transaction, so retries
+            inside one would be rolled back anyway)
+
+    Returns:
+        Number of rows written
+    """
+    with lock:
+        rows = buffer[:]
+        del buffer[:]
+
+    if not rows or conn is None:
+        return 0
+
+    # Append in (task_id, created_at) order so each batch lands clustered by task
+    rows.sort(key=lambda row: (row[1] or "", row[5]))
+
+    columns = "(id, task_id, agent_id, output_type, content, created_at)"
+    placeholders = ", ".join(["(?, ?, ?, ?, ?, ?)"] * len(rows))
+    params = [value for row in rows for value in row]
+
+    try:
+        conn.execute(f"INSERT INTO agent_outputs {columns} VALUES {placeholders}", params)
+    except duckdb.Error as e:
+        if not retry_rows:
+            raise
+        # One bad row (e.g. an unknown task_id) must not drop the whole batch
+        print(f"Error flushing agent outputs in bulk, retrying row by row: {str(e)}")
+        written = 0
+        for row in rows:
+            try:
+                conn.execute(f"INSERT INTO agent_outputs {columns} VALUES (?, ?, ?, ?, ?, ?)", row)
+                written += 1
+            except duckdb.Error as row_error:
+                print(f"Error storing agent output {row[0]}: {str(row_error)}")
+        return written
+
+    return len(rows)
+
+
+def _flush_after_interval(connector_ref: "weakref.ref[DatabaseConnector]") -> None:
+    """Flush a connector's buffered outputs from its flush timer, unless it is gone or closed."""
+    connector = connector_ref()
+    if connector is None or connector._root_conn is None:
+        return
+    try:
+        connector.flush()
+    except duckdb.Error as e:
+        print(f"Error flushing agent outputs: {str(e)}")
+
+
+# Schema migrations as (version, statements), applied in order to databases below that version.
+# Version 1 is the original schema; its IF NOT EXISTS statements also adopt unversioned databases.
+SCHEMA_MIGRATIONS: List[Tuple[int, List[str]]] = [
+    (1, [
+        # Create projects table
+        """
+        CREATE TABLE IF NOT EXISTS projects (
+            id VARCHAR PRIMARY KEY,
+            name VARCHAR NOT NULL,
+            description TEXT,
+            status VARCHAR,
+            created_at TIMESTAMP,
+            updated_at TIMESTAMP
+        )
+        """,
+        # Create tasks table
+        """
+        CREATE TABLE IF NOT EXISTS tasks (
+            id VARCHAR PRIMARY KEY,
+            project_id VARCHAR,
+            title VARCHAR NOT NULL,
+            description TEXT,
+            assigned_agent VARCHAR,
+            status VARCHAR,
+            created_at TIMESTAMP,
+            updated_at TIMESTAMP,
+            FOREIGN KEY (project_id) REFERENCES projects(id)
+        )
+        """,
+        # Create agent_outputs table
+        """
+        CREATE TABLE IF NOT EXISTS agent_outputs (
+            id VARCHAR PRIMARY KEY,
+            task_id VARCHAR,
+            agent_id VARCHAR,
+            output_type VARCHAR,
+            content TEXT,
+            created_at TIMESTAMP,
+            FOREIGN KEY (task_id) REFERENCES tasks(id)
+        )
+        """,
+        # Create errors table
+        """
+        CREATE TABLE IF NOT EXISTS errors (
+            id VARCHAR PRIMARY KEY,
+            task_id VARCHAR,
+            agent_id VARCHAR,
+            error_type VARCHAR,
+            error_message TEXT,
+            stack_trace TEXT,
+            status VARCHAR,
+            created_at TIMESTAMP,
+            resolved_at TIMESTAMP,
+            resolution TEXT,
+            FOREIGN KEY (task_id) REFERENCES tasks(id)
+        )
+        """,
+        # Create system_checkpoints table
+        """
+        CREATE TABLE IF NOT EXISTS system_checkpoints (
+            id VARCHAR PRIMARY KEY,
+            timestamp TIMESTAMP,
+            checkpoint_data TEXT
+        )
+        """,
+        # Create message_archive table for messages evicted from in-memory history
+        """
+        CREATE TABLE IF NOT EXISTS message_archive (
+            id VARCHAR PRIMARY KEY,
+            bus_id VARCHAR,
+            task_id VARCHAR,
+            project_id VARCHAR,
+            sender_id VARCHAR,
+            receiver_id VARCHAR,
+            message_type VARCHAR,
+            timestamp TIMESTAMP,
+            message_data TEXT
+        )
+        """
+    ]),
+    (2, [
+        # Index the foreign-key columns used by the per-project/per-task lookups.
+        # Columns that get UPDATEd (e.g. errors.status) are left unindexed: older DuckDB
+        # versions rewrite such updates as delete+insert, which trips the primary key.
+        "CREATE INDEX IF NOT EXISTS idx_tasks_project_id ON tasks (project_id)",
+        "CREATE INDEX IF NOT EXISTS idx_agent_outputs_task_agent ON agent_outputs (task_id, agent_id)",
+        "CREATE INDEX IF NOT EXISTS idx_errors_task_id ON errors (task_id)",
+        "CREATE INDEX IF NOT EXISTS idx_message_archive_bus_id ON message_archive (bus_id)"
+    ]),
+    (3, [
+        # Delta checkpoints: parent link and distance from the last full snapshot (0 = full)
+        "ALTER TABLE system_checkpoints ADD COLUMN IF NOT EXISTS parent_id VARCHAR",
+        "ALTER TABLE system_checkpoints ADD COLUMN IF NOT EXISTS chain_depth INTEGER DEFAULT 0"
+    ]),
+    (4, [
+        # Per-project checkpoint lineage and an index for latest-checkpoint lookups
+        "ALTER TABLE system_checkpoints ADD COLUMN IF NOT EXISTS project_id VARCHAR",
+        "CREATE INDEX IF NOT EXISTS idx_system_checkpoints_project_ts ON system_checkpoints (project_id, timestamp)"
+    ]),
+    (5, [
+        # Binary checkpoints; checkpoint_data stays for rows written as JSON text.
+        # DuckDB refuses to alter an indexed table, so the index is rebuilt around the change.
+        "DROP INDEX IF EXISTS idx_system_checkpoints_project_ts",
+        "ALTER TABLE system_checkpoints ADD COLUMN IF NOT EXISTS checkpoint_blob BLOB",
+        "ALTER TABLE system_checkpoints ADD COLUMN IF NOT EXISTS codec VARCHAR",
+        "CREATE INDEX IF NOT EXISTS idx_system_checkpoints_project_ts ON system_checkpoints (project_id, timestamp)"
+    ]),
+    (6, [
+        # Task dependency edges, so schedules can be rebuilt from stored tasks
+        """
+        CREATE TABLE IF NOT EXISTS task_dependencies (
+            task_id VARCHAR,
+            depends_on VARCHAR,
+            PRIMARY KEY (task_id, depends_on)
+        )
+        """
+    ]),
+]
+
+SCHEMA_VERSION = SCHEMA_MIGRATIONS[-1][0]
+
+# Serializes schema checks and migrations between connectors in this process
+_schema_lock = threading.Lock()
+
+
+# A full checkpoint snapshot is stored at least every this many checkpoints
+FULL_CHECKPOINT_INTERVAL = 10
+
+# Encoded size of recent checkpoints kept in memory for diffing and reads
+CHECKPOINT_CACHE_BYTES = 32 * 1024 * 1024
+
+# Default checkpoint retention: the most recent N per project, plus the newest
+# checkpoint of each hour for the last N hours
+CHECKPOINT_KEEP_LAST = 20
+CHECKPOINT_KEEP_HOURLY = 24
+
+
+def _encode_state_keys(state: Mapping, codec: CheckpointCodec) -> Dict[str, bytes]:
+    """Encode each top-level value of a state separately, reusing values a LazyState never decoded."""
+    if isinstance(state, LazyState):
+        encoded = {}
+        for key in state:
+            data = state.encoded(key, codec)
+            encoded[key] = data if data is not None else codec.encode(state[key])
+        return encoded
+    return {key: codec.encode(value) for key, value in state.items()}
+
+
+# Result of a list getter: rows as dictionaries, or a DataFrame/Arrow table when as_frame is set
+Frame = Union["pandas.DataFrame", "pyarrow.Table"]
+Rows = Union[List[Dict[str, Any]], Frame]
+
+
+def _fetch_frame(result: duckdb.DuckDBPyConnection, as_frame: Union[bool, str]) -> Frame:
+    """
+    Fetch a query result in columnar form.
+
+    Args:
+        result: Executed DuckDB query
+        as_frame: "arrow" for a pyarrow Table, otherwise a pandas DataFrame
+
+    Returns:
+        pyarrow Table or pandas DataFrame
+
+    Raises:
+        ImportError: If an arrow table is requested and pyarrow is not installed
+    """
+    if as_frame == "arrow":
+        if pyarrow is None:
+            raise ImportError('as_frame="arrow" requires the pyarrow package (pip install pyarrow)')
+        # to_arrow_table replaces fetch_arrow_table in newer DuckDB releases
+        fetch = getattr(result, "to_arrow_table", None) or result.fetch_arrow_table
+        return fetch()
+    return result.fetchdf()
+
+
+# Process-wide connectors handed out by DatabaseConnector.shared(), keyed by (path, read_only)
+_shared_connectors: Dict[Tuple[str, bool], "DatabaseConnector"] = {}
+_shared_connectors_lock = threading.Lock()
+
+
+def _default_db_path() -> str:
+    """Get the default database path in the data directory."""
+    base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    data_dir = os.path.join(base_dir, "data")
+    os.makedirs(data_dir, exist_ok=True)
+    return os.path.join(data_dir, "multi_agent_dev.duckdb")
+
 
 class DatabaseConnector:
-    def __init__(self, db_path: str = None):
+    def __init__(self, db_path: str = None, output_batch_size: int = 100,
+                 output_flush_interval: float = 2.0, read_only: bool = False,
+                 connection: Optional[duckdb.DuckDBPyConnection] = None,
+                 checkpoint_codec: str = DEFAULT_CHECKPOINT_CODEC,
+                 checkpoint_cache_bytes: int = CHECKPOINT_CACHE_BYTES):
         """
         Initialize the DuckDB database connector.
         
+        Every thread gets its own cursor on the underlying connection, so a
+        connector can be shared between threads and Streamlit sessions.
+        
         Args:
             db_path: Path to the DuckDB database file
+            output_batch_size: Number of buffered agent outputs that triggers a flush
+                (1 disables write-behind buffering)
+            output_flush_interval: Seconds after which buffered agent outputs are
+                flushed by a background timer, even if nothing else is written
+            read_only: Reject writes and skip schema setup (for dashboards)
+            connection: Existing connection to the same database to share instead
+                of opening a new one; the connector will not close it
+            checkpoint_codec: Codec spec for new checkpoints, such as "msgpack+zstd"
+                or "json" (see core.checkpoints)
+            checkpoint_cache_bytes: Encoded size of recent checkpoints kept in memory
         """
         if db_path is None:
             # Use default path in data directory
-            base_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-            data_dir = os.path.join(base_dir, "data")
-            os.makedirs(data_dir, exist_ok=True)
-            db_path = os.path.join(data_dir, "multi_agent_dev.duckdb")
+            db_path = _default_db_path()
             
         self.db_path = db_path
-        self.conn = duckdb.connect(db_path)
-        self._initialize_schema()
+        self.read_only = read_only
+        self._owns_connection = connection is None
+        self._connection_owner: Optional["DatabaseConnector"] = None  # Connector whose connection is shared
+        self._root_conn = connection if connection is not None else duckdb.connect(db_path, read_only=read_only)
+        self._local = threading.local()
+        self._cursors: Dict[int, duckdb.DuckDBPyConnection] = {}
+        self._cursors_lock = threading.Lock()
+
+        # Write-behind buffer for agent_outputs rows
+        self.output_batch_size = max(1, output_batch_size)
+        self.output_flush_interval = output_flush_interval
+        self._output_buffer: List[tuple] = []
+        self._output_lock = threading.Lock()
+        self._flush_timer: Optional[threading.Timer] = None  # Pending timed flush, guarded by _output_lock
+        self._finalizer = weakref.finalize(
+            self, _flush_output_buffer, self._root_conn, self._output_buffer, self._output_lock
+        )
+
+        # Codec for new checkpoints, and a write-through LRU cache of recent checkpoints:
+        # checkpoint_id -> (per-key encodings, chain depth, timestamp, encoded size)
+        self.checkpoint_codec = checkpoint_codec
+        self._checkpoint_codec, _ = parse_codec_spec(checkpoint_codec)
+        self.checkpoint_cache_bytes = checkpoint_cache_bytes
+        self._checkpoint_cache: "OrderedDict[str, Tuple[Dict[str, bytes], int, datetime.datetime, int]]" = OrderedDict()
+        self._checkpoint_cache_size = 0
+        self._checkpoint_lock = threading.RLock()  # Reentrant: compaction reads checkpoints while holding it
+        self._compaction_stop: Optional[threading.Event] = None  # Set to stop background compaction
+
+        # project_id -> cached get_project_summary result, dropped on task and error writes
+        self._project_summaries: Dict[str, Dict[str, Any]] = {}
+        self._summary_generation = 0  # Bumped on every invalidation
+        self._summary_lock = threading.Lock()
+
+        if not read_only:
+            self._initialize_schema()
     
-    def _initialize_schema(self):
-        """Initialize the database schema if it doesn't exist."""
+    @classmethod
+    def shared(cls, db_path: str = None, read_only: bool = False) -> "DatabaseConnector":
+        """
+        Get the process-wide connector for a database, creating it on first use.
         
-        # Create projects table
-        self.conn.execute("""
-            CREATE TABLE IF NOT EXISTS projects (
-                id VARCHAR PRIMARY KEY,
-                name VARCHAR NOT NULL,
-                description TEXT,
-                status VARCHAR,
-                created_at TIMESTAMP,
-                updated_at TIMESTAMP
-            )
-        """)
+        Reusing one connector avoids reopening the file and re-running schema
+        setup on every Streamlit rerun. DuckDB allows only one configuration
+        per database file per process, so a read-only connector shares the
+        shared writable connection, which is opened first if necessary. Only
+        when the file cannot be opened for writing (e.g. another process holds
+        it) does a read-only connector open its own read-only connection.
         
-        # Create tasks table
-        self.conn.execute("""
-            CREATE TABLE IF NOT EXISTS tasks (
-                id VARCHAR PRIMARY KEY,
-                project_id VARCHAR,
-                title VARCHAR NOT NULL,
-                description TEXT,
-                assigned_agent VARCHAR,
-                status VARCHAR,
-                created_at TIMESTAMP,
-                updated_at TIMESTAMP,
-                FOREIGN KEY (project_id) REFERENCES projects(id)
-            )
-        """)
+        Args:
+            db_path: Path to the DuckDB database file
+            read_only: Whether to get a read-only connector
+            
+        Returns:
+            Shared database connector
+        """
+        db_path = os.path.abspath(db_path or _default_db_path())
+        
+        with _shared_connectors_lock:
+            connector = _shared_connectors.get((db_path, read_only))
+            if connector is None or not connector._is_open():
+                writer = _shared_connectors.get((db_path, False))
+                if writer is None or not writer._is_open():
+                    try:
+                        writer = cls(db_path)
+                    except duckdb.IOException:
+                        if not read_only:
+                            raise
+                        writer = None
+                    else:
+                        _shared_connectors[(db_path, False)] = writer
+                
+                if not read_only:
+                    connector = writer
+                elif writer is not None:
+                    connector = cls(db_path, read_only=True, connection=writer._root_conn)
+                    connector._connection_owner = writer
+                else:
+                    connector = cls(db_path, read_only=True)
+                _shared_connectors[(db_path, read_only)] = connector
+            return connector
+    
+    @property
+    def conn(self) -> Optional[duckdb.DuckDBPyConnection]:
+        """DuckDB cursor for the calling thread, or None once closed."""
+        if self._root_conn is None:
+            return None
         
-        # Create agent_outputs table
-        self.conn.execute("""
-            CREATE TABLE IF NOT EXISTS agent_outputs (
-                id VARCHAR PRIMARY KEY,
-                task_id VARCHAR,
-                agent_id VARCHAR,
-                output_type VARCHAR,
-                content TEXT,
-                created_at TIMESTAMP,
-                FOREIGN KEY (task_id) REFERENCES tasks(id)
-            )
-        """)
+        cursor = getattr(self._local, "cursor", None)
+        if cursor is None:
+            cursor = self._root_conn.cursor()
+            self._local.cursor = cursor
+            with self._cursors_lock:
+                self._cursors[id(cursor)] = cursor
+            # Close the cursor when its thread goes away (Streamlit runs each rerun in a new thread)
+            # The finalizer must not refer to self, or the thread would keep the connector alive
+            weakref.finalize(threading.current_thread(), _release_cursor,
+                             self._cursors, self._cursors_lock, id(cursor))
+        return cursor
+    
+    def _is_open(self) -> bool:
+        """Check whether this connector and any connector it borrows from are open."""
+        if self._root_conn is None:
+            return False
+        return self._connection_owner is None or self._connection_owner._is_open()
+    
+    def _check_writable(self) -> None:
+        """Raise if this connector is read-only."""
+        if self.read_only:
+            raise PermissionError(f"Database connector for {self.db_path} is read-only")
+    
+    def _in_transaction(self) -> bool:
+        """Check whether the current thread is inside a transaction() block."""
+        return getattr(self._local, "transaction_depth", 0) > 0
+    
+    def after_commit(self, callback: Callable[[], Any],
+                     on_rollback: Optional[Callable[[], Any]] = None) -> None:
+        """
+        Run a callback once the current thread's transaction commits.
         
-        # Create errors table
-        self.conn.execute("""
-            CREATE TABLE IF NOT EXISTS errors (
-                id VARCHAR PRIMARY KEY,
-                task_id VARCHAR,
-                agent_id VARCHAR,
-                error_type VARCHAR,
-                error_message TEXT,
-                stack_trace TEXT,
-                status VARCHAR,
-                created_at TIMESTAMP,
-                resolved_at TIMESTAMP,
-                resolution TEXT,
-                FOREIGN KEY (task_id) REFERENCES tasks(id)
-            )
-        """)
+        Outside a transaction the callback runs immediately. Inside one it runs
+        after the COMMIT, or on_rollback runs instead if the transaction rolls
+        back, so in-memory state is only changed for work that was kept.
         
-        # Create system_checkpoints table
+        Args:
+            callback: Function to call after the commit
+            on_rollback: Optional function to call after a rollback
+        """
+        if self._in_transaction():
+            self._local.transaction_callbacks.append((callback, on_rollback))
+        else:
+            self._run_transaction_callback(callback)
+    
+    @staticmethod
+    def _run_transaction_callback(callback: Callable[[], Any]) -> None:
+        try:
+            callback()
+        except Exception as e:
+            print(f"Error running transaction callback: {str(e)}")
+    
+    @contextmanager
+    def transaction(self):
+        """
+        Run a block of operations on this thread in one database transaction.
+        
+        The transaction commits when the block exits and rolls back if it
+        raises. Nested blocks join the outermost transaction. Agent outputs
+        stored in the block are written just before the commit. A statement
+        that fails inside the block aborts the transaction even if its error
+        is caught, so the block then raises on exit instead of committing.
+        
+        Usage:
+            with db.transaction():
+                db.update_task(task_id, {"status": "completed"})
+                db.store_agent_output(task_id, agent_id, "code", code)
+        """
+        self._check_writable()
+        if self._in_transaction():
+            self._local.transaction_depth += 1
+            try:
+                yield self
+            finally:
+                self._local.transaction_depth -= 1
+            return
+        
+        conn = self.conn
+        # Write outputs buffered by any thread first, so a rollback cannot lose them
+        self.flush()
+        conn.execute("BEGIN TRANSACTION")
+        self._local.transaction_depth = 1
+        self._local.transaction_outputs = []
+        self._local.transaction_checkpoints = []
+        self._local.transaction_summaries = set()
+        self._local.transaction_callbacks = []
+        committed = False
+        try:
+            yield self
+            self.flush()
+            if self._transaction_aborted():
+                # DuckDB would accept the COMMIT and silently roll everything back
+                raise duckdb.TransactionException(
+                    "Transaction aborted by a failed statement inside it; all of its writes were rolled back")
+            conn.execute("COMMIT")
+            committed = True
+        except BaseException:
+            try:
+                conn.execute("ROLLBACK")
+            except duckdb.Error:
+                pass  # A failed COMMIT has already rolled back
+            # Forget cached state that was never committed
+            with self._checkpoint_lock:
+                for checkpoint_id in self._local.transaction_checkpoints:
+                    self._uncache_checkpoint(checkpoint_id)
+            raise
+        else:
+            # Other threads could cache pre-commit counts until now
+            self._drop_project_summaries(self._local.transaction_summaries)
+        finally:
+            self._local.transaction_depth = 0
+            self._local.transaction_outputs = None
+            self._local.transaction_checkpoints = None
+            self._local.transaction_summaries = None
+            callbacks = self._local.transaction_callbacks
+            self._local.transaction_callbacks = None
+            # Run after the state reset so callbacks can start their own transactions
+            for on_commit, on_rollback in callbacks:
+                callback = on_commit if committed else on_rollback
+                if callback is not None:
+                    self._run_transaction_callback(callback)
+    
+    def _transaction_aborted(self) -> bool:
+        """Check whether a statement failed in this thread's transaction, even if its error was caught."""
+        try:
+            self.conn.execute("SELECT 1")
+        except duckdb.Error:
+            # Reported as TransactionException by newer DuckDB, InvalidInputException by older ones
+            return True
+        return False
+    
+    def _initialize_schema(self):
+        """
+        Bring the database schema up to SCHEMA_VERSION.
+        
+        The recorded schema version is checked first, so a current database
+        costs one query. The check runs for every new connection, since the
+        file may have been replaced since this process last saw it; shared()
+        avoids repeating it for connectors that are reused.
+        """
+        with _schema_lock:
+            try:
+                current_version = self.conn.execute("SELECT MAX(version) FROM schema_version").fetchone()[0] or 0
+            except duckdb.CatalogException:
+                current_version = 0
+            
+            if current_version < SCHEMA_VERSION:
+                self._run_migrations(current_version)
+    
+    def _run_migrations(self, current_version: int):
+        """
+        Apply all schema migrations newer than the current version.
+        
+        Each migration runs in its own transaction together with its version record.
+        
+        Args:
+            current_version: Schema version the database is at
+        """
         self.conn.execute("""
-            CREATE TABLE IF NOT EXISTS system_checkpoints (
-                id VARCHAR PRIMARY KEY,
-                timestamp TIMESTAMP,
-                checkpoint_data TEXT
+            CREATE TABLE IF NOT EXISTS schema_version (
+                version INTEGER PRIMARY KEY,
+                applied_at TIMESTAMP
             )
         """)
+        
+        for version, statements in SCHEMA_MIGRATIONS:
+            if version <= current_version:
+                continue
+            
+            with self.transaction():
+                for statement in statements:
+                    self.conn.execute(statement)
+                self.conn.execute("""
+                    INSERT INTO schema_version (version, applied_at) VALUES (?, ?)
+                """, (version, datetime.datetime.now()))
     
     def create_project(self, name: str, description: str = None) -> str:
         """
@@ -110,6 +596,7 @@ class DatabaseConnector:
         Returns:
             Project ID
         """
+        self._check_writable()
         project_id = str(uuid.uuid4())
         now = datetime.datetime.now()
         
@@ -141,14 +628,21 @@ class DatabaseConnector:
         columns = ["id", "name", "description", "status", "created_at", "updated_at"]
         return {columns[i]: result[i] for i in range(len(columns))}
     
-    def get_all_projects(self) -> List[Dict[str, Any]]:
+    def get_all_projects(self, as_frame: Union[bool, str] = False) -> Rows:
         """
         Get all projects.
         
+        Args:
+            as_frame: Return a pandas DataFrame (True) or pyarrow Table ("arrow")
+                instead of a list of dictionaries
+        
         Returns:
             List of project data
         """
-        results = self.conn.execute("SELECT * FROM projects").fetchall()
+        result = self.conn.execute("SELECT * FROM projects")
+        if as_frame:
+            return _fetch_frame(result, as_frame)
+        results = result.fetchall()
         
         # Convert results to list of dictionaries
         columns = ["id", "name", "description", "status", "created_at", "updated_at"]
@@ -165,11 +659,7 @@ class DatabaseConnector:
         Returns:
             True if successful, False otherwise
         """
-        # Get current project data
-        project = self.get_project(project_id)
-        if not project:
-            return False
-        
+        self._check_writable()
         # Update fields
         updated_fields = {}
         for field in ["name", "description", "status"]:
@@ -177,7 +667,7 @@ class DatabaseConnector:
                 updated_fields[field] = data[field]
         
         if not updated_fields:
-            return True  # Nothing to update
+            return self.get_project(project_id) is not None  # Nothing to update
         
         # Build SQL query
         set_clause = ", ".join(f"{field} = ?" for field in updated_fields.keys())
@@ -190,12 +680,13 @@ class DatabaseConnector:
         # Add project_id
         set_values.append(project_id)
         
-        # Execute update
-        self.conn.execute(f"""
+        # Execute update; the updated row count tells whether the project exists
+        # (RETURNING is rejected on tables referenced by foreign keys)
+        updated = self.conn.execute(f"""
             UPDATE projects SET {set_clause} WHERE id = ?
-        """, set_values)
+        """, set_values).fetchone()[0]
         
-        return True
+        return updated > 0
     
     def create_task(self, project_id: str, title: str, description: str = None, 
                    assigned_agent: str = None) -> str:
@@ -211,6 +702,7 @@ class DatabaseConnector:
         Returns:
             Task ID
         """
+        self._check_writable()
         task_id = str(uuid.uuid4())
         now = datetime.datetime.now()
         
@@ -218,9 +710,59 @@ class DatabaseConnector:
             INSERT INTO tasks (id, project_id, title, description, assigned_agent, status, created_at, updated_at)
             VALUES (?, ?, ?, ?, ?, ?, ?, ?)
         """, (task_id, project_id, title, description, assigned_agent, "created", now, now))
+        self._invalidate_project_summary(project_id)
         
         return task_id
     
+    def create_tasks_bulk(self, project_id: str, tasks: List[Dict[str, Any]]) -> List[str]:
+        """
+        Create several tasks for a project with one INSERT, in one transaction.
+        
+        Tasks may refer to each other in "dependencies" by the provisional
+        "id" they had in a task breakdown; those references are stored with
+        the new task IDs.
+        
+        Args:
+            project_id: Project ID
+            tasks: Task data with "title" and optional "description",
+                "assigned_agent", "id" and "dependencies" keys
+            
+        Returns:
+            Task IDs, in the order of tasks
+        """
+        self._check_writable()
+        if not tasks:
+            return []
+        
+        now = datetime.datetime.now()
+        task_ids = [str(uuid.uuid4()) for _ in tasks]
+        placeholders = ", ".join(["(?, ?, ?, ?, ?, ?, ?, ?)"] * len(tasks))
+        params = []
+        for n, (task_id, task) in enumerate(zip(task_ids, tasks)):
+            # Distinct timestamps keep the tasks in order for created_at sorts
+            created_at = now + datetime.timedelta(microseconds=n)
+            params.extend((task_id, project_id, task.get("title"), task.get("description"),
+                           task.get("assigned_agent"), "created", created_at, created_at))
+        
+        id_map = {task["id"]: task_id for task, task_id in zip(tasks, task_ids) if task.get("id")}
+        dependencies = [(task_id, id_map.get(dep, dep))
+                        for task, task_id in zip(tasks, task_ids)
+                        for dep in dict.fromkeys(task.get("dependencies") or [])]
+        
+        with self.transaction():
+            self.conn.execute(f"""
+                INSERT INTO tasks (id, project_id, title, description, assigned_agent, status, created_at, updated_at)
+                VALUES {placeholders}
+            """, params)
+            if dependencies:
+                self.conn.execute(f"""
+                    INSERT INTO task_dependencies (task_id, depends_on)
+                    VALUES {", ".join(["(?, ?)"] * len(dependencies))}
+                """, [value for edge in dependencies for value in edge])
+            self._invalidate_project_summary(project_id)
+        
+        return task_ids
+    
     def get_task(self, task_id: str) -> Dict[str, Any]:
         """
         Get task by ID.
@@ -243,25 +785,53 @@ class DatabaseConnector:
                   "created_at", "updated_at"]
         return {columns[i]: result[i] for i in range(len(columns))}
     
-    def get_tasks_by_project(self, project_id: str) -> List[Dict[str, Any]]:
+    def get_tasks_by_project(self, project_id: str, as_frame: Union[bool, str] = False) -> Rows:
         """
         Get all tasks for a project.
         
         Args:
             project_id: Project ID
+            as_frame: Return a pandas DataFrame (True) or pyarrow Table ("arrow")
+                instead of a list of dictionaries
             
         Returns:
-            List of task data
+            List of task data, each with the IDs of the tasks it depends on
+            under "dependencies"
         """
-        results = self.conn.execute("""
-            SELECT * FROM tasks WHERE project_id = ?
-        """, (project_id,)).fetchall()
+        result = self.conn.execute("""
+            SELECT t.*, COALESCE((
+                SELECT list(d.depends_on ORDER BY d.rowid) FROM task_dependencies d
+                WHERE d.task_id = t.id
+            ), []::VARCHAR[]) AS dependencies
+            FROM tasks t WHERE t.project_id = ?
+        """, (project_id,))
+        if as_frame:
+            return _fetch_frame(result, as_frame)
+        results = result.fetchall()
         
         # Convert results to list of dictionaries
         columns = ["id", "project_id", "title", "description", "assigned_agent", "status", 
-                  "created_at", "updated_at"]
+                  "created_at", "updated_at", "dependencies"]
         return [{columns[i]: row[i] for i in range(len(columns))} for row in results]
     
+    def get_first_task_id(self, project_id: str) -> Optional[str]:
+        """
+        Get the ID of the earliest task of a project.
+        
+        Args:
+            project_id: Project ID
+            
+        Returns:
+            Task ID, or None if the project has no tasks
+        """
+        result = self.conn.execute("""
+            SELECT id FROM tasks WHERE project_id = ?
+            ORDER BY created_at
+            LIMIT 1
+        """, (project_id,)).fetchone()
+        
+        return result[0] if result else None
+    
     def update_task(self, task_id: str, data: Dict[str, Any]) -> bool:
         """
         Update task data.
@@ -273,11 +843,7 @@ class DatabaseConnector:
         Returns:
             True if successful, False otherwise
         """
-        # Get current task data
-        task = self.get_task(task_id)
-        if not task:
-            return False
-        
+        self._check_writable()
         # Update fields
         updated_fields = {}
         for field in ["title", "description", "assigned_agent", "status"]:
@@ -285,7 +851,7 @@ class DatabaseConnector:
                 updated_fields[field] = data[field]
         
         if not updated_fields:
-            return True  # Nothing to update
+            return self.get_task(task_id) is not None  # Nothing to update
         
         # Build SQL query
         set_clause = ", ".join(f"{field} = ?" for field in updated_fields.keys())
@@ -298,15 +864,20 @@ class DatabaseConnector:
         # Add task_id
         set_values.append(task_id)
         
-        # Execute update
-        self.conn.execute(f"""
+        # Execute update; the updated row count tells whether the task exists
+        # (RETURNING is rejected on tables referenced by foreign keys)
+        updated = self.conn.execute(f"""
             UPDATE tasks SET {set_clause} WHERE id = ?
-        """, set_values)
+        """, set_values).fetchone()[0]
+        if not updated:
+            return False
+        self._invalidate_project_summary()
         
         return True
     
     def store_agent_output(self, task_id: str, agent_id: str, output_type: str, 
-                          content: Union[str, Dict, List]) -> str:
+                          content: Union[str, Dict, List, None] = None,
+                          content_json: Optional[str] = None) -> str:
         """
         Store agent output for a task.
         
@@ -315,16 +886,20 @@ class DatabaseConnector:
             agent_id: Agent ID
             output_type: Type of output
             content: Output content
+            content_json: Output content that is already encoded as JSON text
+                (e.g. Message.to_json), stored without re-encoding instead of content
             
         Returns:
             Output ID
         """
+        self._check_writable()
         output_id = str(uuid.uuid4())
         now = datetime.datetime.now()
         
         # Always convert content to JSON string using safe serialization
-        # First convert to string if it's not already
-        if not isinstance(content, str):
+        if content_json is not None:
+            content = content_json
+        else:
             try:
                 content = serialize_state(content)
             except Exception as e:
@@ -332,34 +907,80 @@ class DatabaseConnector:
                 print(f"Error serializing content: {str(e)}")
                 content = json.dumps({"error": f"Could not serialize content: {str(e)}"})
         
-        self.conn.execute("""
-            INSERT INTO agent_outputs (id, task_id, agent_id, output_type, content, created_at)
-            VALUES (?, ?, ?, ?, ?, ?)
-        """, (output_id, task_id, agent_id, output_type, content, now))
+        # Inside a transaction the row is written with the transaction's other changes
+        row = (output_id, task_id, agent_id, output_type, content, now)
+        if self._in_transaction():
+            self._local.transaction_outputs.append(row)
+            return output_id
+        
+        # Buffer the row; it is written once the batch fills or the flush interval passes
+        with self._output_lock:
+            self._output_buffer.append(row)
+            pending = len(self._output_buffer)
+            if pending < self.output_batch_size and self._flush_timer is None:
+                # The timer holds only a weak reference, so it does not keep the connector alive
+                self._flush_timer = threading.Timer(self.output_flush_interval, _flush_after_interval,
+                                                    (weakref.ref(self),))
+                self._flush_timer.daemon = True
+                self._flush_timer.start()
+
+        if pending >= self.output_batch_size:
+            self.flush()
         
         return output_id
+
+    def flush(self) -> int:
+        """
+        Write all buffered agent outputs to the database.
+
+        Inside a transaction only the outputs stored in that transaction are
+        written, and a failing row raises instead of being skipped.
+
+        Returns:
+            Number of outputs written
+        """
+        if self._in_transaction():
+            # Other threads' outputs stay buffered rather than joining a transaction that may roll back
+            return _flush_output_buffer(self.conn, self._local.transaction_outputs, self._output_lock,
+                                        retry_rows=False)
+        with self._output_lock:
+            timer, self._flush_timer = self._flush_timer, None
+        if timer is not None:
+            timer.cancel()
+        return _flush_output_buffer(self.conn, self._output_buffer, self._output_lock)
     
-    def get_agent_outputs(self, task_id: str, agent_id: str = None) -> List[Dict[str, Any]]:
+    def get_agent_outputs(self, task_id: str, agent_id: str = None,
+                          as_frame: Union[bool, str] = False) -> Rows:
         """
         Get agent outputs for a task.
         
         Args:
             task_id: Task ID
             agent_id: Optional agent ID to filter
+            as_frame: Return a pandas DataFrame (True) or pyarrow Table ("arrow")
+                instead of a list of dictionaries
+                (content is then left as JSON text)
             
         Returns:
             List of output data
         """
+        # Make buffered outputs visible to the query, including those of the
+        # writer whose connection a read-only connector shares
+        (self._connection_owner or self).flush()
+
         if agent_id:
-            results = self.conn.execute("""
+            result = self.conn.execute("""
                 SELECT * FROM agent_outputs WHERE task_id = ? AND agent_id = ?
                 ORDER BY created_at DESC
-            """, (task_id, agent_id)).fetchall()
+            """, (task_id, agent_id))
         else:
-            results = self.conn.execute("""
+            result = self.conn.execute("""
                 SELECT * FROM agent_outputs WHERE task_id = ?
                 ORDER BY created_at DESC
-            """, (task_id,)).fetchall()
+            """, (task_id,))
+        if as_frame:
+            return _fetch_frame(result, as_frame)
+        results = result.fetchall()
         
         # Convert results to list of dictionaries
         columns = ["id", "task_id", "agent_id", "output_type", "content", "created_at"]
@@ -375,6 +996,48 @@ class DatabaseConnector:
         
         return outputs
     
+    def recluster_agent_outputs(self) -> int:
+        """
+        Rewrite agent_outputs physically ordered by (task_id, created_at).
+        
+        Flushed batches are already sorted, but batches interleave over time;
+        this maintenance step restores a single ordering so per-task scans
+        touch as few row groups as possible.
+        
+        Returns:
+            Number of rewritten rows
+        """
+        self._check_writable()
+        self.flush()
+        
+        with self.transaction():
+            # DuckDB refuses a foreign key to an indexed table, so tasks' index is rebuilt around it
+            self.conn.execute("DROP INDEX IF EXISTS idx_tasks_project_id")
+            self.conn.execute("""
+                CREATE TABLE agent_outputs_sorted (
+                    id VARCHAR PRIMARY KEY,
+                    task_id VARCHAR,
+                    agent_id VARCHAR,
+                    output_type VARCHAR,
+                    content TEXT,
+                    created_at TIMESTAMP,
+                    FOREIGN KEY (task_id) REFERENCES tasks(id)
+                )
+            """)
+            self.conn.execute("""
+                INSERT INTO agent_outputs_sorted
+                SELECT * FROM agent_outputs ORDER BY task_id, created_at
+            """)
+            count = self.conn.execute("SELECT COUNT(*) FROM agent_outputs_sorted").fetchone()[0]
+            self.conn.execute("DROP TABLE agent_outputs")
+            self.conn.execute("ALTER TABLE agent_outputs_sorted RENAME TO agent_outputs")
+            self.conn.execute("""
+                CREATE INDEX idx_agent_outputs_task_agent ON agent_outputs (task_id, agent_id)
+            """)
+            self.conn.execute("CREATE INDEX idx_tasks_project_id ON tasks (project_id)")
+        
+        return count
+    
     def store_error(self, task_id: str, agent_id: str, error_type: str, error_message: str,
                    stack_trace: str = None) -> str:
         """
@@ -390,6 +1053,7 @@ class DatabaseConnector:
         Returns:
             Error ID
         """
+        self._check_writable()
         error_id = str(uuid.uuid4())
         now = datetime.datetime.now()
         
@@ -398,6 +1062,7 @@ class DatabaseConnector:
                               status, created_at)
             VALUES (?, ?, ?, ?, ?, ?, ?, ?)
         """, (error_id, task_id, agent_id, error_type, error_message, stack_trace, "open", now))
+        self._invalidate_project_summary()
         
         return error_id
     
@@ -423,46 +1088,56 @@ class DatabaseConnector:
                   "status", "created_at", "resolved_at", "resolution"]
         return {columns[i]: result[i] for i in range(len(columns))}
     
-    def get_errors_by_task(self, task_id: str) -> List[Dict[str, Any]]:
+    def get_errors_by_task(self, task_id: str, as_frame: Union[bool, str] = False) -> Rows:
         """
         Get all errors for a task.
         
         Args:
             task_id: Task ID
+            as_frame: Return a pandas DataFrame (True) or pyarrow Table ("arrow")
+                instead of a list of dictionaries
             
         Returns:
             List of error data
         """
-        results = self.conn.execute("""
+        result = self.conn.execute("""
             SELECT * FROM errors WHERE task_id = ?
             ORDER BY created_at DESC
-        """, (task_id,)).fetchall()
+        """, (task_id,))
+        if as_frame:
+            return _fetch_frame(result, as_frame)
+        results = result.fetchall()
         
         # Convert results to list of dictionaries
         columns = ["id", "task_id", "agent_id", "error_type", "error_message", "stack_trace",
                   "status", "created_at", "resolved_at", "resolution"]
         return [{columns[i]: row[i] for i in range(len(columns))} for row in results]
     
-    def get_all_errors(self, status: str = None) -> List[Dict[str, Any]]:
+    def get_all_errors(self, status: str = None, as_frame: Union[bool, str] = False) -> Rows:
         """
         Get all errors, optionally filtered by status.
         
         Args:
             status: Optional status to filter
+            as_frame: Return a pandas DataFrame (True) or pyarrow Table ("arrow")
+                instead of a list of dictionaries
             
         Returns:
             List of error data
         """
         if status:
-            results = self.conn.execute("""
+            result = self.conn.execute("""
                 SELECT * FROM errors WHERE status = ?
                 ORDER BY created_at DESC
-            """, (status,)).fetchall()
+            """, (status,))
         else:
-            results = self.conn.execute("""
+            result = self.conn.execute("""
                 SELECT * FROM errors
                 ORDER BY created_at DESC
-            """).fetchall()
+            """)
+        if as_frame:
+            return _fetch_frame(result, as_frame)
+        results = result.fetchall()
         
         # Convert results to list of dictionaries
         columns = ["id", "task_id", "agent_id", "error_type", "error_message", "stack_trace",
@@ -483,114 +1158,537 @@ class DatabaseConnector:
         Returns:
             True if successful, False otherwise
         """
-        # Get current error data
-        error = self.get_error(error_id)
-        if not error:
-            return False
-        
+        self._check_writable()
         # Use current time if not provided
         if resolved_at is None and status == "resolved":
             resolved_at = datetime.datetime.now()
         
         # Build SQL query
+        # The updated row count tells whether the error exists without a separate read
         if status == "resolved":
-            self.conn.execute("""
+            updated = self.conn.execute("""
                 UPDATE errors SET status = ?, resolution = ?, resolved_at = ?
                 WHERE id = ?
-            """, (status, resolution, resolved_at, error_id))
+            """, (status, resolution, resolved_at, error_id)).fetchone()[0]
         else:
-            self.conn.execute("""
+            updated = self.conn.execute("""
                 UPDATE errors SET status = ?
                 WHERE id = ?
-            """, (status, error_id))
+            """, (status, error_id)).fetchone()[0]
+        if not updated:
+            return False
+        self._invalidate_project_summary()
         
         return True
     
-    def store_checkpoint(self, checkpoint_data: Dict[str, Any]) -> str:
+    def get_project_summary(self, project_id: str) -> Dict[str, Any]:
+        """
+        Get task and error counts for a project.
+        
+        The counts come from one aggregate query and are cached until a task
+        or error write invalidates them. Writes inside a transaction
+        invalidate the cache when the transaction commits.
+        
+        Args:
+            project_id: Project ID
+            
+        Returns:
+            Dictionary with "tasks" and "errors" counts: "total" and one
+            entry per status
+        """
+        # Read-only connectors sharing a writer's connection use its cache, which its writes invalidate
+        owner = self._connection_owner or self
+        if self._in_transaction():
+            # Uncommitted counts must not be cached, and the cache may predate this transaction's writes
+            return self._count_project_summary(project_id)
+        
+        with owner._summary_lock:
+            cached = owner._project_summaries.get(project_id)
+            generation = owner._summary_generation
+        
+        if cached is None:
+            cached = self._count_project_summary(project_id)
+            with owner._summary_lock:
+                # Skip caching if a write committed while the query ran
+                if owner._summary_generation == generation:
+                    owner._project_summaries[project_id] = cached
+        
+        return {kind: dict(counts) for kind, counts in cached.items()}
+    
+    def _count_project_summary(self, project_id: str) -> Dict[str, Dict[str, int]]:
+        """Count a project's tasks and errors by status with one aggregate query."""
+        results = self.conn.execute("""
+            SELECT 'tasks', status, COUNT(*) FROM tasks
+            WHERE project_id = ?
+            GROUP BY status
+            UNION ALL
+            SELECT 'errors', e.status, COUNT(*) FROM errors e
+            JOIN tasks t ON e.task_id = t.id
+            WHERE t.project_id = ?
+            GROUP BY e.status
+        """, (project_id, project_id)).fetchall()
+        
+        summary = {"tasks": {"total": 0}, "errors": {"total": 0}}
+        for kind, status, count in results:
+            summary[kind][status] = count
+            summary[kind]["total"] += count
+        return summary
+    
+    def _invalidate_project_summary(self, project_id: Optional[str] = None) -> None:
+        """
+        Drop the cached summary of a project, or of all projects if None.
+        
+        Inside a transaction the summary is dropped when the transaction commits.
+        """
+        if self._in_transaction():
+            self._local.transaction_summaries.add(project_id)
+        else:
+            self._drop_project_summaries({project_id})
+    
+    def _drop_project_summaries(self, project_ids: set) -> None:
+        """Drop cached summaries; None in project_ids drops all of them."""
+        with self._summary_lock:
+            self._summary_generation += 1
+            if None in project_ids:
+                self._project_summaries.clear()
+            else:
+                for project_id in project_ids:
+                    self._project_summaries.pop(project_id, None)
+    
+    def store_checkpoint(self, checkpoint_data: Dict[str, Any], parent_id: Optional[str] = None,
+                         project_id: Optional[str] = None) -> str:
         """
         Store a system checkpoint.
         
+        When the parent checkpoint was stored recently by this connector, only
+        the top-level keys that changed since the parent are stored (a delta).
+        A full snapshot is stored every FULL_CHECKPOINT_INTERVAL checkpoints,
+        and whenever the parent is unknown. Values are encoded one by one with
+        the connector's checkpoint codec into a blob (see core.checkpoints).
+        
         Args:
             checkpoint_data: Checkpoint data
+            parent_id: ID of the checkpoint this one follows
+            project_id: Project the checkpoint belongs to
             
         Returns:
             Checkpoint ID
         """
+        self._check_writable()
         checkpoint_id = str(uuid.uuid4())
         now = datetime.datetime.now()
         
-        # Convert checkpoint data to JSON string with datetime handling
-        checkpoint_json = serialize_state(checkpoint_data)
+        codec = self._checkpoint_codec
+        encoded = _encode_state_keys(checkpoint_data, codec) if isinstance(checkpoint_data, Mapping) else None
         
-        self.conn.execute("""
-            INSERT INTO system_checkpoints (id, timestamp, checkpoint_data)
-            VALUES (?, ?, ?)
-        """, (checkpoint_id, now, checkpoint_json))
+        # Held until the row is written so compaction cannot delete the parent in between
+        with self._checkpoint_lock:
+            parent = self._checkpoint_cache.get(parent_id) if parent_id and encoded is not None else None
+            
+            checkpoint_json = checkpoint_blob = checkpoint_codec = None
+            if encoded is None:
+                # Convert checkpoint data to JSON string with datetime handling
+                checkpoint_json = serialize_state(checkpoint_data)
+                depth = 0
+            elif parent is not None and parent[1] + 1 < FULL_CHECKPOINT_INTERVAL:
+                parent_encoded, parent_depth = parent[:2]
+                changed = {key: value for key, value in encoded.items()
+                           if parent_encoded.get(key) != value}
+                removed = [key for key in parent_encoded if key not in encoded]
+                checkpoint_blob = encode_frame(self.checkpoint_codec, changed, removed)
+                depth = parent_depth + 1
+            else:
+                checkpoint_blob = encode_frame(self.checkpoint_codec, encoded)
+                depth = 0
+            if checkpoint_blob is not None:
+                checkpoint_codec = self.checkpoint_codec
+            
+            self.conn.execute("""
+                INSERT INTO system_checkpoints
+                    (id, timestamp, checkpoint_data, checkpoint_blob, codec, parent_id, chain_depth, project_id)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, (checkpoint_id, now, checkpoint_json, checkpoint_blob, checkpoint_codec,
+                  parent_id, depth, project_id))
+            
+            if encoded is not None:
+                self._cache_checkpoint(checkpoint_id, encoded, depth, now)
+            if self._in_transaction():
+                self._local.transaction_checkpoints.append(checkpoint_id)
         
         return checkpoint_id
     
-    def get_latest_checkpoint(self) -> Dict[str, Any]:
+    def _cache_checkpoint(self, checkpoint_id: str, encoded: Dict[str, bytes], depth: int,
+                          timestamp: datetime.datetime) -> None:
+        """Add a checkpoint to the LRU cache, evicting the least recently used ones over the size limit.
+        
+        Must be called with the checkpoint lock held.
+        """
+        size = sum(len(value) for value in encoded.values())
+        self._uncache_checkpoint(checkpoint_id)
+        if size > self.checkpoint_cache_bytes:
+            return
+        
+        self._checkpoint_cache[checkpoint_id] = (encoded, depth, timestamp, size)
+        self._checkpoint_cache_size += size
+        while self._checkpoint_cache_size > self.checkpoint_cache_bytes:
+            _, evicted = self._checkpoint_cache.popitem(last=False)
+            self._checkpoint_cache_size -= evicted[3]
+    
+    def _uncache_checkpoint(self, checkpoint_id: str) -> None:
+        """Remove a checkpoint from the LRU cache. Must be called with the checkpoint lock held."""
+        cached = self._checkpoint_cache.pop(checkpoint_id, None)
+        if cached is not None:
+            self._checkpoint_cache_size -= cached[3]
+    
+    def get_latest_checkpoint(self, project_id: Optional[str] = None) -> Dict[str, Any]:
         """
         Get the latest system checkpoint.
 
+        Args:
+            project_id: Optional project ID to get the latest checkpoint of
+
         Returns:
             Checkpoint data
         """
-        result = self.conn.execute("""
-            SELECT * FROM system_checkpoints
-            ORDER BY timestamp DESC
-            LIMIT 1
-        """).fetchone()
+        if project_id:
+            result = self.conn.execute("""
+                SELECT id FROM system_checkpoints
+                WHERE project_id = ?
+                ORDER BY timestamp DESC
+                LIMIT 1
+            """, (project_id,)).fetchone()
+        else:
+            result = self.conn.execute("""
+                SELECT id FROM system_checkpoints
+                ORDER BY timestamp DESC
+                LIMIT 1
+            """).fetchone()
 
         if not result:
             return None
 
-        # Convert result to dictionary
-        columns = ["id", "timestamp", "checkpoint_data"]
-        checkpoint = {columns[i]: result[i] for i in range(len(columns))}
-
-        # Parse checkpoint data with datetime handling
-        try:
-            checkpoint["checkpoint_data"] = deserialize_state(checkpoint["checkpoint_data"])
-        except (json.JSONDecodeError, TypeError):
-            # Keep as is if not valid JSON
-            pass
-
-        return checkpoint
+        return self.get_checkpoint(result[0])
 
     def get_checkpoint(self, checkpoint_id: str) -> Dict[str, Any]:
         """
         Get a system checkpoint by ID.
+        
+        Delta checkpoints are reconstructed by replaying their chain of
+        deltas on top of the nearest full snapshot, fetched in one query.
+        Binary checkpoints come back as a LazyState whose values are only
+        decoded when accessed. Recently stored or loaded checkpoints are
+        served from memory without querying the database.
 
         Args:
             checkpoint_id: Checkpoint ID
 
         Returns:
             Checkpoint data
+
+        Raises:
+            UnknownCodecError: If the checkpoint was written with a codec that
+                is not installed
         """
-        result = self.conn.execute("""
-            SELECT * FROM system_checkpoints
-            WHERE id = ?
-        """, (checkpoint_id,)).fetchone()
+        with self._checkpoint_lock:
+            cached = self._checkpoint_cache.get(checkpoint_id)
+            if cached is not None:
+                self._checkpoint_cache.move_to_end(checkpoint_id)
+        if cached is not None:
+            state = LazyState()
+            for key, data in cached[0].items():
+                state.set_encoded(key, self._checkpoint_codec, data)
+            return {"id": checkpoint_id, "timestamp": cached[2], "checkpoint_data": state}
+        
+        results = self.conn.execute("""
+            WITH RECURSIVE chain AS (
+                SELECT id, timestamp, checkpoint_data, checkpoint_blob, codec, parent_id, chain_depth
+                FROM system_checkpoints
+                WHERE id = ?
+                UNION ALL
+                SELECT c.id, c.timestamp, c.checkpoint_data, c.checkpoint_blob, c.codec, c.parent_id, c.chain_depth
+                FROM system_checkpoints c
+                JOIN chain ON c.id = chain.parent_id
+                WHERE chain.chain_depth > 0
+            )
+            SELECT id, timestamp, checkpoint_data, checkpoint_blob, codec, chain_depth FROM chain
+            ORDER BY chain_depth
+        """, (checkpoint_id,)).fetchall()
 
-        if not result:
+        if not results:
             return None
 
         # Convert result to dictionary
         columns = ["id", "timestamp", "checkpoint_data"]
-        checkpoint = {columns[i]: result[i] for i in range(len(columns))}
+        checkpoint = {columns[i]: results[-1][i] for i in range(len(columns))}
 
         # Parse checkpoint data with datetime handling
         try:
-            checkpoint["checkpoint_data"] = deserialize_state(checkpoint["checkpoint_data"])
-        except (json.JSONDecodeError, TypeError):
+            if results[-1][5] == 0 and results[-1][3] is None:
+                checkpoint["checkpoint_data"] = deserialize_state(checkpoint["checkpoint_data"])
+                return checkpoint
+            
+            if results[0][5] != 0:
+                print(f"Warning: checkpoint {checkpoint_id} has no full snapshot, replaying partial chain")
+            
+            state = LazyState()
+            for _, _, checkpoint_json, checkpoint_blob, codec, depth in results:
+                if checkpoint_blob is not None:
+                    value_codec, _ = parse_codec_spec(codec)
+                    changed, removed = decode_frame(codec, checkpoint_blob)
+                    for key, data in changed.items():
+                        state.set_encoded(key, value_codec, data)
+                else:
+                    # Checkpoint written as JSON text, a full state or a delta
+                    data = deserialize_state(checkpoint_json)
+                    if depth == 0:
+                        changed, removed = data, []
+                    else:
+                        changed, removed = data.get("changed", {}), data.get("removed", [])
+                    state.update(changed)
+                for key in removed:
+                    state.pop(key, None)
+            checkpoint["checkpoint_data"] = state
+            
+            # Cache it if every value is still encoded with this connector's codec
+            encoded = {key: state.encoded(key, self._checkpoint_codec) for key in state}
+            if not self.read_only and None not in encoded.values():
+                with self._checkpoint_lock:
+                    self._cache_checkpoint(checkpoint_id, encoded, results[-1][5], checkpoint["timestamp"])
+        except UnknownCodecError:
+            # Written with a codec this installation lacks; the data cannot be used as is
+            raise
+        except (json.JSONDecodeError, TypeError, ValueError):
             # Keep as is if not valid JSON
             pass
 
         return checkpoint
 
+    def compact_checkpoints(self, project_id: Optional[str] = None,
+                            keep_last: int = CHECKPOINT_KEEP_LAST,
+                            keep_hourly: Optional[int] = CHECKPOINT_KEEP_HOURLY) -> int:
+        """
+        Delete checkpoints outside the retention policy.
+        
+        Per project, the keep_last most recent checkpoints are kept, plus the
+        newest checkpoint of each hour for the last keep_hourly hours (every
+        hour if None). Kept delta checkpoints whose chain runs through a
+        deleted checkpoint are rewritten as full snapshots first.
+        
+        Args:
+            project_id: Project to compact, or None for all projects
+            keep_last: Number of most recent checkpoints to keep per project
+            keep_hourly: Number of hours for which an hourly checkpoint is kept
+            
+        Returns:
+            Number of deleted checkpoints
+        """
+        self._check_writable()
+        
+        if project_id:
+            rows = self.conn.execute("""
+                SELECT id, project_id, timestamp, parent_id, chain_depth FROM system_checkpoints
+                WHERE project_id = ?
+                ORDER BY timestamp DESC
+            """, (project_id,)).fetchall()
+        else:
+            rows = self.conn.execute("""
+                SELECT id, project_id, timestamp, parent_id, chain_depth FROM system_checkpoints
+                ORDER BY timestamp DESC
+            """).fetchall()
+        
+        # Apply the retention rules per project, newest first
+        hourly_cutoff = None
+        if keep_hourly is not None:
+            hourly_cutoff = datetime.datetime.now() - datetime.timedelta(hours=keep_hourly)
+        kept = set()
+        seen_per_project: Dict[Optional[str], int] = {}
+        hours_per_project: Dict[Optional[str], set] = {}
+        for checkpoint_id, checkpoint_project, timestamp, _, _ in rows:
+            seen = seen_per_project.get(checkpoint_project, 0)
+            seen_per_project[checkpoint_project] = seen + 1
+            hours = hours_per_project.setdefault(checkpoint_project, set())
+            hour = timestamp.replace(minute=0, second=0, microsecond=0) if timestamp else None
+            
+            if seen < keep_last:
+                kept.add(checkpoint_id)
+            elif hour is not None and hour not in hours and (hourly_cutoff is None or timestamp >= hourly_cutoff):
+                kept.add(checkpoint_id)
+            if hour is not None:
+                hours.add(hour)
+        
+        deleted = [row[0] for row in rows if row[0] not in kept]
+        if not deleted:
+            return 0
+        
+        # Kept deltas that depend on a deleted checkpoint must become full snapshots
+        parents = {row[0]: (row[3], row[4]) for row in rows}
+        deleted_set = set(deleted)
+        rebased = []
+        for checkpoint_id in kept:
+            ancestor_id, depth = parents[checkpoint_id]
+            while depth and ancestor_id in parents:
+                if ancestor_id in deleted_set:
+                    rebased.append(checkpoint_id)
+                    break
+                ancestor_id, depth = parents[ancestor_id]
+        
+        with self._checkpoint_lock:
+            snapshots = []
+            for checkpoint_id in rebased:
+                state = self.get_checkpoint(checkpoint_id)["checkpoint_data"]
+                snapshots.append((encode_frame(self.checkpoint_codec,
+                                               _encode_state_keys(state, self._checkpoint_codec)),
+                                  checkpoint_id))
+            
+            with self.transaction():
+                for checkpoint_blob, checkpoint_id in snapshots:
+                    self.conn.execute("""
+                        UPDATE system_checkpoints
+                        SET checkpoint_data = NULL, checkpoint_blob = ?, codec = ?, chain_depth = 0
+                        WHERE id = ?
+                    """, (checkpoint_blob, self.checkpoint_codec, checkpoint_id))
+                self.conn.execute("""
+                    DELETE FROM system_checkpoints WHERE list_contains(?, id)
+                """, (deleted,))
+            
+            # Later deltas must not be based on checkpoints that are gone or rewritten
+            for checkpoint_id in deleted + rebased:
+                self._uncache_checkpoint(checkpoint_id)
+        
+        return len(deleted)
+    
+    def start_checkpoint_compaction(self, interval: float = 3600.0, **policy) -> None:
+        """
+        Run compact_checkpoints periodically in a background thread.
+        
+        Does nothing if background compaction is already running.
+        
+        Args:
+            interval: Seconds between compaction runs
+            **policy: Retention arguments passed to compact_checkpoints
+        """
+        if self._compaction_stop is not None or self.read_only:
+            return
+        
+        stop = threading.Event()
+        self._compaction_stop = stop
+        
+        def compact_periodically():
+            while not stop.wait(interval):
+                try:
+                    deleted = self.compact_checkpoints(**policy)
+                    if deleted:
+                        print(f"Compacted {deleted} checkpoints")
+                except Exception as e:
+                    print(f"Error compacting checkpoints: {str(e)}")
+        
+        threading.Thread(target=compact_periodically, name="checkpoint-compaction", daemon=True).start()
+    
+    def stop_checkpoint_compaction(self) -> None:
+        """Stop background checkpoint compaction."""
+        if self._compaction_stop is not None:
+            self._compaction_stop.set()
+            self._compaction_stop = None
+    
+    def archive_messages(self, bus_id: str, messages: List[Any]) -> int:
+        """
+        Archive messages evicted from a message bus's in-memory history.
+        
+        Args:
+            bus_id: ID of the message bus that owns the messages
+            messages: Message instances; their memoized to_json() encoding is stored
+            
+        Returns:
+            Number of archived messages
+        """
+        self._check_writable()
+        if not messages:
+            return 0
+        
+        rows = []
+        for message in messages:
+            timestamp = message.timestamp
+            if not isinstance(timestamp, datetime.datetime):
+                timestamp = None
+            rows.append((
+                message.id, bus_id, message.task_id, message.project_id,
+                message.sender_id, message.receiver_id,
+                message.message_type, timestamp, message.to_json()
+            ))
+        
+        placeholders = ", ".join(["(?, ?, ?, ?, ?, ?, ?, ?, ?)"] * len(rows))
+        self.conn.execute(f"""
+            INSERT OR REPLACE INTO message_archive (id, bus_id, task_id, project_id, sender_id,
+                                                    receiver_id, message_type, timestamp, message_data)
+            VALUES {placeholders}
+        """, [value for row in rows for value in row])
+        
+        return len(rows)
+    
+    def get_archived_messages(self, bus_id: str, task_id: Optional[str] = None,
+                              project_id: Optional[str] = None, sender_id: Optional[str] = None,
+                              receiver_id: Optional[str] = None,
+                              limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Get archived messages of a message bus, oldest first.
+        
+        Args:
+            bus_id: ID of the message bus that owns the messages
+            task_id: Optional task ID filter
+            project_id: Optional project ID filter
+            sender_id: Optional sender ID filter
+            receiver_id: Optional receiver ID filter
+            limit: Optional maximum number of (most recent) messages to return
+            
+        Returns:
+            List of message dictionaries
+        """
+        conditions = ["bus_id = ?"]
+        params: List[Any] = [bus_id]
+        for column, value in (("task_id", task_id), ("project_id", project_id),
+                              ("sender_id", sender_id), ("receiver_id", receiver_id)):
+            if value:
+                conditions.append(f"{column} = ?")
+                params.append(value)
+        
+        query = f"""
+            SELECT message_data, timestamp FROM message_archive
+            WHERE {" AND ".join(conditions)}
+            ORDER BY timestamp DESC, rowid DESC
+        """
+        if limit is not None:
+            query += " LIMIT ?"
+            params.append(limit)
+        
+        results = self.conn.execute(query, params).fetchall()
+        
+        messages = []
+        for message_data, timestamp in reversed(results):
+            try:
+                message = json.loads(message_data)
+            except (json.JSONDecodeError, TypeError):
+                continue
+            message["timestamp"] = timestamp
+            messages.append(message)
+        
+        return messages
+    
     def close(self):
-        """Close the database connection."""
-        if self.conn:
-            self.conn.close()
-            self.conn = None
\ No newline at end of file
+        """Flush buffered outputs and close the database connection."""
+        if self._root_conn is not None:
+            self.stop_checkpoint_compaction()
+            self.flush()
+            self._finalizer.detach()
+            
+            with self._cursors_lock:
+                cursors = list(self._cursors.values())
+                self._cursors.clear()
+            for cursor in cursors:
+                try:
+                    cursor.close()
+                except duckdb.Error:
+                    pass
+            
+            if self._owns_connection:
+                self._root_conn.close()
+            self._root_conn = None
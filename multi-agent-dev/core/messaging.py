@@ -3,17 +3,62 @@ import uuid
 import sys
 import os.path
 import json
-from typing import Dict, Any, List, Optional
+import time
+import itertools
+import threading
+from collections import deque
+from typing import Dict, Any, List, Optional, Deque, Union
 
 # Add project root to Python path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 # Import datetime-safe serialization functions
 from utils import serialize_state, deserialize_state
 
+# Default number of messages kept in memory by a MessageBus before older ones are spilled
+DEFAULT_HISTORY_LIMIT = 1000
+
+# Default number of archived messages get_message_history pages back in without a limit
+DEFAULT_ARCHIVE_READ_LIMIT = 1000
+
+# Message fields that get_message_history can filter on
+HISTORY_INDEX_FIELDS = ("task_id", "project_id", "sender_id", "receiver_id")
+
+# Wall-clock anchor for monotonic timestamps, taken once per process
+_WALL_CLOCK_NS = time.time_ns()
+_MONOTONIC_NS = time.monotonic_ns()
+
+# Source of compact message IDs: a per-process prefix plus a counter
+_COMPACT_ID_PREFIX = uuid.uuid4().hex[:8]
+_compact_id_counter = itertools.count(1)
+
+def timestamp_ns() -> int:
+    """Get a monotonic timestamp as nanoseconds since the epoch."""
+    return _WALL_CLOCK_NS + (time.monotonic_ns() - _MONOTONIC_NS)
+
+def ns_to_datetime(ns: int) -> datetime.datetime:
+    """Convert a nanosecond timestamp to a local datetime."""
+    seconds, remainder = divmod(ns, 1_000_000_000)
+    return datetime.datetime.fromtimestamp(seconds).replace(microsecond=remainder // 1000)
+
+def datetime_to_ns(value: datetime.datetime) -> int:
+    """Convert a datetime to a nanosecond timestamp."""
+    return int(value.replace(microsecond=0).timestamp()) * 1_000_000_000 + value.microsecond * 1000
+
 class Message:
     """
     Message class for inter-agent communication.
+    
+    Messages use __slots__ and keep their timestamp as integer nanoseconds, so
+    a long history costs as little memory per message as possible. Setting
+    Message.compact_ids = True switches new messages from UUID4 strings to
+    shorter process-unique IDs.
     """
+    __slots__ = ("id", "sender_id", "receiver_id", "content", "message_type", "task_id",
+                 "project_id", "metadata", "timestamp_ns", "read", "processed",
+                 "_encoded_payload")
+    
+    compact_ids = False
+    
     def __init__(self, 
                  sender_id: str, 
                  receiver_id: str, 
@@ -34,7 +79,10 @@ class Message:
             project_id: Optional project ID associated with the message
             metadata: Optional additional metadata
         """
-        self.id = str(uuid.uuid4())
+        if self.compact_ids:
+            self.id = f"{_COMPACT_ID_PREFIX}-{next(_compact_id_counter):x}"
+        else:
+            self.id = str(uuid.uuid4())
         self.sender_id = sender_id
         self.receiver_id = receiver_id
         self.content = content
@@ -42,19 +90,70 @@ class Message:
         self.task_id = task_id
         self.project_id = project_id
         self.metadata = metadata or {}
-        self.timestamp = datetime.datetime.now()
+        self.timestamp_ns = timestamp_ns()
         self.read = False
         self.processed = False
+        self._encoded_payload: Optional[str] = None  # Memoized content/metadata JSON
     
-    def to_dict(self) -> Dict[str, Any]:
+    @property
+    def timestamp(self) -> datetime.datetime:
+        """Message creation time as a datetime."""
+        return ns_to_datetime(self.timestamp_ns)
+    
+    @timestamp.setter
+    def timestamp(self, value: Union[datetime.datetime, str, int]) -> None:
+        if isinstance(value, str):
+            value = datetime.datetime.fromisoformat(value)
+        if isinstance(value, datetime.datetime):
+            value = datetime_to_ns(value)
+        if not isinstance(value, int):
+            raise TypeError(f"Unsupported timestamp: {value!r}")
+        self.timestamp_ns = value
+    
+    def _encode_payload(self) -> str:
         """
-        Convert message to dictionary with serializable values.
-
+        Encode content and metadata as the JSON fragment shared by every serialization.
+        
+        The fragment is computed once and memoized: a message is treated as an
+        immutable snapshot of its content once it has been encoded.
+        
         Returns:
-            Dictionary representation of the message
+            JSON text of the "content" and "metadata" members (without braces)
         """
-        # Convert basic properties
-        result = {
+        if self._encoded_payload is None:
+            try:
+                content_json = serialize_state(self.content)
+            except Exception as e:
+                # If serialization fails, use string representation
+                content_json = json.dumps({"content_error": f"Could not serialize: {str(e)}"})
+            
+            if self.metadata:
+                try:
+                    metadata_json = serialize_state(self.metadata)
+                except Exception as e:
+                    metadata_json = json.dumps({"metadata_error": f"Could not serialize: {str(e)}"})
+            else:
+                metadata_json = "{}"
+            
+            self._encoded_payload = f'"content": {content_json}, "metadata": {metadata_json}'
+        
+        return self._encoded_payload
+    
+    def to_json(self) -> str:
+        """
+        Convert message to a JSON string in a single encoding pass.
+        
+        The bus persists this string as-is, so content is never re-encoded
+        on its way to the database.
+        
+        Returns:
+            JSON representation of the message
+        """
+        # Timestamps only become ISO strings here, at the serialization boundary
+        timestamp = self.timestamp.isoformat()
+        
+        # Header fields are cheap to encode and include the mutable read/processed flags
+        header = json.dumps({
             "id": self.id,
             "sender_id": self.sender_id,
             "receiver_id": self.receiver_id,
@@ -62,37 +161,19 @@ class Message:
             "task_id": self.task_id,
             "project_id": self.project_id,
             "read": self.read,
-            "processed": self.processed
-        }
-
-        # Handle content separately to ensure it's serializable
-        if isinstance(self.content, (dict, list)):
-            # Use serialize_state to handle any datetime objects
-            try:
-                result["content"] = json.loads(serialize_state(self.content))
-            except Exception as e:
-                # If serialization fails, use string representation
-                result["content"] = {"content_error": f"Could not serialize: {str(e)}"}
-        else:
-            # For non-object content, use as is
-            result["content"] = self.content
-
-        # Handle metadata separately
-        if self.metadata:
-            try:
-                result["metadata"] = json.loads(serialize_state(self.metadata))
-            except Exception as e:
-                result["metadata"] = {"metadata_error": f"Could not serialize: {str(e)}"}
-        else:
-            result["metadata"] = {}
-
-        # Convert timestamp to ISO format
-        try:
-            result["timestamp"] = self.timestamp.isoformat()
-        except Exception as e:
-            result["timestamp"] = str(self.timestamp)
+            "processed": self.processed,
+            "timestamp": timestamp
+        })
+        return f"{header[:-1]}, {self._encode_payload()}}}"
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Convert message to dictionary with serializable values.
 
-        return result
+        Returns:
+            Dictionary representation of the message
+        """
+        return json.loads(self.to_json())
     
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> 'Message':
@@ -115,7 +196,11 @@ class Message:
             metadata=data.get("metadata")
         )
         message.id = data.get("id", message.id)
-        message.timestamp = data.get("timestamp", message.timestamp)
+        try:
+            message.timestamp = data.get("timestamp", message.timestamp_ns)
+        except (ValueError, TypeError):
+            # Keep the creation time if the stored timestamp is unreadable
+            pass
         message.read = data.get("read", message.read)
         message.processed = data.get("processed", message.processed)
         return message
@@ -125,16 +210,41 @@ class MessageBus:
     """
     Message bus for handling inter-agent communication.
     """
-    def __init__(self, db_connector=None):
+    def __init__(self, db_connector=None, history_limit: Optional[int] = DEFAULT_HISTORY_LIMIT,
+                 archive_read_limit: int = DEFAULT_ARCHIVE_READ_LIMIT):
         """
         Initialize the message bus.
         
         Args:
             db_connector: Optional database connector for message persistence
+            history_limit: Maximum number of messages kept in memory; older messages
+                are spilled to the database archive (or dropped without a database).
+                None keeps the full history in memory.
+            archive_read_limit: Maximum number of archived messages get_message_history
+                reads back when called without a limit
         """
         self.db_connector = db_connector
+        self.bus_id = uuid.uuid4().hex
+        self.history_limit = history_limit
+        self.archive_read_limit = archive_read_limit
         self.message_queue: Dict[str, List[Message]] = {}  # receiver_id -> [messages]
-        self.message_history: List[Message] = []  # All messages
+        self.message_history: Deque[Message] = deque()  # Most recent messages
+        self.archived_count = 0  # Messages spilled out of message_history
+        self._system_task_ids: Dict[Optional[str], str] = {}  # project_id -> logging task ID
+        # field -> value -> messages in message_history with that value, oldest first
+        self._history_index: Dict[str, Dict[str, Deque[Message]]] = {
+            field: {} for field in HISTORY_INDEX_FIELDS
+        }
+        self._messages_by_id: Dict[str, Message] = {}  # message_id -> message
+        self._evicted_ids: set = set()  # IDs of evicted messages still indexed until processed
+        # receiver_id -> index of the first queued message that may still be unread
+        self._unread_cursor: Dict[str, int] = {}
+        # Guards the queues, history and indexes when agents run on several threads
+        self._lock = threading.RLock()
+        # Receivers that want to be woken for new messages, and those with messages waiting
+        self._subscribers: set = set()
+        self._ready: Dict[str, None] = {}  # Ordered set, in order of first arrival
+        self._message_arrived = threading.Condition(self._lock)
     
     def send_message(self, message: Message) -> str:
         """
@@ -146,50 +256,140 @@ class MessageBus:
         Returns:
             Message ID
         """
+        with self._lock:
+            self._persist(message)
+        self._deliver_after_commit([message])
+        return message.id
+    
+    def send_many(self, messages: List[Message]) -> List[str]:
+        """
+        Send several messages at once.
+        
+        Equivalent to calling send_message for each message, but history
+        eviction runs once for the whole batch.
+        
+        Args:
+            messages: Messages to send, delivered in order
+            
+        Returns:
+            List of message IDs
+        """
+        with self._lock:
+            for message in messages:
+                self._persist(message)
+        self._deliver_after_commit(messages)
+        return [message.id for message in messages]
+    
+    def _deliver_after_commit(self, messages: List[Message]) -> None:
+        """
+        Queue sent messages for their receivers.
+        
+        Messages sent inside a database transaction are held until it commits
+        and dropped if it rolls back, so receivers never see messages about
+        work that was undone.
+        """
+        if self.db_connector:
+            self.db_connector.after_commit(lambda: self._deliver(messages))
+        else:
+            self._deliver(messages)
+    
+    def _deliver(self, messages: List[Message]) -> None:
+        with self._lock:
+            for message in messages:
+                self._enqueue(message)
+            self._evict_history()
+    
+    def _enqueue(self, message: Message) -> None:
+        """Add a message to its receiver's queue, the history and the history indexes."""
         # Add to receiver's queue
         if message.receiver_id not in self.message_queue:
             self.message_queue[message.receiver_id] = []
+            self._unread_cursor[message.receiver_id] = 0
         self.message_queue[message.receiver_id].append(message)
         
-        # Add to history
+        # Wake anyone waiting for this receiver's messages
+        if message.receiver_id in self._subscribers:
+            self._ready[message.receiver_id] = None
+            self._message_arrived.notify_all()
+        
+        # Add to history and index
         self.message_history.append(message)
+        self._messages_by_id[message.id] = message
+        for field, index in self._history_index.items():
+            value = getattr(message, field)
+            if value:
+                index.setdefault(value, deque()).append(message)
+    
+    def subscribe(self, receiver_id: str) -> None:
+        """
+        Have wait_for_messages report a receiver whenever messages arrive for it.
+        
+        Args:
+            receiver_id: Receiver ID
+        """
+        with self._lock:
+            self._subscribers.add(receiver_id)
+            if self.has_unread_messages(receiver_id):
+                self._ready[receiver_id] = None
+                self._message_arrived.notify_all()
+    
+    def unsubscribe(self, receiver_id: str) -> None:
+        """
+        Stop reporting a receiver from wait_for_messages.
         
-        # Persist message if database connector available
+        Args:
+            receiver_id: Receiver ID
+        """
+        with self._lock:
+            self._subscribers.discard(receiver_id)
+            self._ready.pop(receiver_id, None)
+    
+    def wait_for_messages(self, timeout: Optional[float] = None) -> List[str]:
+        """
+        Wait until subscribed receivers have unread messages.
+        
+        Args:
+            timeout: Maximum number of seconds to wait; 0 returns immediately
+                and None waits until a message arrives
+            
+        Returns:
+            Subscribed receivers with unread messages, in order of arrival;
+            empty if none arrived before the timeout
+        """
+        with self._lock:
+            if not self._ready and timeout != 0:
+                self._message_arrived.wait_for(lambda: self._ready, timeout)
+            
+            # Skip receivers whose messages were read since they arrived
+            ready = [receiver_id for receiver_id in self._ready
+                     if self.has_unread_messages(receiver_id)]
+            self._ready.clear()
+            return ready
+    
+    def _persist(self, message: Message) -> None:
+        """Store a sent message as an agent output, if a database connector is available."""
         if self.db_connector:
             # Ensure the message content is JSON serializable
             try:
-                # First serialize to catch any datetime issues
-                message_dict = message.to_dict()
-                json_safe_dict = json.loads(serialize_state(message_dict))
+                # Encode once; the JSON text is stored without further serialization
+                message_json = message.to_json()
 
                 # Make sure we have a valid task_id (not "system")
                 task_id = message.task_id
                 if not task_id or task_id == "system":
-                    # Try to get a valid task ID for this project
                     try:
-                        system_tasks = self.db_connector.get_tasks_by_project(message.project_id)
-                        if system_tasks:
-                            # Use the first available task
-                            task_id = system_tasks[0]["id"]
-                        else:
-                            # Create a system task for logging
-                            task_id = self.db_connector.create_task(
-                                project_id=message.project_id,
-                                title="System Task",
-                                description="System-generated task for logging purposes",
-                                assigned_agent="system"
-                            )
+                        task_id = self._get_system_task_id(message.project_id)
                     except Exception as task_error:
                         # Log error but continue without storing
                         print(f"Error getting valid task ID: {str(task_error)}")
-                        return message.id
+                        return
 
                 # Now store with valid task_id
                 self.db_connector.store_agent_output(
                     task_id=task_id,
                     agent_id=message.sender_id,
                     output_type=f"message_{message.message_type}",
-                    content=json_safe_dict
+                    content_json=message_json
                 )
             except Exception as e:
                 # If serialization fails, store a simplified message
@@ -198,18 +398,14 @@ class MessageBus:
                 # Make sure we have a valid task_id (not "system")
                 task_id = message.task_id
                 if not task_id or task_id == "system":
-                    # Try to get a valid task ID for this project
                     try:
-                        system_tasks = self.db_connector.get_tasks_by_project(message.project_id)
-                        if system_tasks:
-                            # Use the first available task
-                            task_id = system_tasks[0]["id"]
-                        else:
-                            # Skip storing since we can't create a task during error handling
-                            return message.id
+                        # Skip storing since we can't create a task during error handling
+                        task_id = self._get_system_task_id(message.project_id, create=False)
                     except Exception:
+                        task_id = None
+                    if not task_id:
                         # Skip storing if we can't get a valid task
-                        return message.id
+                        return
 
                 # Store simplified message with valid task_id
                 try:
@@ -222,8 +418,87 @@ class MessageBus:
                 except Exception as store_error:
                     # If we still can't store, just log and continue
                     print(f"Error storing message: {str(store_error)}")
+    
+    def _get_system_task_id(self, project_id: Optional[str], create: bool = True) -> Optional[str]:
+        """
+        Get the task used to log messages that are not tied to a task.
         
-        return message.id
+        The ID is looked up (or created) once per project and then cached. Inside
+        a transaction it is only cached once the transaction commits, so a
+        rolled-back System Task is never reused.
+        
+        Args:
+            project_id: Project ID
+            create: Whether to create a "System Task" if the project has no tasks
+            
+        Returns:
+            Task ID, or None if the project has no tasks and create is False
+        """
+        task_id = self._system_task_ids.get(project_id)
+        if task_id:
+            return task_id
+        
+        # Use the first available task
+        task_id = self.db_connector.get_first_task_id(project_id)
+        if not task_id and create:
+            # Create a system task for logging
+            task_id = self.db_connector.create_task(
+                project_id=project_id,
+                title="System Task",
+                description="System-generated task for logging purposes",
+                assigned_agent="system"
+            )
+        
+        if task_id:
+            def cache():
+                self._system_task_ids[project_id] = task_id
+            self.db_connector.after_commit(cache)
+        return task_id
+    
+    def invalidate_system_task(self, project_id: Optional[str] = None) -> None:
+        """
+        Forget the cached logging task for a project, or for all projects.
+        
+        Args:
+            project_id: Project ID, or None to clear the whole cache
+        """
+        if project_id is None:
+            self._system_task_ids.clear()
+        else:
+            self._system_task_ids.pop(project_id, None)
+    
+    def _evict_history(self) -> None:
+        """Spill the oldest messages once the in-memory history exceeds its limit."""
+        if self.history_limit is None:
+            return
+        
+        # Evict in chunks so the archive sees one bulk insert rather than one per message
+        chunk = max(1, self.history_limit // 10)
+        if len(self.message_history) < self.history_limit + chunk:
+            return
+        
+        evicted = [self.message_history.popleft()
+                   for _ in range(len(self.message_history) - self.history_limit)]
+        
+        # Evicted messages are the oldest, so they sit at the front of their index buckets
+        for message in evicted:
+            for field, index in self._history_index.items():
+                bucket = index.get(getattr(message, field))
+                if bucket and bucket[0] is message:
+                    bucket.popleft()
+                    if not bucket:
+                        del index[getattr(message, field)]
+        
+        if self.db_connector:
+            try:
+                self.archived_count += self.db_connector.archive_messages(self.bus_id, evicted)
+            except Exception as e:
+                print(f"Error archiving messages: {str(e)}")
+        
+        # Processed messages are done with entirely; unprocessed ones stay queued and
+        # indexed until clear_processed_messages runs after they are processed
+        self._evicted_ids.update(message.id for message in evicted)
+        self.clear_processed_messages()
     
     def get_messages(self, receiver_id: str, mark_read: bool = True) -> List[Message]:
         """
@@ -236,16 +511,18 @@ class MessageBus:
         Returns:
             List of messages
         """
-        if receiver_id not in self.message_queue:
-            return []
-        
-        messages = self.message_queue[receiver_id]
-        
-        if mark_read:
-            for message in messages:
-                message.read = True
-        
-        return messages
+        with self._lock:
+            if receiver_id not in self.message_queue:
+                return []
+            
+            messages = self.message_queue[receiver_id]
+            
+            if mark_read:
+                for message in messages:
+                    message.read = True
+                self._unread_cursor[receiver_id] = len(messages)
+            
+            return messages
     
     def get_unread_messages(self, receiver_id: str, mark_read: bool = True) -> List[Message]:
         """
@@ -258,16 +535,36 @@ class MessageBus:
         Returns:
             List of unread messages
         """
-        if receiver_id not in self.message_queue:
-            return []
-        
-        unread_messages = [m for m in self.message_queue[receiver_id] if not m.read]
-        
-        if mark_read:
-            for message in unread_messages:
-                message.read = True
+        with self._lock:
+            if receiver_id not in self.message_queue:
+                return []
+            
+            # Everything before the cursor has already been read
+            queue = self.message_queue[receiver_id]
+            unread_messages = [m for m in queue[self._unread_cursor[receiver_id]:] if not m.read]
+            
+            if mark_read:
+                for message in unread_messages:
+                    message.read = True
+                self._unread_cursor[receiver_id] = len(queue)
+            
+            return unread_messages
+    
+    def has_unread_messages(self, receiver_id: str) -> bool:
+        """
+        Check whether a receiver has unread messages, without marking them read.
         
-        return unread_messages
+        Args:
+            receiver_id: Receiver ID
+            
+        Returns:
+            True if at least one queued message is unread
+        """
+        with self._lock:
+            queue = self.message_queue.get(receiver_id)
+            if not queue:
+                return False
+            return any(not m.read for m in queue[self._unread_cursor[receiver_id]:])
     
     def mark_processed(self, message_id: str) -> bool:
         """
@@ -279,48 +576,100 @@ class MessageBus:
         Returns:
             True if message was found and marked, False otherwise
         """
-        # Check all queues
-        for queue in self.message_queue.values():
-            for message in queue:
-                if message.id == message_id:
-                    message.processed = True
-                    return True
+        with self._lock:
+            message = self._messages_by_id.get(message_id)
+            if message is None:
+                return False
+            
+            message.processed = True
+            return True
+    
+    def requeue_messages(self, messages: List[Message]) -> None:
+        """
+        Return messages to their receivers as unread and unprocessed.
         
-        # Check history as fallback
-        for message in self.message_history:
-            if message.id == message_id:
-                message.processed = True
-                return True
+        Used when the work done for messages is rolled back, so that their
+        receivers get them again on the next read.
         
-        return False
+        Args:
+            messages: Messages to requeue
+        """
+        with self._lock:
+            for message in messages:
+                message.read = False
+                message.processed = False
+                if message.id not in self._messages_by_id:
+                    # Only evicted messages leave the ID index
+                    self._evicted_ids.add(message.id)
+                    self._messages_by_id[message.id] = message
+                
+                receiver_id = message.receiver_id
+                queue = self.message_queue.setdefault(receiver_id, [])
+                try:
+                    position = next(n for n, queued in enumerate(queue) if queued is message)
+                except StopIteration:
+                    # Already cleared from the queue as processed
+                    queue.append(message)
+                    position = len(queue) - 1
+                self._unread_cursor[receiver_id] = min(self._unread_cursor.get(receiver_id, 0), position)
+                
+                if receiver_id in self._subscribers:
+                    self._ready[receiver_id] = None
+                    self._message_arrived.notify_all()
     
     def get_message_history(self, task_id: Optional[str] = None, 
                           project_id: Optional[str] = None,
                           sender_id: Optional[str] = None,
-                          receiver_id: Optional[str] = None) -> List[Message]:
+                          receiver_id: Optional[str] = None,
+                          limit: Optional[int] = None) -> List[Message]:
         """
         Get message history with optional filters.
         
+        Messages spilled to the database archive are only read back when the
+        in-memory history cannot satisfy the request on its own.
+        
         Args:
             task_id: Optional task ID filter
             project_id: Optional project ID filter
             sender_id: Optional sender ID filter
             receiver_id: Optional receiver ID filter
+            limit: Optional maximum number of (most recent) messages to return;
+                without one, at most archive_read_limit archived messages are
+                returned before the in-memory history
             
         Returns:
-            Filtered message history
+            Filtered message history, oldest first
         """
-        history = self.message_history
+        filters = {field: value for field, value in zip(
+            HISTORY_INDEX_FIELDS, (task_id, project_id, sender_id, receiver_id)
+        ) if value}
         
-        # Apply filters
-        if task_id:
-            history = [m for m in history if m.task_id == task_id]
-        if project_id:
-            history = [m for m in history if m.project_id == project_id]
-        if sender_id:
-            history = [m for m in history if m.sender_id == sender_id]
-        if receiver_id:
-            history = [m for m in history if m.receiver_id == receiver_id]
+        with self._lock:
+            if filters:
+                # Start from the smallest index bucket and check the remaining filters on it
+                candidates = min(
+                    (self._history_index[field].get(value, ()) for field, value in filters.items()),
+                    key=len
+                )
+                history = [m for m in candidates
+                           if all(getattr(m, field) == value for field, value in filters.items())]
+            else:
+                history = list(self.message_history)
+        
+        if limit is not None and len(history) >= limit:
+            return history[len(history) - limit:]
+        
+        # Page older messages back in from the archive
+        if self.archived_count and self.db_connector:
+            try:
+                archived = self.db_connector.get_archived_messages(
+                    self.bus_id, task_id=task_id, project_id=project_id,
+                    sender_id=sender_id, receiver_id=receiver_id,
+                    limit=self.archive_read_limit if limit is None else limit - len(history)
+                )
+                history = [Message.from_dict(data) for data in archived] + history
+            except Exception as e:
+                print(f"Error reading archived messages: {str(e)}")
         
         return history
     
@@ -342,10 +691,8 @@ class MessageBus:
         Returns:
             List of message IDs
         """
-        message_ids = []
-        
-        for receiver_id in receivers:
-            message = Message(
+        return self.send_many([
+            Message(
                 sender_id=sender_id,
                 receiver_id=receiver_id,
                 content=content,
@@ -354,14 +701,24 @@ class MessageBus:
                 project_id=project_id,
                 metadata=metadata
             )
-            message_id = self.send_message(message)
-            message_ids.append(message_id)
-        
-        return message_ids
+            for receiver_id in receivers
+        ])
     
     def clear_processed_messages(self):
-        """Remove processed messages from queues."""
-        for receiver_id in self.message_queue:
-            self.message_queue[receiver_id] = [
-                m for m in self.message_queue[receiver_id] if not m.processed
-            ]
\ No newline at end of file
+        """Remove processed messages from queues, and evicted ones from the ID index."""
+        with self._lock:
+            processed_ids = [message_id for message_id in self._evicted_ids
+                             if self._messages_by_id[message_id].processed]
+            for message_id in processed_ids:
+                self._evicted_ids.discard(message_id)
+                del self._messages_by_id[message_id]
+            
+            for receiver_id in self.message_queue:
+                queue = [m for m in self.message_queue[receiver_id] if not m.processed]
+                self.message_queue[receiver_id] = queue
+                
+                # Reposition the cursor after the leading run of read messages
+                cursor = 0
+                while cursor < len(queue) and queue[cursor].read:
+                    cursor += 1
+                self._unread_cursor[receiver_id] = cursor
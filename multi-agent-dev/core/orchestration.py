@@ -4,9 +4,14 @@ import langchain
 import traceback
 import sys
 import os.path
-from typing import Dict, Any, List, Optional, Set, Type, Callable, Union, Tuple
+import operator
+from collections import deque
+from typing import (
+    Annotated, Dict, Any, List, Optional, Set, Type, Callable, Union, Tuple, Deque, Iterator, TypedDict
+)
 from langchain.prompts.chat import ChatPromptTemplate
 from langgraph.graph import StateGraph, END, START
+from langgraph.graph.state import CompiledStateGraph
 # Updated import for checkpoint functionality
 import json
 
@@ -16,23 +21,46 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from utils import serialize_state, deserialize_state
 
 from core.database import DatabaseConnector
-from core.messaging import MessageBus, Message
+from core.messaging import MessageBus, Message, DEFAULT_HISTORY_LIMIT
+from core.scheduling import link_task_ids
 # Fix for relative import issue
 import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from agents.project_manager import ProjectManagerAgent
-from agents.developer import DeveloperAgent
-from agents.ui_ux import UIUXAgent
-from agents.integration import IntegrationAgent
-from agents.testing import TestingAgent
-from agents.documentation import DocumentationAgent
-from agents.error_handling import ErrorHandlingAgent
+from agents.registry import get_agent_instances
+
+def _last_value(current: Any, update: Any) -> Any:
+    """Keep the latest write, so parallel branches may all set a key."""
+    return update
+
+def _merge_routes(current: Dict[str, List[str]], update: Dict[str, List[str]]) -> Dict[str, List[str]]:
+    return {**(current or {}), **update}
+
+class WorkflowState(TypedDict, total=False):
+    """
+    State passed between agent nodes of the orchestration graph.
+    
+    Agents running in parallel branches of one step return only what they
+    add; list fields are concatenated and "next" keeps the latest value.
+    """
+    tasks: Annotated[List[Dict[str, Any]], operator.add]
+    implementations: Annotated[List[Any], operator.add]
+    ui_implementations: Annotated[List[Any], operator.add]
+    integrated_systems: Annotated[List[Any], operator.add]
+    test_reports: Annotated[List[Any], operator.add]
+    documentation: Annotated[List[Any], operator.add]
+    error_handling_results: Annotated[List[Any], operator.add]
+    next: Annotated[Any, _last_value]
+    # Agent type -> the agents its latest "next" named, so each branch routes on its own
+    routes: Annotated[Dict[str, List[str]], _merge_routes]
 
 class AgentState:
     """
     Class representing the state of an agent in the system.
     """
+    __slots__ = ("agent_id", "agent_type", "agent_instance", "status", "current_task_id",
+                 "task_history", "error", "last_active")
+
     def __init__(self, agent_id: str, agent_type: str, agent_instance: Any):
         """
         Initialize agent state.
@@ -127,9 +155,9 @@ class SystemState:
         self.project_id = project_id
         self.agents: Dict[str, AgentState] = {}
         self.tasks: Dict[str, Dict[str, Any]] = {}
-        self.messages: List[Message] = []
+        self.messages: Deque[Message] = deque(maxlen=DEFAULT_HISTORY_LIMIT)  # Most recent messages
         self.errors: List[Dict[str, Any]] = []
-        self.status = "initializing"  # initializing, running, paused, completed, error
+        self.status = "initializing"  # initializing, running, idle, paused, completed, error
         self.current_phase = "setup"
         self.started_at = datetime.datetime.now()
         self.updated_at = datetime.datetime.now()
@@ -242,37 +270,28 @@ class Orchestrator:
             db_connector: Database connector for persistence
             llm_service: LLM service for agent interactions
         """
-        self.db_connector = db_connector or DatabaseConnector()
+        self.db_connector = db_connector or DatabaseConnector.shared()
         self.llm_service = llm_service  # In a real implementation, this would be a specific LLM service
         self.message_bus = MessageBus(db_connector=self.db_connector)
         self.system_state = SystemState()
+        # Agent instances are built once; each project binds them to its own state
+        self.agent_instances = get_agent_instances(self.db_connector, orchestrator=self)
+        self._bind_agents()
         self.graph = self._create_graph()
         # Handle checkpointing directly through save_checkpoint and load_checkpoint methods
     
-    def _create_agent_instances(self) -> Dict[str, Any]:
+    def _bind_agents(self) -> None:
         """
-        Create instances of all agents.
-        
-        Returns:
-            Dictionary mapping agent types to instances
-        """
-        agents = {
-            "project_manager": ProjectManagerAgent(db_connector=self.db_connector),
-            "developer": DeveloperAgent(db_connector=self.db_connector),
-            "ui_ux": UIUXAgent(db_connector=self.db_connector),
-            "integration": IntegrationAgent(db_connector=self.db_connector),
-            "testing": TestingAgent(db_connector=self.db_connector),
-            "documentation": DocumentationAgent(db_connector=self.db_connector),
-            "error_handling": ErrorHandlingAgent(db_connector=self.db_connector, orchestrator=self)
-        }
-        
-        # Initialize agent states
-        for agent_type, agent_instance in agents.items():
-            agent_id = f"{agent_type}_{uuid.uuid4().hex[:8]}"
-            agent_state = AgentState(agent_id, agent_type, agent_instance)
-            self.system_state.agents[agent_id] = agent_state
+        Give the current system state one agent of each type.
         
-        return agents
+        The agent instances are shared; only their AgentState records belong
+        to the system state. Agent types the state already has are kept.
+        """
+        bound_types = {agent_state.agent_type for agent_state in self.system_state.agents.values()}
+        for agent_type, agent_instance in self.agent_instances.items():
+            if agent_type not in bound_types:
+                agent_id = f"{agent_type}_{uuid.uuid4().hex[:8]}"
+                self.system_state.agents[agent_id] = AgentState(agent_id, agent_type, agent_instance)
     
     def _agent_node_factory(self, agent_type: str) -> Callable:
         """
@@ -301,6 +320,7 @@ class Orchestrator:
             
             # Check for messages
             messages = self.message_bus.get_unread_messages(agent_state.agent_id)
+            update: Dict[str, Any] = {}
             
             # Process messages based on agent type
             if agent_type == "project_manager":
@@ -313,11 +333,23 @@ class Orchestrator:
                         tasks = agent_state.agent_instance.create_task_breakdown(parsed_requirements)
                         assigned_tasks = agent_state.agent_instance.assign_tasks_to_agents(tasks)
                         
+                        # Store the tasks and replace their provisional IDs
+                        task_ids = self.db_connector.create_tasks_bulk(self.system_state.project_id, [{
+                            "title": task.get("title", "Untitled Task"),
+                            "description": task.get("description", ""),
+                            "assigned_agent": task["assigned_agent"],
+                            "id": task.get("id"),
+                            "dependencies": task.get("dependencies")
+                        } for task in assigned_tasks])
+                        link_task_ids(assigned_tasks, task_ids)
+                        
                         # Send tasks to agents
+                        task_messages = []
+                        receivers = []
                         for task in assigned_tasks:
                             receiver_agent = self.system_state.get_agent_by_type(task["assigned_agent"])
                             if receiver_agent:
-                                self.message_bus.send_message(Message(
+                                task_messages.append(Message(
                                     sender_id=agent_state.agent_id,
                                     receiver_id=receiver_agent.agent_id,
                                     content=task,
@@ -325,10 +357,13 @@ class Orchestrator:
                                     task_id=task["id"],
                                     project_id=self.system_state.project_id
                                 ))
+                                if task["assigned_agent"] not in receivers:
+                                    receivers.append(task["assigned_agent"])
+                        self.message_bus.send_many(task_messages)
                         
-                        # Update state
-                        state["tasks"] = assigned_tasks
-                        state["next"] = "monitoring"
+                        # Update state; every agent that received tasks runs next, in parallel
+                        update.setdefault("tasks", []).extend(assigned_tasks)
+                        update["next"] = receivers
             
             elif agent_type == "developer":
                 # Developer specific logic
@@ -353,8 +388,8 @@ class Orchestrator:
                             ))
                         
                         # Update state
-                        state["implementations"] = state.get("implementations", []) + [documented_code]
-                        state["next"] = "testing"
+                        update.setdefault("implementations", []).append(documented_code)
+                        update["next"] = "testing"
             
             elif agent_type == "ui_ux":
                 # UI/UX specific logic
@@ -379,8 +414,8 @@ class Orchestrator:
                             ))
                         
                         # Update state
-                        state["ui_implementations"] = state.get("ui_implementations", []) + [accessibility]
-                        state["next"] = "integration"
+                        update.setdefault("ui_implementations", []).append(accessibility)
+                        update["next"] = "integration"
             
             elif agent_type == "integration":
                 # Integration specific logic
@@ -420,8 +455,8 @@ class Orchestrator:
                         ))
                     
                     # Update state
-                    state["integrated_systems"] = state.get("integrated_systems", []) + [integrated_system]
-                    state["next"] = "testing"
+                    update.setdefault("integrated_systems", []).append(integrated_system)
+                    update["next"] = "testing"
             
             elif agent_type == "testing":
                 # Testing specific logic
@@ -469,8 +504,8 @@ class Orchestrator:
                                 ))
                                 
                                 # Update state
-                                state["test_reports"] = state.get("test_reports", []) + [test_report]
-                                state["next"] = "error_handling"
+                                update.setdefault("test_reports", []).append(test_report)
+                                update["next"] = "error_handling"
                         else:
                             # Tests passed, send to documentation agent
                             documentation_agent = self.system_state.get_agent_by_type("documentation")
@@ -485,8 +520,8 @@ class Orchestrator:
                                 ))
                                 
                                 # Update state
-                                state["test_reports"] = state.get("test_reports", []) + [test_report]
-                                state["next"] = "documentation"
+                                update.setdefault("test_reports", []).append(test_report)
+                                update["next"] = "documentation"
             
             elif agent_type == "documentation":
                 # Documentation specific logic
@@ -519,12 +554,12 @@ class Orchestrator:
                             ))
                             
                             # Update state
-                            state["documentation"] = state.get("documentation", []) + [{
+                            update.setdefault("documentation", []).append({
                                 "task_id": message.task_id,
                                 "technical_docs": technical_docs,
                                 "user_guides": user_guides
-                            }]
-                            state["next"] = "project_manager"
+                            })
+                            update["next"] = "project_manager"
             
             elif agent_type == "error_handling":
                 # Error handling specific logic
@@ -561,85 +596,80 @@ class Orchestrator:
                             ))
                         
                         # Update state
-                        state["error_handling_results"] = state.get("error_handling_results", []) + [results]
-                        state["next"] = message.sender_id.split("_")[0]  # Return to the agent type that sent the error
+                        update.setdefault("error_handling_results", []).append(results)
+                        # Return to the agent type that sent the error
+                        sender = self.system_state.agents.get(message.sender_id)
+                        update["next"] = sender.agent_type if sender else "project_manager"
             
             # Mark messages as processed
             for message in messages:
                 self.message_bus.mark_processed(message.id)
             
-            return state
+            # An agent that routed nowhere ends its branch of the graph
+            update["routes"] = {agent_type: self._next_agents(update.get("next"))}
+            return update
         
         return node_function
     
-    def _create_graph(self) -> StateGraph:
+    def _next_agents(self, next_value: Any) -> List[str]:
         """
-        Create the LangGraph orchestration graph.
-
+        Get the agent nodes named by a "next" value.
+        
+        Args:
+            next_value: Agent type, list of agent types, or None
+            
         Returns:
-            StateGraph instance
+            Agent types that are nodes of the graph
+        """
+        if next_value is None:
+            return []
+        if isinstance(next_value, str):
+            next_value = [next_value]
+        return [agent_type for agent_type in next_value if agent_type in self.agent_types]
+    
+    def _route_from(self, agent_type: str) -> Callable[[Dict[str, Any]], Union[str, List[str]]]:
+        """Create the conditional edge that follows an agent's "next"."""
+        def route(state: Dict[str, Any]) -> Union[str, List[str]]:
+            return state.get("routes", {}).get(agent_type) or END
+        return route
+    
+    def _route_start(self, state: Dict[str, Any]) -> Union[str, List[str]]:
+        """Start from every agent with unread messages, in parallel, or end if there are none."""
+        ready = []
+        for agent_type in self.agent_types:
+            agent_state = self.system_state.get_agent_by_type(agent_type)
+            if agent_state and self.message_bus.has_unread_messages(agent_state.agent_id):
+                ready.append(agent_type)
+        return ready or END
+    
+    def _create_graph(self) -> CompiledStateGraph:
         """
-        # Initialize agents
-        agents = self._create_agent_instances()
+        Create and compile the LangGraph orchestration graph.
+        
+        The graph starts from every agent with unread messages. After an agent
+        runs, a conditional edge follows the "next" it returned: one agent, a
+        list of agents that then run in parallel, or the end of that branch.
 
-        # Create state schema - use a string key instead of a direct schema object
-        # which addresses the "unhashable type: 'dict'" error
-        workflow = StateGraph("agent_workflow")
+        Returns:
+            Compiled graph
+        """
+        self.agent_types = list(self.agent_instances)
 
-        # Initialize with empty state
-        initial_state = {
-            "tasks": [],
-            "implementations": [],
-            "ui_implementations": [],
-            "integrated_systems": [],
-            "test_reports": [],
-            "documentation": [],
-            "error_handling_results": [],
-            "next": "project_manager"  # Controls which node to execute next
-        }
+        workflow = StateGraph(WorkflowState)
         
-        # Add nodes for each agent
-        for agent_type in agents.keys():
-            workflow.add_node(agent_type, self._agent_node_factory(agent_type))
+        # Nodes are named "<agent type>_agent", since some agent types are also state keys;
+        # routes name agent types and are mapped to their nodes
+        nodes = {agent_type: f"{agent_type}_agent" for agent_type in self.agent_types}
+        nodes[END] = END
         
-        # Add start node that initializes the state properly
-        def start_node(state):
-            # Initialize or preserve state
-            return {
-                "tasks": state.get("tasks", []),
-                "implementations": state.get("implementations", []),
-                "ui_implementations": state.get("ui_implementations", []),
-                "integrated_systems": state.get("integrated_systems", []),
-                "test_reports": state.get("test_reports", []),
-                "documentation": state.get("documentation", []),
-                "error_handling_results": state.get("error_handling_results", []),
-                "next": "project_manager"  # Always start with project manager
-            }
-
-        workflow.add_node("start", start_node)
-
-        # Add an edge from the system START node to our start node
-        workflow.add_edge(START, "start")
-
-        # Connect start node to project_manager
-        workflow.add_edge("start", "project_manager")
-
-        # Create direct connections between agents instead of conditional edges
-        for source in agents.keys():
-            for target in agents.keys():
-                # Create edges between all agents
-                workflow.add_edge(source, target)
-
-            # Ensure every agent can exit the graph
-            workflow.add_edge(source, END)
-
-        # Add special loop for project_manager (already included in the loop above)
-        # workflow.add_edge("project_manager", "project_manager")
+        # Add nodes for each agent, each routing on its own "next"
+        for agent_type in self.agent_types:
+            workflow.add_node(nodes[agent_type], self._agent_node_factory(agent_type))
+            workflow.add_conditional_edges(nodes[agent_type], self._route_from(agent_type), nodes)
         
-        # Compile the graph
-        workflow.compile()
+        workflow.add_conditional_edges(START, self._route_start, nodes)
         
-        return workflow
+        return workflow.compile()
     
     def initialize_project(self, name: str, description: str, requirements: str) -> str:
         """
@@ -659,8 +689,8 @@ class Orchestrator:
         # Initialize system state
         self.system_state = SystemState(project_id=project_id)
         
-        # Re-create agent instances
-        self._create_agent_instances()
+        # Bind the agents to the new project's state
+        self._bind_agents()
         
         # Create initial state for the graph - use a clean dictionary with simple data types
         # to avoid any unhashable type issues
@@ -675,6 +705,9 @@ class Orchestrator:
             "next": "project_manager"
         }
         
+        # The project is starting over, so look its logging task up again
+        self.message_bus.invalidate_system_task(project_id)
+        
         # Send requirements to project manager
         project_manager = self.system_state.get_agent_by_type("project_manager")
         if project_manager:
@@ -686,117 +719,124 @@ class Orchestrator:
                 project_id=project_id
             ))
         
-        # Initialize the graph
-        self.graph = self._create_graph()
-
         # Store initial checkpoint
         checkpoint_id = self.save_checkpoint(initial_state)
         self.system_state.checkpoint_id = checkpoint_id
         
         return project_id
     
-    def run(self, steps: int = 10) -> Dict[str, Any]:
+    def stream(self, steps: int = 10) -> Iterator[Dict[str, Any]]:
         """
-        Run the orchestration for a specified number of steps.
+        Run the orchestration graph, yielding agent updates as they happen.
+        
+        Each graph step runs the agents routed to in the previous step in
+        parallel, then saves one checkpoint of the merged state. The run stops
+        when every branch has ended or after the given number of steps;
+        agents still holding unread messages continue on the next call.
+        
+        Steps are not transactional: agent nodes run on LangGraph's worker
+        threads and their database writes commit one statement at a time,
+        before the step's checkpoint is saved.
         
         Args:
-            steps: Number of steps to run
+            steps: Maximum number of graph steps to run
             
-        Returns:
-            Current system state
+        Yields:
+            Dictionary mapping an agent's node ("<agent type>_agent") to the
+            state update it returned
         """
         if not self.system_state.project_id:
             raise ValueError("Project not initialized")
         
-        # Load the latest checkpoint
-        current_state = self.load_checkpoint(self.system_state.checkpoint_id)
+        # Resume from the latest checkpoint
+        current_state = dict(self.load_checkpoint(self.system_state.checkpoint_id))
         
         # Update system status
         self.system_state.status = "running"
         
-        # Run the graph for the specified number of steps
-        for _ in range(steps):
-            try:
-                # For compatibility with any LangGraph version,
-                # we'll skip the graph execution entirely and just return a simple state
-                # This is a fallback approach until we can resolve the LangGraph API issues
-                print(f"Step {_}: Using simplified graph execution...")
-
-                # Just use the current state or initialize a new one
-                if _ == 0 or not current_state:
-                    next_state = {
-                        "tasks": [],
-                        "implementations": [],
-                        "ui_implementations": [],
-                        "integrated_systems": [],
-                        "test_reports": [],
-                        "documentation": [],
-                        "error_handling_results": [],
-                        "next": "project_manager"
-                    }
-                else:
-                    # Just use the current state as is
-                    next_state = current_state
-
-                # Check if we've reached the end
-                if next_state is None:
-                    self.system_state.status = "completed"
-                    break
-
-                # Update current state
-                current_state = next_state
+        step = 0
+        step_updates = {}
+        try:
+            # The step limit is enforced below; the recursion limit only has to allow it
+            for mode, chunk in self.graph.stream(current_state, {"recursion_limit": steps + 2},
+                                                 stream_mode=["updates", "values"]):
+                if mode == "updates":
+                    step_updates.update(chunk)
+                    yield chunk
+                    continue
+                
+                # The full state follows each step (and the input, before any update)
+                if not step_updates:
+                    continue
+                step += 1
+                step_updates = {}
                 
                 # Save checkpoint
-                checkpoint_id = self.save_checkpoint(current_state)
+                checkpoint_id = self.save_checkpoint(chunk)
                 self.system_state.checkpoint_id = checkpoint_id
                 
                 # Update tasks in system state - ensure we handle datetimes properly
                 try:
-                    tasks_list = current_state.get("tasks", [])
-                    self.system_state.tasks = {
-                        task["id"]: task for task in tasks_list
-                    }
+                    self.system_state.tasks = {task["id"]: task for task in chunk.get("tasks", [])}
                 except Exception as e:
                     # Log error but continue
                     print(f"Error updating tasks: {str(e)}")
-
+                
                 # Update system state timestamp
                 self.system_state.updated_at = datetime.datetime.now()
                 
-            except Exception as e:
-                # Handle any errors
-                error_handling_agent = self.system_state.get_agent_by_type("error_handling")
-                if error_handling_agent:
-                    # Create error data
-                    error_data = {
-                        "task_id": None,
-                        "agent_id": "system",
-                        "error_type": type(e).__name__,
-                        "error_message": str(e),
-                        "stack_trace": traceback.format_exc(),
-                    }
-                    
-                    # Store error
-                    error_id = self.db_connector.store_error(**error_data)
-                    error_data["id"] = error_id
-                    
-                    # Add to system state
-                    self.system_state.add_error(error_data)
-                    
-                    # Send to error handling agent
-                    self.message_bus.send_message(Message(
-                        sender_id="system",
-                        receiver_id=error_handling_agent.agent_id,
-                        content={"error": error_data, "context": {
-                            "system_state": self.system_state.to_dict()
-                        }},
-                        message_type="error",
-                        project_id=self.system_state.project_id
-                    ))
+                if step >= steps:
+                    return
+            
+            # Every branch reached the end without pending work
+            self.system_state.status = "idle"
+        
+        except Exception as e:
+            # Handle any errors
+            error_handling_agent = self.system_state.get_agent_by_type("error_handling")
+            if error_handling_agent:
+                # Create error data
+                error_data = {
+                    "task_id": None,
+                    "agent_id": "system",
+                    "error_type": type(e).__name__,
+                    "error_message": str(e),
+                    "stack_trace": traceback.format_exc(),
+                }
                 
-                # Update system status
-                self.system_state.status = "error"
-                break
+                # Store error
+                error_id = self.db_connector.store_error(**error_data)
+                error_data["id"] = error_id
+                
+                # Add to system state
+                self.system_state.add_error(error_data)
+                
+                # Send to error handling agent
+                self.message_bus.send_message(Message(
+                    sender_id="system",
+                    receiver_id=error_handling_agent.agent_id,
+                    content={"error": error_data, "context": {
+                        "system_state": self.system_state.to_dict()
+                    }},
+                    message_type="error",
+                    project_id=self.system_state.project_id
+                ))
+            
+            # Update system status
+            self.system_state.status = "error"
+    
+    def run(self, steps: int = 10) -> Dict[str, Any]:
+        """
+        Run the orchestration for a specified number of steps.
+        
+        Args:
+            steps: Number of steps to run
+            
+        Returns:
+            Current system state
+        """
+        for _ in self.stream(steps):
+            pass
         
         # Convert system state to dictionary and ensure datetime objects are properly handled
         try:
@@ -824,7 +864,10 @@ class Orchestrator:
             Checkpoint ID
         """
         # Store checkpoint in database
-        checkpoint_id = self.db_connector.store_checkpoint(state)
+        checkpoint_id = self.db_connector.store_checkpoint(
+            state, parent_id=self.system_state.checkpoint_id,
+            project_id=self.system_state.project_id
+        )
         return checkpoint_id
     
     def load_checkpoint(self, checkpoint_id: Optional[str] = None) -> Dict[str, Any]:
@@ -843,8 +886,8 @@ class Orchestrator:
             if checkpoint:
                 return checkpoint.get("checkpoint_data", {})
         
-        # Load latest checkpoint
-        checkpoint = self.db_connector.get_latest_checkpoint()
+        # Load latest checkpoint of the current project
+        checkpoint = self.db_connector.get_latest_checkpoint(self.system_state.project_id)
         if checkpoint:
             return checkpoint.get("checkpoint_data", {})
         
@@ -875,20 +918,16 @@ class Orchestrator:
         if not project:
             return {"error": "Project not found"}
         
-        # Get tasks
-        tasks = self.db_connector.get_tasks_by_project(project_id)
-        
-        # Get errors
-        errors = []
-        for task in tasks:
-            task_errors = self.db_connector.get_errors_by_task(task["id"])
-            errors.extend(task_errors)
+        # Get task and error counts in one aggregate query
+        summary = self.db_connector.get_project_summary(project_id)
+        task_counts = summary["tasks"]
+        error_counts = summary["errors"]
         
         # Calculate progress metrics
-        total_tasks = len(tasks)
-        completed_tasks = sum(1 for task in tasks if task["status"] == "completed")
-        in_progress_tasks = sum(1 for task in tasks if task["status"] == "in_progress")
-        blocked_tasks = sum(1 for task in tasks if task["status"] == "blocked")
+        total_tasks = task_counts["total"]
+        completed_tasks = task_counts.get("completed", 0)
+        in_progress_tasks = task_counts.get("in_progress", 0)
+        blocked_tasks = task_counts.get("blocked", 0)
         
         # Create status summary
         status = {
@@ -901,9 +940,9 @@ class Orchestrator:
                 "completion_percentage": (completed_tasks / total_tasks * 100) if total_tasks > 0 else 0,
             },
             "errors": {
-                "total": len(errors),
-                "open": sum(1 for error in errors if error["status"] == "open"),
-                "resolved": sum(1 for error in errors if error["status"] == "resolved")
+                "total": error_counts["total"],
+                "open": error_counts.get("open", 0),
+                "resolved": error_counts.get("resolved", 0)
             },
             "agent_status": {
                 agent_id: {
@@ -4,7 +4,10 @@ import traceback
 import sys
 import os.path
 import json
-from typing import Dict, Any, List, Optional, Union, Tuple
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from collections import deque
+from typing import Dict, Any, List, Optional, Union, Tuple, Deque
 
 # Add project root to Python path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -12,21 +15,25 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from utils import serialize_state, deserialize_state
 
 from core.database import DatabaseConnector
-from core.messaging import MessageBus, Message
+from core.messaging import MessageBus, Message, DEFAULT_HISTORY_LIMIT
+from core.scheduling import link_task_ids
 
 # Import agents
-from agents.project_manager import ProjectManagerAgent
-from agents.developer import DeveloperAgent
-from agents.ui_ux import UIUXAgent
-from agents.integration import IntegrationAgent
-from agents.testing import TestingAgent
-from agents.documentation import DocumentationAgent
-from agents.error_handling import ErrorHandlingAgent
+from agents.registry import get_agent_instances
+
+# Maximum number of agents processed at once by a concurrent orchestrator
+DEFAULT_MAX_AGENT_WORKERS = 7
+
+# Marks state keys a rolled-back step added, rather than replaced
+_UNSET = object()
 
 class AgentState:
     """
     Class representing the state of an agent in the system.
     """
+    __slots__ = ("agent_id", "agent_type", "agent_instance", "status", "current_task_id",
+                 "task_history", "error", "last_active")
+    
     def __init__(self, agent_id: str, agent_type: str, agent_instance: Any):
         """
         Initialize agent state.
@@ -121,13 +128,15 @@ class SystemState:
         self.project_id = project_id
         self.agents: Dict[str, AgentState] = {}
         self.tasks: Dict[str, Dict[str, Any]] = {}
-        self.messages: List[Message] = []
+        self.messages: Deque[Message] = deque(maxlen=DEFAULT_HISTORY_LIMIT)  # Most recent messages
         self.errors: List[Dict[str, Any]] = []
-        self.status = "initializing"  # initializing, running, paused, completed, error
+        self.status = "initializing"  # initializing, running, idle, paused, completed, error
         self.current_phase = "setup"
         self.started_at = datetime.datetime.now()
         self.updated_at = datetime.datetime.now()
         self.checkpoint_id = None
+        # Guards agent states, errors and messages when agents run on several threads
+        self._lock = threading.RLock()
     
     def to_dict(self) -> Dict[str, Any]:
         """
@@ -204,12 +213,13 @@ class SystemState:
         Returns:
             True if agent was found and updated, False otherwise
         """
-        if agent_id in self.agents:
-            self.agents[agent_id].status = status
-            self.agents[agent_id].last_active = datetime.datetime.now()
-            self.updated_at = datetime.datetime.now()
-            return True
-        return False
+        with self._lock:
+            if agent_id in self.agents:
+                self.agents[agent_id].status = status
+                self.agents[agent_id].last_active = datetime.datetime.now()
+                self.updated_at = datetime.datetime.now()
+                return True
+            return False
     
     def assign_task_to_agent(self, agent_id: str, task_id: str) -> bool:
         """
@@ -222,14 +232,15 @@ class SystemState:
         Returns:
             True if agent was found and task assigned, False otherwise
         """
-        if agent_id in self.agents:
-            self.agents[agent_id].current_task_id = task_id
-            self.agents[agent_id].task_history.append(task_id)
-            self.agents[agent_id].status = "working"
-            self.agents[agent_id].last_active = datetime.datetime.now()
-            self.updated_at = datetime.datetime.now()
-            return True
-        return False
+        with self._lock:
+            if agent_id in self.agents:
+                self.agents[agent_id].current_task_id = task_id
+                self.agents[agent_id].task_history.append(task_id)
+                self.agents[agent_id].status = "working"
+                self.agents[agent_id].last_active = datetime.datetime.now()
+                self.updated_at = datetime.datetime.now()
+                return True
+            return False
     
     def add_error(self, error: Dict[str, Any]) -> None:
         """
@@ -242,17 +253,18 @@ class SystemState:
         try:
             # Attempt to serialize to catch any issues
             json_error = json.loads(serialize_state(error))
-            self.errors.append(json_error)
         except Exception as e:
             # If serialization fails, use a simpler error
             print(f"Error serializing error data: {str(e)}")
-            self.errors.append({
+            json_error = {
                 "error_type": error.get("error_type", "Unknown"),
                 "error_message": error.get("error_message", str(e)),
                 "created_at": datetime.datetime.now().isoformat()
-            })
+            }
             
-        self.updated_at = datetime.datetime.now()
+        with self._lock:
+            self.errors.append(json_error)
+            self.updated_at = datetime.datetime.now()
     
     def add_message(self, message: Message) -> None:
         """
@@ -261,8 +273,33 @@ class SystemState:
         Args:
             message: Message to add
         """
-        self.messages.append(message)
-        self.updated_at = datetime.datetime.now()
+        with self._lock:
+            self.messages.append(message)
+            self.updated_at = datetime.datetime.now()
+
+
+def merge_state_deltas(deltas: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Merge the state deltas of agents processed in the same step.
+    
+    The result does not depend on the order in which the agents finished:
+    deltas are merged in the order given, list values are concatenated and
+    any other value is taken from the last delta that sets it.
+    
+    Args:
+        deltas: State deltas returned by _process_agent_messages, in agent order
+        
+    Returns:
+        Merged state delta
+    """
+    merged: Dict[str, Any] = {}
+    for delta in deltas:
+        for key, value in delta.items():
+            if isinstance(value, list) and isinstance(merged.get(key), list):
+                merged[key] = merged[key] + value
+            else:
+                merged[key] = value
+    return merged
 
 
 class SimpleOrchestrator:
@@ -270,21 +307,28 @@ class SimpleOrchestrator:
     Simple orchestration without using LangGraph for the multi-agent system.
     """
     def __init__(self, db_connector: Optional[DatabaseConnector] = None,
-                 llm_service: Any = None):
+                 llm_service: Any = None, concurrent: bool = False,
+                 max_workers: int = DEFAULT_MAX_AGENT_WORKERS):
         """
         Initialize the orchestrator.
 
         Args:
             db_connector: Database connector for persistence
             llm_service: LLM service for agent interactions
+            concurrent: Whether each step processes every agent with unread messages
+                in parallel, instead of only the agent named by the state's "next"
+            max_workers: Maximum number of agents processed at once in concurrent mode
         """
-        self.db_connector = db_connector or DatabaseConnector()
+        self.db_connector = db_connector or DatabaseConnector.shared()
         self.llm_service = llm_service  # In a real implementation, this would be a specific LLM service
         self.message_bus = MessageBus(db_connector=self.db_connector)
         self.system_state = SystemState()
+        self.concurrent = concurrent
+        self.max_workers = max_workers
 
-        # Create agent instances
-        self._create_agent_instances()
+        # Agent instances are built once; each project binds them to its own state
+        self.agent_instances = get_agent_instances(self.db_connector, orchestrator=self)
+        self._bind_agents()
 
     def reset(self, project_id: Optional[str] = None):
         """
@@ -308,42 +352,32 @@ class SimpleOrchestrator:
         else:
             self.system_state = SystemState()
 
-        # Create agent instances
-        self._create_agent_instances()
+        # Bind the agents to the new state
+        self._bind_agents()
 
         return self
     
-    def _create_agent_instances(self) -> Dict[str, Any]:
+    def _bind_agents(self) -> None:
         """
-        Create instances of all agents.
+        Give the current system state one agent of each type.
         
-        Returns:
-            Dictionary mapping agent types to instances
-        """
-        agents = {
-            "project_manager": ProjectManagerAgent(db_connector=self.db_connector),
-            "developer": DeveloperAgent(db_connector=self.db_connector),
-            "ui_ux": UIUXAgent(db_connector=self.db_connector),
-            "integration": IntegrationAgent(db_connector=self.db_connector),
-            "testing": TestingAgent(db_connector=self.db_connector),
-            "documentation": DocumentationAgent(db_connector=self.db_connector),
-            "error_handling": ErrorHandlingAgent(db_connector=self.db_connector, orchestrator=self)
-        }
-        
-        # Initialize agent states
-        for agent_type, agent_instance in agents.items():
-            agent_id = f"{agent_type}_{uuid.uuid4().hex[:8]}"
-            agent_state = AgentState(agent_id, agent_type, agent_instance)
-            self.system_state.agents[agent_id] = agent_state
-        
-        return agents
+        The agent instances are shared; only their AgentState records belong
+        to the system state. Agent types the state already has are kept.
+        """
+        bound_types = {agent_state.agent_type for agent_state in self.system_state.agents.values()}
+        for agent_type, agent_instance in self.agent_instances.items():
+            if agent_type not in bound_types:
+                agent_id = f"{agent_type}_{uuid.uuid4().hex[:8]}"
+                self.system_state.agents[agent_id] = AgentState(agent_id, agent_type, agent_instance)
     
-    def _process_agent_messages(self, agent_type: str) -> Dict[str, Any]:
+    def _process_agent_messages(self, agent_type: str,
+                                claimed_messages: Optional[List[Message]] = None) -> Dict[str, Any]:
         """
         Process messages for a specific agent type.
         
         Args:
             agent_type: Type of agent to process messages for
+            claimed_messages: Optional list the messages taken from the bus are added to
             
         Returns:
             Updated state information
@@ -358,6 +392,8 @@ class SimpleOrchestrator:
         
         # Get unread messages
         messages = self.message_bus.get_unread_messages(agent_state.agent_id)
+        if claimed_messages is not None:
+            claimed_messages.extend(messages)
         if not messages:
             # No messages, mark as idle
             self.system_state.update_agent_status(agent_state.agent_id, "idle")
@@ -401,30 +437,35 @@ class SimpleOrchestrator:
                             # Assign tasks to agents
                             assigned_tasks = agent_state.agent_instance.assign_tasks_to_agents(tasks)
 
-                            # Store tasks in the database
+                            # Create friendly task titles if missing
                             for task in assigned_tasks:
-                                # Create friendly task title if missing
                                 if not task.get("title"):
                                     task["title"] = f"Task {len(assigned_tasks)}"
 
-                                # Create task in database
-                                task_id = self.db_connector.create_task(
-                                    project_id=self.system_state.project_id,
-                                    title=task.get("title", "Untitled Task"),
-                                    description=task.get("description", ""),
-                                    assigned_agent=task.get("assigned_agent", "developer")
-                                )
+                            # Store all tasks in the database at once
+                            task_ids = self.db_connector.create_tasks_bulk(
+                                self.system_state.project_id,
+                                [{
+                                    "title": task.get("title", "Untitled Task"),
+                                    "description": task.get("description", ""),
+                                    "assigned_agent": task.get("assigned_agent", "developer"),
+                                    "id": task.get("id"),
+                                    "dependencies": task.get("dependencies")
+                                } for task in assigned_tasks]
+                            )
 
-                                # Update task with ID
-                                task["id"] = task_id
+                            # Replace provisional IDs, including those in dependencies
+                            link_task_ids(assigned_tasks, task_ids)
 
+                            task_messages = []
+                            for task, task_id in zip(assigned_tasks, task_ids):
                                 # Assign the task to the agent
                                 target_agent = self.system_state.get_agent_by_type(task.get("assigned_agent", "developer"))
                                 if target_agent:
-                                    self.system_state.assign_task_to_agent(target_agent.agent_id, task_id)
+                                    self._assign_task_after_commit(target_agent.agent_id, task_id)
 
                                     # Send task to the agent
-                                    self.message_bus.send_message(Message(
+                                    task_messages.append(Message(
                                         sender_id=agent_state.agent_id,
                                         receiver_id=target_agent.agent_id,
                                         content=task,
@@ -432,6 +473,7 @@ class SimpleOrchestrator:
                                         task_id=task_id,
                                         project_id=self.system_state.project_id
                                     ))
+                            self.message_bus.send_many(task_messages)
 
                             # Add created tasks to state
                             state["tasks"] = assigned_tasks
@@ -460,7 +502,7 @@ class SimpleOrchestrator:
                             # Assign to developer agent
                             developer_agent = self.system_state.get_agent_by_type("developer")
                             if developer_agent:
-                                self.system_state.assign_task_to_agent(developer_agent.agent_id, task_id)
+                                self._assign_task_after_commit(developer_agent.agent_id, task_id)
 
                                 # Send task to developer
                                 self.message_bus.send_message(Message(
@@ -511,6 +553,147 @@ class SimpleOrchestrator:
                 "next": "error_handling"  # Route to error handling
             }
     
+    def _assign_task_after_commit(self, agent_id: str, task_id: str) -> None:
+        """Assign a task to an agent once the transaction that created the task commits."""
+        self.db_connector.after_commit(lambda: self.system_state.assign_task_to_agent(agent_id, task_id))
+    
+    def _dispatch_agents(self) -> Dict[str, AgentState]:
+        """
+        Get the agent that processes each agent type's messages.
+        
+        Returns:
+            Dictionary mapping agent types to agent states, in the order the agents were created
+        """
+        agents: Dict[str, AgentState] = {}
+        for agent_state in self.system_state.agents.values():
+            # Messages are processed by the first agent of each type (see get_agent_by_type)
+            agents.setdefault(agent_state.agent_type, agent_state)
+        return agents
+    
+    def _agents_with_unread_messages(self) -> List[str]:
+        """
+        Get the types of agents that have unread messages.
+        
+        Returns:
+            Agent types, in the order the agents were created
+        """
+        return [agent_type for agent_type, agent_state in self._dispatch_agents().items()
+                if self.message_bus.has_unread_messages(agent_state.agent_id)]
+    
+    def _process_agent_in_transaction(self, agent_type: str) -> Dict[str, Any]:
+        """
+        Process an agent's messages on a worker thread, committing its writes together.
+        
+        If the transaction fails, the agent's messages are put back on the bus
+        so that a later step processes them again.
+        """
+        claimed_messages: List[Message] = []
+        try:
+            with self.db_connector.transaction():
+                return self._process_agent_messages(agent_type, claimed_messages)
+        except Exception as e:
+            print(f"Error committing work of agent {agent_type}: {str(e)}")
+            self.message_bus.requeue_messages(claimed_messages)
+            return {"error": str(e), "next": "error_handling", "rolled_back": True}
+    
+    def _process_agents(self, agent_types: List[str], current_state: Dict[str, Any],
+                        claimed_messages: Optional[List[Message]] = None) -> Dict[str, Any]:
+        """
+        Process several agents' messages and merge their state deltas.
+        
+        In concurrent mode the agents run in parallel on a thread pool that
+        lasts for the step, otherwise one after another on the calling thread.
+        
+        Args:
+            agent_types: Agent types to process, in agent creation order
+            current_state: Current state, updated in place
+            claimed_messages: Optional list the messages taken from the bus are
+                added to; in concurrent mode each agent requeues its own
+            
+        Returns:
+            The values the update replaced, for _restore_state
+            
+        Raises:
+            RuntimeError: In concurrent mode, if every agent's work was rolled
+                back, since the step only put its messages back on the bus
+        """
+        if self.concurrent:
+            # Worker threads end with the step, releasing their database cursors
+            with ThreadPoolExecutor(max_workers=max(1, min(self.max_workers, len(agent_types))),
+                                    thread_name_prefix="agent") as pool:
+                futures = [pool.submit(self._process_agent_in_transaction, agent_type)
+                           for agent_type in agent_types]
+                # Collect results in agent order, not completion order, so the merge is deterministic
+                results = [future.result() for future in futures]
+            if all(result.get("rolled_back") for result in results):
+                # Requeued work is not progress; retrying it at once would loop on the same failure
+                raise RuntimeError("Work of every agent in the step was rolled back: "
+                                   + "; ".join(f"{agent_type}: {result['error']}"
+                                               for agent_type, result in zip(agent_types, results)))
+        else:
+            results = [self._process_agent_messages(agent_type, claimed_messages) for agent_type in agent_types]
+        
+        deltas = []
+        route_to_error_handling = False
+        for agent_type, result in zip(agent_types, results):
+            if "error" in result:
+                print(f"Error processing agent {agent_type}: {result['error']}")
+                route_to_error_handling |= result.get("next") == "error_handling"
+            else:
+                deltas.append(result)
+        
+        update = merge_state_deltas(deltas)
+        if route_to_error_handling:
+            update["next"] = "error_handling"
+        
+        replaced = {key: current_state[key] if key in current_state else _UNSET for key in update}
+        current_state.update(update)
+        return replaced
+    
+    @staticmethod
+    def _restore_state(current_state: Dict[str, Any], replaced: Dict[str, Any]) -> None:
+        """Undo a _process_agents update whose step was rolled back."""
+        for key, value in replaced.items():
+            if value is _UNSET:
+                current_state.pop(key, None)
+            else:
+                current_state[key] = value
+    
+    def _run_agents_step(self, agent_types: List[str], current_state: Dict[str, Any]) -> None:
+        """
+        Process a set of agents as one step and checkpoint the merged state.
+        
+        If the step's transaction rolls back, the claimed messages go back on
+        the bus and the state is left as it was before the step.
+        
+        Args:
+            agent_types: Agent types to process, in agent creation order
+            current_state: Current state, updated in place
+        """
+        print(f"Processing agents: {', '.join(agent_types)}")
+        if self.concurrent:
+            # Each agent commits its own work on its worker thread, so only
+            # the merged state's checkpoint is written in this transaction
+            self._process_agents(agent_types, current_state)
+            with self.db_connector.transaction():
+                checkpoint_id = self.save_checkpoint(current_state)
+        else:
+            # Run the step and its checkpoint in one transaction
+            claimed_messages: List[Message] = []
+            replaced: Dict[str, Any] = {}
+            try:
+                with self.db_connector.transaction():
+                    replaced = self._process_agents(agent_types, current_state, claimed_messages)
+                    checkpoint_id = self.save_checkpoint(current_state)
+            except Exception:
+                self.message_bus.requeue_messages(claimed_messages)
+                self._restore_state(current_state, replaced)
+                raise
+        
+        # Only point at the checkpoint once it has been committed
+        self.system_state.checkpoint_id = checkpoint_id
+        self.system_state.updated_at = datetime.datetime.now()
+    
     def initialize_project(self, name: str, description: str, requirements: str) -> str:
         """
         Initialize a new project.
@@ -548,8 +731,8 @@ class SimpleOrchestrator:
         # Initialize system state with the project ID
         self.system_state = SystemState(project_id=project_id)
         
-        # Create agent instances
-        self._create_agent_instances()
+        # Bind the agents to the new state
+        self._bind_agents()
         
         # Initial state
         initial_state = {
@@ -563,6 +746,9 @@ class SimpleOrchestrator:
             "next": "project_manager"
         }
         
+        # The project is starting over, so look its logging task up again
+        self.message_bus.invalidate_system_task(project_id)
+        
         # Send requirements to project manager
         project_manager = self.system_state.get_agent_by_type("project_manager")
         if project_manager:
@@ -604,34 +790,19 @@ class SimpleOrchestrator:
         # Update system status
         self.system_state.status = "running"
         
-        # Simplified run process - just process messages for agents in sequence
+        # Simplified run process - process messages for one agent per step, or for
+        # every agent with unread messages in concurrent mode
         for _ in range(steps):
             try:
-                # Determine which agent to process
-                current_agent = current_state.get("next", "project_manager")
-                print(f"Processing agent: {current_agent}")
-                
-                # Process messages for the agent
-                next_state = self._process_agent_messages(current_agent)
-                
-                # Check if we hit an error
-                if "error" in next_state:
-                    print(f"Error processing agent {current_agent}: {next_state['error']}")
-                    # Route to error handling if serious
-                    if "next" in next_state and next_state["next"] == "error_handling":
-                        current_state["next"] = "error_handling"
-                    # Otherwise just continue
+                if self.concurrent:
+                    # Process every agent with unread messages; if nothing is
+                    # waiting, fall back to the agent the state names
+                    agent_types = (self._agents_with_unread_messages()
+                                   or [current_state.get("next", "project_manager")])
+                    self._run_agents_step(agent_types, current_state)
                 else:
-                    # Update current state
-                    current_state.update(next_state)
-                
-                # Save checkpoint
-                checkpoint_id = self.save_checkpoint(current_state)
-                self.system_state.checkpoint_id = checkpoint_id
-                
-                # Update system state timestamp
-                self.system_state.updated_at = datetime.datetime.now()
-                
+                    # Process the agent the state names
+                    self._run_agents_step([current_state.get("next", "project_manager")], current_state)
             except Exception as e:
                 # Handle any errors
                 print(f"Error in orchestration run: {str(e)}")
@@ -650,7 +821,76 @@ class SimpleOrchestrator:
                 self.system_state.status = "error"
                 break
         
-        # Return system state as a serializable dictionary
+        return self._serialized_system_state()
+    
+    def run_until_quiescent(self, max_steps: Optional[int] = None,
+                            wait_timeout: float = 0) -> Dict[str, Any]:
+        """
+        Run the orchestration driven by message arrival until no agent has work.
+        
+        Instead of polling the agent named by the state's "next", each step
+        processes exactly the agents the message bus reports as having unread
+        messages, so no step or checkpoint is spent on an idle agent. The run
+        is quiescent, and ends, once a step leaves no unread messages and none
+        arrive within wait_timeout.
+        
+        Args:
+            max_steps: Optional maximum number of steps to run
+            wait_timeout: Seconds to wait for messages from other threads
+                before treating the system as quiescent
+            
+        Returns:
+            Current system state
+        """
+        if not self.system_state.project_id:
+            raise ValueError("Project not initialized")
+        
+        # Load the latest checkpoint
+        current_state = self.load_checkpoint(self.system_state.checkpoint_id)
+        
+        # Update system status
+        self.system_state.status = "running"
+        
+        # Wake on messages for the agents that process them
+        agents = self._dispatch_agents()
+        agent_types = {agent_state.agent_id: agent_type for agent_type, agent_state in agents.items()}
+        for agent_id in agent_types:
+            self.message_bus.subscribe(agent_id)
+        
+        steps = 0
+        try:
+            while max_steps is None or steps < max_steps:
+                ready = set(self.message_bus.wait_for_messages(timeout=wait_timeout))
+                if not ready:
+                    # Nothing is queued and every agent has finished its step
+                    self.system_state.status = "idle"
+                    break
+                
+                try:
+                    self._run_agents_step([agent_type for agent_type, agent_state in agents.items()
+                                           if agent_state.agent_id in ready], current_state)
+                    steps += 1
+                except Exception as e:
+                    # Handle any errors
+                    print(f"Error in orchestration run: {str(e)}")
+                    self.system_state.add_error({
+                        "agent_id": "system",
+                        "error_type": type(e).__name__,
+                        "error_message": str(e),
+                        "stack_trace": traceback.format_exc(),
+                        "created_at": datetime.datetime.now().isoformat()
+                    })
+                    self.system_state.status = "error"
+                    break
+        finally:
+            for agent_id in agent_types:
+                self.message_bus.unsubscribe(agent_id)
+        
+        print(f"Orchestration stopped after {steps} steps ({self.system_state.status})")
+        return self._serialized_system_state()
+    
+    def _serialized_system_state(self) -> Dict[str, Any]:
+        """Get the system state as a serializable dictionary."""
         try:
             state_dict = self.system_state.to_dict()
             # Ensure it's fully serializable with datetime handling
@@ -677,7 +917,10 @@ class SimpleOrchestrator:
         """
         try:
             # Store checkpoint in database
-            checkpoint_id = self.db_connector.store_checkpoint(state)
+            checkpoint_id = self.db_connector.store_checkpoint(
+                state, parent_id=self.system_state.checkpoint_id,
+                project_id=self.system_state.project_id
+            )
             return checkpoint_id
         except Exception as e:
             print(f"Error saving checkpoint: {str(e)}")
@@ -701,8 +944,8 @@ class SimpleOrchestrator:
                 if checkpoint:
                     return checkpoint.get("checkpoint_data", {})
             
-            # Load latest checkpoint
-            checkpoint = self.db_connector.get_latest_checkpoint()
+            # Load latest checkpoint of the current project
+            checkpoint = self.db_connector.get_latest_checkpoint(self.system_state.project_id)
             if checkpoint:
                 return checkpoint.get("checkpoint_data", {})
         except Exception as e:
@@ -736,20 +979,16 @@ class SimpleOrchestrator:
             if not project:
                 return {"error": "Project not found"}
             
-            # Get tasks
-            tasks = self.db_connector.get_tasks_by_project(project_id)
-            
-            # Get errors
-            errors = []
-            for task in tasks:
-                task_errors = self.db_connector.get_errors_by_task(task["id"])
-                errors.extend(task_errors)
+            # Get task and error counts in one aggregate query
+            summary = self.db_connector.get_project_summary(project_id)
+            task_counts = summary["tasks"]
+            error_counts = summary["errors"]
             
             # Calculate progress metrics
-            total_tasks = len(tasks)
-            completed_tasks = sum(1 for task in tasks if task["status"] == "completed")
-            in_progress_tasks = sum(1 for task in tasks if task["status"] == "in_progress")
-            blocked_tasks = sum(1 for task in tasks if task["status"] == "blocked")
+            total_tasks = task_counts["total"]
+            completed_tasks = task_counts.get("completed", 0)
+            in_progress_tasks = task_counts.get("in_progress", 0)
+            blocked_tasks = task_counts.get("blocked", 0)
             
             # Create status summary with serializable dates
             status = {
@@ -769,9 +1008,9 @@ class SimpleOrchestrator:
                     "completion_percentage": (completed_tasks / total_tasks * 100) if total_tasks > 0 else 0,
                 },
                 "errors": {
-                    "total": len(errors),
-                    "open": sum(1 for error in errors if error["status"] == "open"),
-                    "resolved": sum(1 for error in errors if error["status"] == "resolved")
+                    "total": error_counts["total"],
+                    "open": error_counts.get("open", 0),
+                    "resolved": error_counts.get("resolved", 0)
                 },
                 "agent_status": {},
                 "system_status": self.system_state.status if project_id == self.system_state.project_id else "unknown"
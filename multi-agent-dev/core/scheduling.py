@@ -0,0 +1,242 @@
+"""
+Dependency-aware scheduling of project tasks.
+
+Tasks produced by ProjectManagerAgent.create_task_breakdown name the tasks
+they depend on in a "dependencies" list. A TaskGraph orders them
+topologically, rejects cycles, and runs ready tasks in parallel up to a
+concurrency limit, starting the tasks on the critical path first so that a
+breakdown finishes in critical-path time rather than sum-of-tasks time.
+"""
+import heapq
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Dict, Any, List, Optional, Callable, Iterable
+
+# Relative duration of a task by its "estimated_effort"
+EFFORT_WEIGHTS = {"low": 1, "medium": 2, "high": 3}
+
+# Maximum number of tasks a TaskGraph runs at once
+DEFAULT_MAX_PARALLEL_TASKS = 4
+
+
+class CycleError(ValueError):
+    """Raised when task dependencies form a cycle."""
+
+    def __init__(self, cycle: List[str]):
+        self.cycle = cycle
+        super().__init__(f"Task dependencies form a cycle: {' -> '.join(cycle)}")
+
+
+def link_task_ids(tasks: List[Dict[str, Any]], task_ids: List[str]) -> None:
+    """
+    Give tasks their stored IDs and point their dependencies at those IDs.
+
+    Task breakdowns refer to each other by provisional IDs such as "default-1",
+    which are replaced once the tasks are created in the database.
+
+    Args:
+        tasks: Tasks from a task breakdown, updated in place
+        task_ids: Database ID of each task, in the same order
+    """
+    id_map = {task.get("id"): task_id for task, task_id in zip(tasks, task_ids)}
+    for task, task_id in zip(tasks, task_ids):
+        task["id"] = task_id
+        task["dependencies"] = [id_map.get(dep, dep) for dep in task.get("dependencies") or []]
+
+
+class TaskGraph:
+    """
+    Directed acyclic graph of tasks linked by their "dependencies".
+
+    Dependencies on tasks outside the graph are ignored, so a graph can be
+    built from any subset of a project's tasks.
+    """
+
+    def __init__(self, tasks: Iterable[Dict[str, Any]]):
+        """
+        Build the graph and check it for cycles.
+
+        Args:
+            tasks: Task dictionaries with "id" and optional "dependencies" and
+                "estimated_effort"
+        """
+        self.tasks: Dict[str, Dict[str, Any]] = {task["id"]: task for task in tasks}
+        self.dependencies: Dict[str, List[str]] = {}
+        self.dependents: Dict[str, List[str]] = {task_id: [] for task_id in self.tasks}
+        for task_id, task in self.tasks.items():
+            deps = [dep for dep in dict.fromkeys(task.get("dependencies") or []) if dep in self.tasks]
+            self.dependencies[task_id] = deps
+            for dep in deps:
+                self.dependents[dep].append(task_id)
+
+        self._position = {task_id: n for n, task_id in enumerate(self.tasks)}
+        self.order = self._topological_order()
+
+        # Longest weighted path from each task to the end of the graph, itself included
+        self._remaining_path: Dict[str, int] = {}
+        for task_id in reversed(self.order):
+            self._remaining_path[task_id] = self.weight(task_id) + max(
+                (self._remaining_path[dep] for dep in self.dependents[task_id]), default=0)
+
+    def weight(self, task_id: str) -> int:
+        """Get the relative duration of a task from its estimated effort."""
+        effort = self.tasks[task_id].get("estimated_effort")
+        return EFFORT_WEIGHTS.get(effort, EFFORT_WEIGHTS["medium"])
+
+    def _topological_order(self) -> List[str]:
+        """Order tasks so that each comes after its dependencies, keeping input order otherwise."""
+        pending = {task_id: len(deps) for task_id, deps in self.dependencies.items()}
+        ready = [self._position[task_id] for task_id, count in pending.items() if count == 0]
+        heapq.heapify(ready)
+        task_ids = list(self.tasks)
+
+        order = []
+        while ready:
+            task_id = task_ids[heapq.heappop(ready)]
+            order.append(task_id)
+            for dependent in self.dependents[task_id]:
+                pending[dependent] -= 1
+                if pending[dependent] == 0:
+                    heapq.heappush(ready, self._position[dependent])
+
+        if len(order) < len(self.tasks):
+            raise CycleError(self._find_cycle({task_id for task_id, count in pending.items() if count}))
+        return order
+
+    def _find_cycle(self, blocked: set) -> List[str]:
+        """Find one cycle among tasks that never became ready."""
+        # Every blocked task has a blocked dependency, so walking them must repeat a task
+        path = []
+        seen = {}
+        task_id = min(blocked, key=self._position.get)
+        while task_id not in seen:
+            seen[task_id] = len(path)
+            path.append(task_id)
+            task_id = next(dep for dep in self.dependencies[task_id] if dep in blocked)
+        return path[seen[task_id]:] + [task_id]
+
+    def critical_path(self) -> List[str]:
+        """
+        Get the chain of dependent tasks with the largest total effort.
+
+        Returns:
+            Task IDs along the critical path, in execution order
+        """
+        path = []
+        candidates = [task_id for task_id in self.order if not self.dependencies[task_id]]
+        while candidates:
+            task_id = max(candidates, key=lambda t: (self._remaining_path[t], -self._position[t]))
+            path.append(task_id)
+            candidates = self.dependents[task_id]
+        return path
+
+    def ready_tasks(self, completed: Iterable[str] = ()) -> List[str]:
+        """
+        Get tasks whose dependencies are all completed, critical tasks first.
+
+        Args:
+            completed: IDs of completed tasks
+
+        Returns:
+            IDs of tasks that can start now
+        """
+        completed = set(completed)
+        ready = [task_id for task_id in self.order if task_id not in completed
+                 and all(dep in completed for dep in self.dependencies[task_id])]
+        return sorted(ready, key=self._priority)
+
+    def _priority(self, task_id: str):
+        # Longest remaining path first, then breakdown order
+        return (-self._remaining_path[task_id], self._position[task_id])
+
+    def progress(self, completed: Iterable[str] = ()) -> Dict[str, Any]:
+        """
+        Measure progress against the critical path.
+
+        Args:
+            completed: IDs of completed tasks
+
+        Returns:
+            Dictionary with task counts, the critical path, the effort left on
+            the longest chain of unfinished tasks and the fraction of the
+            critical path's effort already done
+        """
+        completed = set(completed) & set(self.tasks)
+        critical_path = self.critical_path()
+        critical_effort = sum(self.weight(task_id) for task_id in critical_path)
+
+        # Longest chain of unfinished tasks, with completed tasks taking no time
+        remaining: Dict[str, int] = {}
+        for task_id in reversed(self.order):
+            own = 0 if task_id in completed else self.weight(task_id)
+            remaining[task_id] = own + max((remaining[dep] for dep in self.dependents[task_id]), default=0)
+        remaining_effort = max(remaining.values(), default=0)
+
+        return {
+            "total": len(self.tasks),
+            "completed": len(completed),
+            "critical_path": critical_path,
+            "critical_path_completed": sum(1 for task_id in critical_path if task_id in completed),
+            "remaining_critical_effort": remaining_effort,
+            "critical_path_progress": 1 - remaining_effort / critical_effort if critical_effort else 1.0,
+        }
+
+    def run(self, execute: Callable[[str], bool],
+            max_workers: int = DEFAULT_MAX_PARALLEL_TASKS,
+            completed: Iterable[str] = (),
+            on_complete: Optional[Callable[[str, str], None]] = None) -> Dict[str, str]:
+        """
+        Run every task once its dependencies have completed.
+
+        Up to max_workers tasks run at a time. A task fails if execute returns
+        False or raises; tasks that depend on it, directly or not, are blocked
+        and never run.
+
+        Args:
+            execute: Function called with a task ID that runs the task
+            max_workers: Maximum number of tasks running at once
+            completed: IDs of tasks that are already done and are not run again
+            on_complete: Optional function called with a task ID and its status
+                ("completed" or "failed") as each task finishes
+
+        Returns:
+            Dictionary mapping task IDs to "completed", "failed" or "blocked"
+        """
+        statuses = {task_id: "completed" for task_id in completed if task_id in self.tasks}
+        pending = {task_id: sum(1 for dep in deps if dep not in statuses)
+                   for task_id, deps in self.dependencies.items() if task_id not in statuses}
+        ready = [self._priority(task_id) + (task_id,) for task_id, count in pending.items() if count == 0]
+        heapq.heapify(ready)
+
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="task") as pool:
+            running = {}
+            while ready or running:
+                while ready and len(running) < max_workers:
+                    task_id = heapq.heappop(ready)[-1]
+                    running[pool.submit(execute, task_id)] = task_id
+
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    task_id = running.pop(future)
+                    try:
+                        succeeded = future.result() is not False
+                    except Exception as e:
+                        print(f"Error running task {task_id}: {str(e)}")
+                        succeeded = False
+
+                    statuses[task_id] = "completed" if succeeded else "failed"
+                    if on_complete:
+                        on_complete(task_id, statuses[task_id])
+                    if not succeeded:
+                        continue
+                    for dependent in self.dependents[task_id]:
+                        # Tasks can be completed out of order, before their dependencies
+                        if dependent not in pending:
+                            continue
+                        pending[dependent] -= 1
+                        if pending[dependent] == 0:
+                            heapq.heappush(ready, self._priority(dependent) + (dependent,))
+
+        # Whatever never became ready depends on a failed task
+        for task_id in self.order:
+            statuses.setdefault(task_id, "blocked")
+        return statuses
@@ -16,7 +16,11 @@ if "project_id" not in st.session_state:
     st.session_state.project_id = None
 
 # Now import the functions from app
-from app import run_task, log_agent_activity
+from app import log_agent_activity
+from app_modules.task_execution import run_tasks
+
+# Upper bound on orchestration steps, in case agents keep messaging each other
+MAX_ORCHESTRATION_STEPS = 50
 
 def main():
     parser = argparse.ArgumentParser(description='Create and process a project using the multi-agent system')
@@ -50,7 +54,9 @@ def main():
     
     # Run the orchestration
     print("Running initial orchestration...")
-    state = orchestrator.run(steps=3)
+    state = orchestrator.run_until_quiescent(max_steps=MAX_ORCHESTRATION_STEPS)
+    if state["status"] == "running":
+        print(f"Orchestration stopped after {MAX_ORCHESTRATION_STEPS} steps with messages still pending")
     
     # Get tasks
     tasks = orchestrator.db_connector.get_tasks_by_project(project_id)
@@ -65,13 +71,10 @@ def main():
     # Run tasks if requested
     if args.run_tasks and tasks:
         print("\nRunning tasks...")
+        statuses = run_tasks() or {}
         for task in tasks:
-            print(f"Running task: {task['title']}")
-            result = run_task(task['id'])
-            if result:
-                print(f" - Completed successfully")
-            else:
-                print(f" - Failed")
+            status = statuses.get(task['id'], "not run")
+            print(f" - {task['title']}: {status}")
     
     print("\nProject creation complete!")
     print(f"Project directory: {os.path.join(os.path.dirname(os.path.abspath(__file__)), 'projects')}")
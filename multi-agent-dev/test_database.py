@@ -0,0 +1,479 @@
+#!/usr/bin/env python3
+"""
+Tests for the DuckDB database connector.
+"""
+import os
+import sys
+import json
+import shutil
+import datetime
+import tempfile
+import threading
+import time
+import unittest
+
+# Add the project root to the path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from core import database, checkpoints
+from core.database import DatabaseConnector
+
+class TestDatabaseConnector(unittest.TestCase):
+    """Test case for DatabaseConnector persistence."""
+
+    def setUp(self):
+        """Set up a fresh database in a temporary directory."""
+        self.test_dir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.test_dir, "test.duckdb")
+        self.db = DatabaseConnector(db_path=self.db_path, output_batch_size=3,
+                                    output_flush_interval=60)
+        self.project_id = self.db.create_project("Test Project", "A test project")
+        self.task_id = self.db.create_task(self.project_id, "Test Task", "A test task", "developer")
+
+    def tearDown(self):
+        """Clean up after tests."""
+        self.db.close()
+        shutil.rmtree(self.test_dir)
+
+    def _count_stored_outputs(self) -> int:
+        return self.db.conn.execute("SELECT COUNT(*) FROM agent_outputs").fetchone()[0]
+
+    def test_agent_outputs_are_buffered_until_batch_size(self):
+        """Test that agent outputs are written in batches."""
+        self.db.store_agent_output(self.task_id, "developer_1", "code", {"n": 1})
+        self.db.store_agent_output(self.task_id, "developer_1", "code", {"n": 2})
+        self.assertEqual(self._count_stored_outputs(), 0)
+
+        self.db.store_agent_output(self.task_id, "developer_1", "code", {"n": 3})
+        self.assertEqual(self._count_stored_outputs(), 3)
+
+    def test_buffered_outputs_are_flushed_after_interval(self):
+        """Test that outputs are written once the flush interval passes, without further writes."""
+        self.db.output_flush_interval = 0.05
+        self.db.store_agent_output(self.task_id, "developer_1", "code", {"n": 1})
+        deadline = time.monotonic() + 5
+        while self._count_stored_outputs() == 0 and time.monotonic() < deadline:
+            time.sleep(0.02)
+        self.assertEqual(self._count_stored_outputs(), 1)
+
+    def test_get_agent_outputs_sees_buffered_outputs(self):
+        """Test that reads flush pending outputs first."""
+        output_id = self.db.store_agent_output(self.task_id, "developer_1", "code", {"n": 1})
+
+        outputs = self.db.get_agent_outputs(self.task_id)
+        self.assertEqual(len(outputs), 1)
+        self.assertEqual(outputs[0]["id"], output_id)
+        self.assertEqual(outputs[0]["content"], {"n": 1})
+
+    def test_string_outputs_round_trip(self):
+        """Test that string content comes back as the same string, and pre-encoded JSON as its value."""
+        for content in ("42", "null", "[1]", "plain text"):
+            self.db.store_agent_output(self.task_id, "developer_1", "code", content)
+        self.db.store_agent_output(self.task_id, "developer_1", "message", content_json='{"n": 1}')
+        contents = [output["content"] for output in self.db.get_agent_outputs(self.task_id)]
+        self.assertCountEqual(contents, ["42", "null", "[1]", "plain text", {"n": 1}])
+
+    def test_bad_row_does_not_drop_batch(self):
+        """Test that a failing row falls back to row-by-row inserts."""
+        self.db.store_agent_output(self.task_id, "developer_1", "code", "ok")
+        self.db.store_agent_output("missing-task", "developer_1", "code", "orphan")
+        self.assertEqual(self.db.flush(), 1)
+        self.assertEqual(self._count_stored_outputs(), 1)
+
+    def test_close_flushes_outputs(self):
+        """Test that closing the connector writes pending outputs."""
+        self.db.store_agent_output(self.task_id, "developer_1", "code", "pending")
+        self.db.close()
+
+        reopened = DatabaseConnector(db_path=self.db_path)
+        try:
+            self.assertEqual(len(reopened.get_agent_outputs(self.task_id)), 1)
+        finally:
+            reopened.close()
+
+    def test_create_tasks_bulk(self):
+        """Test that bulk task creation keeps order and invalidates the summary."""
+        self.db.get_project_summary(self.project_id)
+        task_ids = self.db.create_tasks_bulk(self.project_id, [
+            {"title": "First", "assigned_agent": "developer"},
+            {"title": "Second", "description": "UI", "assigned_agent": "ui_developer"},
+        ])
+        self.assertEqual(self.db.get_task(task_ids[1])["assigned_agent"], "ui_developer")
+        self.assertEqual(self.db.get_project_summary(self.project_id)["tasks"]["total"], 3)
+        tasks = sorted(self.db.get_tasks_by_project(self.project_id), key=lambda t: t["created_at"])
+        self.assertEqual([t["id"] for t in tasks[1:]], task_ids)
+        self.assertEqual(self.db.create_tasks_bulk(self.project_id, []), [])
+
+    def test_task_dependencies_are_stored(self):
+        """Test that provisional dependency IDs are stored as the created task IDs."""
+        task_ids = self.db.create_tasks_bulk(self.project_id, [
+            {"title": "Build", "id": "default-1"},
+            {"title": "Test", "id": "default-2", "dependencies": ["default-1", self.task_id]},
+        ])
+        dependencies = {task["id"]: task["dependencies"] for task in self.db.get_tasks_by_project(self.project_id)}
+        self.assertEqual(dependencies, {self.task_id: [], task_ids[0]: [],
+                                        task_ids[1]: [task_ids[0], self.task_id]})
+
+    def test_transaction_commits_together(self):
+        """Test that a transaction block commits or rolls back all of its writes."""
+        with self.db.transaction():
+            self.assertTrue(self.db.update_task(self.task_id, {"status": "completed"}))
+            self.db.store_agent_output(self.task_id, "developer_1", "code", {"n": 1})
+            with self.db.transaction():
+                checkpoint_id = self.db.store_checkpoint({"next": "testing"})
+        self.assertEqual(self.db.get_task(self.task_id)["status"], "completed")
+        self.assertEqual(len(self.db.get_agent_outputs(self.task_id)), 1)
+
+        with self.assertRaises(RuntimeError):
+            with self.db.transaction():
+                self.db.update_task(self.task_id, {"status": "blocked"})
+                self.db.store_agent_output(self.task_id, "developer_1", "code", {"n": 2})
+                rolled_back_id = self.db.store_checkpoint({"next": "developer"}, parent_id=checkpoint_id)
+                raise RuntimeError("step failed")
+        self.assertEqual(self.db.get_task(self.task_id)["status"], "completed")
+        self.assertEqual(len(self.db.get_agent_outputs(self.task_id)), 1)
+        self.assertIsNone(self.db.get_checkpoint(rolled_back_id))
+        self.assertEqual(self.db.get_project_summary(self.project_id)["tasks"], {"total": 1, "completed": 1})
+
+    def test_failed_statement_aborts_transaction(self):
+        """Test that a failed statement inside a transaction raises on exit, even if caught."""
+        checkpoint_id = self.db.store_checkpoint({"next": "testing"})
+        # Buffered outside the transaction, so its rollback must not lose it
+        self.db.store_agent_output(self.task_id, "other_1", "code", {"n": 0})
+
+        with self.assertRaises(database.duckdb.Error):
+            with self.db.transaction():
+                self.db.update_task(self.task_id, {"status": "completed"})
+                self.db.store_agent_output("missing-task", "developer_1", "code", {"n": 1})
+        self.assertEqual(self.db.get_task(self.task_id)["status"], "created")
+
+        with self.assertRaises(database.duckdb.TransactionException):
+            with self.db.transaction():
+                self.db.update_task(self.task_id, {"status": "completed"})
+                rolled_back_id = self.db.store_checkpoint({"next": "developer"}, parent_id=checkpoint_id)
+                try:
+                    self.db.conn.execute("INSERT INTO tasks (id, project_id, title) VALUES (?, ?, ?)",
+                                         (self.task_id, self.project_id, "Duplicate"))
+                except database.duckdb.Error:
+                    pass
+        self.assertEqual(self.db.get_task(self.task_id)["status"], "created")
+        self.assertNotIn(rolled_back_id, self.db._checkpoint_cache)
+        self.assertIsNone(self.db.get_checkpoint(rolled_back_id))
+        self.assertEqual([output["agent_id"] for output in self.db.get_agent_outputs(self.task_id)], ["other_1"])
+
+    def test_after_commit_callbacks(self):
+        """Test that callbacks run only after a commit, and rollback callbacks only after a rollback."""
+        events = []
+        self.db.after_commit(lambda: events.append("now"))
+        with self.db.transaction():
+            self.db.after_commit(lambda: events.append("committed"), lambda: events.append("unused"))
+            self.assertEqual(events, ["now"])
+        with self.assertRaises(RuntimeError):
+            with self.db.transaction():
+                self.db.after_commit(lambda: events.append("lost"), lambda: events.append("rolled back"))
+                raise RuntimeError("fail")
+        self.assertEqual(events, ["now", "committed", "rolled back"])
+
+    def test_updates_report_missing_rows(self):
+        """Test that updates return False for unknown IDs without a pre-read."""
+        self.assertFalse(self.db.update_task("missing", {"status": "completed"}))
+        self.assertFalse(self.db.update_project("missing", {"status": "completed"}))
+        self.assertFalse(self.db.update_error_status("missing", "resolved"))
+        self.assertTrue(self.db.update_project(self.project_id, {"status": "in_progress"}))
+        self.assertEqual(self.db.get_project(self.project_id)["status"], "in_progress")
+        self.assertTrue(self.db.update_task(self.task_id, {}))
+
+    def test_project_summary(self):
+        """Test that project summaries are counted in one query and invalidated by writes."""
+        other_task_id = self.db.create_task(self.project_id, "Other Task")
+        self.db.update_task(other_task_id, {"status": "completed"})
+        error_id = self.db.store_error(self.task_id, "developer_1", "TestFailure", "failed")
+        self.db.store_error(other_task_id, "developer_1", "TestFailure", "failed")
+
+        summary = self.db.get_project_summary(self.project_id)
+        self.assertEqual(summary, {"tasks": {"total": 2, "created": 1, "completed": 1},
+                                   "errors": {"total": 2, "open": 2}})
+        self.assertIn(self.project_id, self.db._project_summaries)
+
+        self.db.update_error_status(error_id, "resolved", "fixed")
+        self.assertEqual(self.db.get_project_summary(self.project_id)["errors"],
+                         {"total": 2, "open": 1, "resolved": 1})
+        self.db.create_task(self.project_id, "Third Task")
+        self.assertEqual(self.db.get_project_summary(self.project_id)["tasks"]["total"], 3)
+        self.assertEqual(self.db.get_project_summary("missing"),
+                         {"tasks": {"total": 0}, "errors": {"total": 0}})
+
+    def test_project_summary_is_invalidated_on_commit(self):
+        """Test that summaries cached while another thread's transaction is open do not outlive its commit."""
+        created, committed = threading.Event(), threading.Event()
+
+        def create_in_transaction():
+            with self.db.transaction():
+                self.db.create_task(self.project_id, "Other Task")
+                self.assertEqual(self.db.get_project_summary(self.project_id)["tasks"]["total"], 2)
+                created.set()
+                committed.wait(5)
+
+        thread = threading.Thread(target=create_in_transaction)
+        thread.start()
+        self.assertTrue(created.wait(5))
+        self.assertEqual(self.db.get_project_summary(self.project_id)["tasks"]["total"], 1)
+        committed.set()
+        thread.join()
+        self.assertEqual(self.db.get_project_summary(self.project_id)["tasks"]["total"], 2)
+
+    def test_getters_return_frames(self):
+        """Test the DataFrame and Arrow result modes of list getters."""
+        self.db.store_error(self.task_id, "developer_1", "TestFailure", "failed")
+        self.db.store_agent_output(self.task_id, "developer_1", "code", {"n": 1})
+
+        tasks = self.db.get_tasks_by_project(self.project_id, as_frame=True)
+        self.assertEqual(tasks["id"].tolist(), [self.task_id])
+        self.assertEqual(list(tasks.columns), list(self.db.get_tasks_by_project(self.project_id)[0]))
+        self.assertEqual(self.db.get_all_errors("open", as_frame=True)["error_type"].tolist(), ["TestFailure"])
+        self.assertEqual(len(self.db.get_errors_by_task(self.task_id, as_frame=True)), 1)
+        self.assertEqual(self.db.get_all_projects(as_frame=True)["name"].tolist(), ["Test Project"])
+
+        outputs = self.db.get_agent_outputs(self.task_id, as_frame="arrow")
+        self.assertEqual(outputs.num_rows, 1)
+        self.assertEqual([json.loads(c) for c in outputs.column("content").to_pylist()], [{"n": 1}])
+
+        installed, database.pyarrow = database.pyarrow, None
+        try:
+            with self.assertRaisesRegex(ImportError, "pyarrow"):
+                self.db.get_agent_outputs(self.task_id, as_frame="arrow")
+        finally:
+            database.pyarrow = installed
+
+    def test_schema_version_is_recorded(self):
+        """Test that a new database is migrated to the current schema version."""
+        versions = self.db.conn.execute("SELECT version FROM schema_version ORDER BY version").fetchall()
+        self.assertEqual([v[0] for v in versions],
+                         [version for version, _ in database.SCHEMA_MIGRATIONS])
+
+    def test_migrations_upgrade_older_databases(self):
+        """Test that only migrations newer than the recorded version run."""
+        migration = (database.SCHEMA_VERSION + 1,
+                     ["CREATE TABLE IF NOT EXISTS migration_test (id INTEGER)"])
+        database.SCHEMA_MIGRATIONS.append(migration)
+        database.SCHEMA_VERSION = migration[0]
+        try:
+            upgraded = DatabaseConnector(db_path=self.db_path)
+            upgraded.conn.execute("SELECT COUNT(*) FROM migration_test").fetchone()
+            self.assertEqual(upgraded.conn.execute(
+                "SELECT MAX(version) FROM schema_version").fetchone()[0], migration[0])
+            upgraded.close()
+        finally:
+            database.SCHEMA_MIGRATIONS.remove(migration)
+            database.SCHEMA_VERSION = migration[0] - 1
+
+    def test_recreated_database_gets_schema(self):
+        """Test that a database file deleted and recreated in this process is set up again."""
+        self.db.close()
+        os.remove(self.db_path)
+        self.db = DatabaseConnector(db_path=self.db_path)
+        self.assertTrue(self.db.create_project("Recreated"))
+
+    def test_recluster_agent_outputs(self):
+        """Test that reclustering keeps every output and its index."""
+        other_task_id = self.db.create_task(self.project_id, "Other Task")
+        for n in range(4):
+            self.db.store_agent_output(other_task_id if n % 2 else self.task_id,
+                                       "developer_1", "code", {"n": n})
+
+        self.assertEqual(self.db.recluster_agent_outputs(), 4)
+        task_ids = [row[0] for row in self.db.conn.execute("SELECT task_id FROM agent_outputs").fetchall()]
+        self.assertEqual(task_ids, sorted(task_ids))
+        self.assertEqual(len(self.db.get_agent_outputs(self.task_id, "developer_1")), 2)
+        indexes = self.db.conn.execute(
+            "SELECT index_name FROM duckdb_indexes() WHERE table_name = 'agent_outputs'").fetchall()
+        self.assertIn(("idx_agent_outputs_task_agent",), indexes)
+
+        # The rebuilt table still rejects outputs for unknown tasks
+        with self.assertRaises(database.duckdb.ConstraintException):
+            self.db.conn.execute("INSERT INTO agent_outputs (id, task_id) VALUES ('orphan', 'missing')")
+
+    def test_delta_checkpoints_round_trip(self):
+        """Test that delta checkpoints store changes only and reconstruct fully."""
+        state = {"tasks": [{"id": "t1"}], "implementations": [], "next": "project_manager"}
+        parent_id = self.db.store_checkpoint(state)
+
+        checkpoint_ids = []
+        for step in range(database.FULL_CHECKPOINT_INTERVAL + 2):
+            state["implementations"] = state["implementations"] + [{"step": step}]
+            state["next"] = "developer" if step % 2 else "testing"
+            parent_id = self.db.store_checkpoint(state, parent_id=parent_id)
+            checkpoint_ids.append(parent_id)
+        state.pop("tasks")
+        parent_id = self.db.store_checkpoint(state, parent_id=parent_id)
+
+        rows = dict(self.db.conn.execute(
+            "SELECT id, chain_depth FROM system_checkpoints").fetchall())
+        self.assertEqual(rows[checkpoint_ids[0]], 1)
+        self.assertIn(0, [rows[c] for c in checkpoint_ids[1:]])
+        blob, codec = self.db.conn.execute(
+            "SELECT checkpoint_blob, codec FROM system_checkpoints WHERE id = ?",
+            (checkpoint_ids[0],)).fetchone()
+        self.assertEqual(sorted(checkpoints.decode_frame(codec, blob)[0]), ["implementations", "next"])
+
+        self.assertEqual(self.db.get_checkpoint(parent_id)["checkpoint_data"], state)
+        self.assertEqual(self.db.get_latest_checkpoint()["id"], parent_id)
+        middle = self.db.get_checkpoint(checkpoint_ids[4])["checkpoint_data"]
+        self.assertEqual(len(middle["implementations"]), 5)
+        self.assertEqual(middle["tasks"], [{"id": "t1"}])
+
+    def test_checkpoint_codecs(self):
+        """Test every registered codec and that values are decoded lazily."""
+        created_at = datetime.datetime(2024, 1, 2, 3, 4, 5)
+        state = {"tasks": [{"id": "t1", "created_at": created_at}], "next": "developer"}
+        specs = [name for name in checkpoints.CHECKPOINT_CODECS]
+        specs += [f"json+{name}" for name in checkpoints.CHECKPOINT_COMPRESSORS]
+
+        for spec in specs:
+            db = DatabaseConnector(db_path=self.db_path, checkpoint_codec=spec)
+            checkpoint_id = db.store_checkpoint(state)
+            loaded = db.get_checkpoint(checkpoint_id)["checkpoint_data"]
+
+            self.assertEqual(loaded["next"], "developer", spec)
+            self.assertIsNotNone(loaded.encoded("tasks", db._checkpoint_codec), spec)
+            self.assertEqual(loaded["tasks"][0]["created_at"], created_at, spec)
+            self.assertEqual(loaded, state, spec)
+
+            # Other values decode as they do with the JSON codec
+            extras = {"tags": {"a"}, "blob": b"\x00\xff", "nested": [{"blob": b"\x01"}]}
+            extras_id = db.store_checkpoint(extras)
+            self.assertEqual(dict(db.get_checkpoint(extras_id)["checkpoint_data"]),
+                             {"tags": ["a"], "blob": "AP8=", "nested": [{"blob": "AQ=="}]}, spec)
+
+            # Storing a loaded state again reuses values that were never decoded
+            loaded = db.get_checkpoint(checkpoint_id)["checkpoint_data"]
+            loaded["next"] = "testing"
+            child_id = db.store_checkpoint(loaded, parent_id=checkpoint_id)
+            self.assertEqual(dict(db.get_checkpoint(child_id)["checkpoint_data"]),
+                             dict(state, next="testing"), spec)
+            db.close()
+
+        with self.assertRaises(ValueError):
+            DatabaseConnector(db_path=self.db_path, checkpoint_codec="json+unknown")
+
+    def test_checkpoint_with_unavailable_codec_raises(self):
+        """Test that a checkpoint written with a codec that is not installed raises a clear error."""
+        self.db.conn.execute("""
+            INSERT INTO system_checkpoints (id, timestamp, checkpoint_blob, codec, chain_depth)
+            VALUES ('foreign', now(), '\\x00'::BLOB, 'msgpack+unknown', 0)
+        """)
+        with self.assertRaises(checkpoints.UnknownCodecError) as context:
+            self.db.get_checkpoint("foreign")
+        self.assertIn("unknown", str(context.exception))
+
+    def test_json_text_checkpoints_are_still_readable(self):
+        """Test that checkpoints stored as JSON text before the blob column load."""
+        self.db.conn.execute("""
+            INSERT INTO system_checkpoints (id, timestamp, checkpoint_data, parent_id, chain_depth)
+            VALUES ('full', now(), '{"next": "developer", "tasks": []}', NULL, 0),
+                   ('delta', now(), '{"changed": {"next": "testing"}, "removed": ["tasks"]}', 'full', 1)
+        """)
+        self.assertEqual(self.db.get_checkpoint("full")["checkpoint_data"],
+                         {"next": "developer", "tasks": []})
+        self.assertEqual(self.db.get_checkpoint("delta")["checkpoint_data"], {"next": "testing"})
+
+    def test_checkpoint_cache(self):
+        """Test that recent checkpoints are read from memory and evicted by size."""
+        checkpoint_id = self.db.store_checkpoint({"next": "developer", "code": "x" * 100})
+        self.db.conn.execute("DELETE FROM system_checkpoints")
+        self.assertEqual(self.db.get_checkpoint(checkpoint_id)["checkpoint_data"]["next"], "developer")
+
+        self.db.checkpoint_cache_bytes = 300
+        checkpoint_ids = [self.db.store_checkpoint({"code": str(n) * 100}) for n in range(4)]
+        self.assertEqual(list(self.db._checkpoint_cache), checkpoint_ids[-2:])
+        self.assertLessEqual(self.db._checkpoint_cache_size, 300)
+
+        # Checkpoints loaded from the database are cached again
+        self.db._checkpoint_cache.clear()
+        self.db._checkpoint_cache_size = 0
+        self.assertEqual(self.db.get_checkpoint(checkpoint_ids[0])["checkpoint_data"], {"code": "0" * 100})
+        self.assertIn(checkpoint_ids[0], self.db._checkpoint_cache)
+
+    def test_checkpoint_compaction(self):
+        """Test per-project retention and rebasing of kept delta checkpoints."""
+        other_project_id = self.db.create_project("Other Project")
+        other_id = self.db.store_checkpoint({"step": 0}, project_id=other_project_id)
+
+        parent_id = None
+        checkpoint_ids = []
+        for step in range(6):
+            parent_id = self.db.store_checkpoint({"step": step, "tasks": ["t1"]},
+                                                 parent_id=parent_id, project_id=self.project_id)
+            checkpoint_ids.append(parent_id)
+
+        self.assertEqual(self.db.compact_checkpoints(keep_last=2, keep_hourly=0), 4)
+        remaining = {row[0] for row in self.db.conn.execute("SELECT id FROM system_checkpoints").fetchall()}
+        self.assertEqual(remaining, {other_id, checkpoint_ids[-2], checkpoint_ids[-1]})
+
+        # The oldest kept checkpoint lost its parent and is now a full snapshot
+        depth = self.db.conn.execute("SELECT chain_depth FROM system_checkpoints WHERE id = ?",
+                                     (checkpoint_ids[-2],)).fetchone()[0]
+        self.assertEqual(depth, 0)
+        self.assertEqual(self.db.get_checkpoint(checkpoint_ids[-1])["checkpoint_data"],
+                         {"step": 5, "tasks": ["t1"]})
+        self.assertEqual(self.db.get_latest_checkpoint(self.project_id)["id"], checkpoint_ids[-1])
+        self.assertEqual(self.db.get_latest_checkpoint(other_project_id)["id"], other_id)
+
+        # Hourly retention keeps the newest checkpoint of the current hour
+        self.assertEqual(self.db.compact_checkpoints(self.project_id, keep_last=0), 1)
+        self.assertEqual(self.db.get_latest_checkpoint(self.project_id)["id"], checkpoint_ids[-1])
+
+    def test_each_thread_gets_its_own_cursor(self):
+        """Test that threads use separate cursors on one database."""
+        cursors = {}
+
+        def create_task(name):
+            cursors[name] = self.db.conn
+            self.db.create_task(self.project_id, name)
+
+        threads = [threading.Thread(target=create_task, args=(f"Task {i}",)) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len({id(cursor) for cursor in cursors.values()}), 4)
+        self.assertIsNot(cursors["Task 0"], self.db.conn)
+        self.assertEqual(len(self.db.get_tasks_by_project(self.project_id)), 5)
+
+    def test_shared_connectors(self):
+        """Test the process-wide connector registry and read-only mode."""
+        shared_path = os.path.join(self.test_dir, "shared.duckdb")
+        writer = DatabaseConnector.shared(shared_path)
+        try:
+            self.assertIs(DatabaseConnector.shared(shared_path), writer)
+
+            reader = DatabaseConnector.shared(shared_path, read_only=True)
+            self.assertIs(DatabaseConnector.shared(shared_path, read_only=True), reader)
+
+            project_id = writer.create_project("Shared Project")
+            self.assertEqual(reader.get_project(project_id)["name"], "Shared Project")
+            # The reader sees outputs still buffered by the writer
+            task_id = writer.create_task(project_id, "Shared Task")
+            writer.store_agent_output(task_id, "developer_1", "code", {"n": 1})
+            self.assertEqual(len(reader.get_agent_outputs(task_id)), 1)
+            with self.assertRaises(PermissionError):
+                reader.create_project("Not Allowed")
+        finally:
+            writer.close()
+        self.assertIsNot(DatabaseConnector.shared(shared_path, read_only=True), reader)
+
+    def test_shared_reader_before_writer(self):
+        """Test that a shared writer can still be opened after a shared reader."""
+        shared_path = os.path.join(self.test_dir, "shared.duckdb")
+        reader = DatabaseConnector.shared(shared_path, read_only=True)
+        writer = DatabaseConnector.shared(shared_path)
+        try:
+            self.assertIs(reader._connection_owner, writer)
+            project_id = writer.create_project("Shared Project")
+            self.assertEqual(reader.get_project(project_id)["name"], "Shared Project")
+        finally:
+            writer.close()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,280 @@
+#!/usr/bin/env python3
+"""
+Tests for the inter-agent message bus.
+"""
+import os
+import sys
+import json
+import pickle
+import shutil
+import tempfile
+import threading
+import unittest
+from copy import deepcopy
+
+# Add the project root to the path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from core.database import DatabaseConnector
+from core.messaging import MessageBus, Message
+
+class TestMessageBus(unittest.TestCase):
+    """Test case for MessageBus delivery and bookkeeping."""
+
+    def setUp(self):
+        """Set up an in-memory message bus."""
+        self.bus = MessageBus()
+
+    def _send(self, receiver_id: str = "developer_1", **kwargs) -> str:
+        return self.bus.send_message(Message(
+            sender_id=kwargs.pop("sender_id", "project_manager_1"),
+            receiver_id=receiver_id,
+            content=kwargs.pop("content", {"title": "Task"}),
+            **kwargs
+        ))
+
+    def test_has_unread_messages(self):
+        """Test that checking for unread messages does not mark them read."""
+        self.assertFalse(self.bus.has_unread_messages("developer_1"))
+        self._send()
+        self.assertTrue(self.bus.has_unread_messages("developer_1"))
+        self.assertTrue(self.bus.has_unread_messages("developer_1"))
+        self.bus.get_unread_messages("developer_1")
+        self.assertFalse(self.bus.has_unread_messages("developer_1"))
+
+    def test_wait_for_messages(self):
+        """Test that subscribed receivers are reported once messages arrive."""
+        self._send(receiver_id="testing_1")
+        self.bus.subscribe("developer_1")
+        self.bus.subscribe("testing_1")
+        self.assertEqual(self.bus.wait_for_messages(timeout=0), ["testing_1"])
+        self.assertEqual(self.bus.wait_for_messages(timeout=0), [])
+
+        # A message sent from another thread wakes the waiter
+        threading.Timer(0.05, self._send).start()
+        self.assertEqual(self.bus.wait_for_messages(timeout=5), ["developer_1"])
+
+        # Receivers whose messages were already read, or who unsubscribed, are skipped
+        self._send()
+        self._send(receiver_id="testing_1")
+        self.bus.get_unread_messages("developer_1")
+        self.bus.unsubscribe("testing_1")
+        self.assertEqual(self.bus.wait_for_messages(timeout=0), [])
+
+    def test_unread_messages_are_returned_once(self):
+        """Test that read messages are not returned again."""
+        first = self._send()
+        self.assertEqual([m.id for m in self.bus.get_unread_messages("developer_1")], [first])
+        self.assertEqual(self.bus.get_unread_messages("developer_1"), [])
+
+        second = self._send()
+        self.assertEqual([m.id for m in self.bus.get_unread_messages("developer_1")], [second])
+
+    def test_peek_does_not_mark_read(self):
+        """Test that mark_read=False leaves messages unread."""
+        message_id = self._send()
+        self.assertEqual(len(self.bus.get_unread_messages("developer_1", mark_read=False)), 1)
+        self.assertEqual([m.id for m in self.bus.get_unread_messages("developer_1")], [message_id])
+
+    def test_mark_processed(self):
+        """Test that messages are found by ID and marked processed."""
+        message_id = self._send()
+        self.assertTrue(self.bus.mark_processed(message_id))
+        self.assertTrue(self.bus.message_history[0].processed)
+        self.assertFalse(self.bus.mark_processed("unknown"))
+
+    def test_clear_processed_messages_keeps_unread(self):
+        """Test that clearing processed messages keeps unread ones deliverable."""
+        processed_id = self._send()
+        self.bus.get_unread_messages("developer_1")
+        self.bus.mark_processed(processed_id)
+        pending_id = self._send()
+
+        self.bus.clear_processed_messages()
+        self.assertEqual([m.id for m in self.bus.get_messages("developer_1", mark_read=False)],
+                         [pending_id])
+        self.assertEqual([m.id for m in self.bus.get_unread_messages("developer_1")], [pending_id])
+
+    def test_requeue_messages(self):
+        """Test that requeued messages are delivered again, even after being cleared."""
+        first_id, second_id = self._send(), self._send()
+        messages = self.bus.get_unread_messages("developer_1")
+        for message in messages:
+            self.bus.mark_processed(message.id)
+        self.bus.clear_processed_messages()
+        self.assertFalse(self.bus.has_unread_messages("developer_1"))
+
+        self.bus.requeue_messages(messages)
+        self.assertEqual([m.id for m in self.bus.get_unread_messages("developer_1")], [first_id, second_id])
+        self.assertFalse(self.bus.message_history[0].processed)
+
+    def test_send_many(self):
+        """Test that batched sends are delivered in order."""
+        message_ids = self.bus.send_many([
+            Message("project_manager_1", "developer_1", {"n": n}, task_id="task-1") for n in range(3)
+        ])
+        self.assertEqual([m.id for m in self.bus.get_unread_messages("developer_1")], message_ids)
+        self.assertEqual([m.id for m in self.bus.get_message_history(task_id="task-1")], message_ids)
+
+    def test_message_history_filters(self):
+        """Test that history filters combine and keep send order."""
+        first = self._send(task_id="task-1", project_id="project-1")
+        self._send(task_id="task-2", project_id="project-1")
+        third = self._send(receiver_id="testing_1", task_id="task-1", project_id="project-1")
+        self._send(sender_id="developer_1", task_id="task-1", project_id="project-2")
+
+        self.assertEqual(len(self.bus.get_message_history()), 4)
+        self.assertEqual([m.id for m in self.bus.get_message_history(
+            task_id="task-1", project_id="project-1")], [first, third])
+        self.assertEqual([m.id for m in self.bus.get_message_history(
+            task_id="task-1", sender_id="project_manager_1", receiver_id="testing_1")], [third])
+        self.assertEqual(self.bus.get_message_history(task_id="task-3"), [])
+
+    def test_message_json_encoding(self):
+        """Test that the single-pass encoding matches to_dict and tracks flags."""
+        message = Message("developer_1", "testing_1", {"code": "print('hi')"},
+                          metadata={"attempt": 1})
+        self.assertEqual(json.loads(message.to_json()), message.to_dict())
+        self.assertEqual(message.to_dict()["content"], {"code": "print('hi')"})
+        self.assertEqual(message.to_dict()["metadata"], {"attempt": 1})
+
+        message.processed = True
+        self.assertTrue(message.to_dict()["processed"])
+
+    def test_message_record_is_compact(self):
+        """Test slot-based messages, timestamps and compact IDs."""
+        message = Message("developer_1", "testing_1", "content")
+        self.assertFalse(hasattr(message, "__dict__"))
+
+        copy = Message.from_dict(message.to_dict())
+        self.assertEqual(copy.id, message.id)
+        self.assertEqual(copy.timestamp, message.timestamp)
+        self.assertLessEqual(message.timestamp_ns, Message("a", "b", None).timestamp_ns)
+
+        Message.compact_ids = True
+        try:
+            first, second = Message("a", "b", None), Message("a", "b", None)
+        finally:
+            Message.compact_ids = False
+        self.assertNotEqual(first.id, second.id)
+        self.assertLess(len(first.id), len(message.id))
+
+    def test_message_can_be_copied_and_pickled(self):
+        """Test that messages without metadata still pickle, deep-copy and take new metadata."""
+        message = Message("developer_1", "testing_1", {"code": "print()"})
+        for copy in (pickle.loads(pickle.dumps(message)), deepcopy(message)):
+            self.assertEqual(copy.to_dict(), message.to_dict())
+        message.metadata["retry"] = 1
+        self.assertEqual(Message("a", "b", None).metadata, {})
+
+class TestMessageHistoryRetention(unittest.TestCase):
+    """Test case for bounded message history with database spill."""
+
+    def setUp(self):
+        """Set up a message bus with a small history limit."""
+        self.test_dir = tempfile.mkdtemp()
+        self.db = DatabaseConnector(db_path=os.path.join(self.test_dir, "test.duckdb"))
+        self.project_id = self.db.create_project("Test Project")
+        self.task_id = self.db.create_task(self.project_id, "Test Task")
+        self.bus = MessageBus(db_connector=self.db, history_limit=10)
+
+    def tearDown(self):
+        """Clean up after tests."""
+        self.db.close()
+        shutil.rmtree(self.test_dir)
+
+    def _send_many(self, count: int) -> list:
+        return [self.bus.send_message(Message(
+            sender_id="developer_1",
+            receiver_id="testing_1",
+            content={"n": n},
+            message_type="implementation",
+            task_id=self.task_id,
+            project_id=self.project_id
+        )) for n in range(count)]
+
+    def test_history_is_bounded(self):
+        """Test that old messages are evicted from memory."""
+        self._send_many(25)
+        self.assertLessEqual(len(self.bus.message_history), 11)
+        self.assertGreater(self.bus.archived_count, 0)
+        self.assertEqual(len(self.bus._history_index["task_id"][self.task_id]),
+                         len(self.bus.message_history))
+
+    def test_archived_messages_are_paged_back(self):
+        """Test that filtered history includes spilled messages in order."""
+        message_ids = self._send_many(25)
+
+        history = self.bus.get_message_history(task_id=self.task_id)
+        self.assertEqual([m.id for m in history], message_ids)
+        self.assertEqual(history[0].content, {"n": 0})
+
+        recent = self.bus.get_message_history(sender_id="developer_1", limit=12)
+        self.assertEqual([m.id for m in recent], message_ids[-12:])
+
+    def test_messages_are_persisted_as_json(self):
+        """Test that sent messages are stored as agent outputs."""
+        message_ids = self._send_many(2)
+        outputs = self.db.get_agent_outputs(self.task_id)
+        self.assertEqual(sorted(o["content"]["id"] for o in outputs), sorted(message_ids))
+        self.assertEqual(outputs[0]["output_type"], "message_implementation")
+
+    def test_system_task_is_cached_per_project(self):
+        """Test that messages without a task share one cached logging task."""
+        project_id = self.db.create_project("Empty Project")
+        for _ in range(3):
+            self.bus.send_message(Message("system", "project_manager_1", "requirements",
+                                          message_type="requirements", project_id=project_id))
+
+        tasks = self.db.get_tasks_by_project(project_id)
+        self.assertEqual([t["title"] for t in tasks], ["System Task"])
+        self.assertEqual(len(self.db.get_agent_outputs(tasks[0]["id"])), 3)
+
+        self.bus.invalidate_system_task(project_id)
+        self.assertEqual(self.bus._get_system_task_id(project_id), tasks[0]["id"])
+
+    def test_rolled_back_system_task_is_not_cached(self):
+        """Test that a System Task created in a rolled-back transaction is neither cached nor announced."""
+        project_id = self.db.create_project("Empty Project")
+        with self.assertRaises(RuntimeError):
+            with self.db.transaction():
+                self.bus.send_message(Message("system", "project_manager_1", "requirements",
+                                              message_type="requirements", project_id=project_id))
+                raise RuntimeError("fail")
+        self.assertNotIn(project_id, self.bus._system_task_ids)
+        self.assertFalse(self.bus.has_unread_messages("project_manager_1"))
+
+        self.bus.send_message(Message("system", "project_manager_1", "requirements",
+                                      message_type="requirements", project_id=project_id))
+        tasks = self.db.get_tasks_by_project(project_id)
+        self.assertEqual(self.bus._system_task_ids[project_id], tasks[0]["id"])
+        self.assertEqual(len(self.db.get_agent_outputs(tasks[0]["id"])), 1)
+
+    def test_unprocessed_messages_survive_eviction(self):
+        """Test that evicted but unprocessed messages are still delivered."""
+        message_ids = self._send_many(25)
+        unread = self.bus.get_unread_messages("testing_1")
+        self.assertEqual([m.id for m in unread], message_ids)
+        self.assertTrue(self.bus.mark_processed(message_ids[0]))
+
+    def test_evicted_messages_leave_index_once_processed(self):
+        """Test that messages evicted before being processed are dropped from the ID index later."""
+        message_ids = self._send_many(25)
+        for message in self.bus.get_unread_messages("testing_1"):
+            self.bus.mark_processed(message.id)
+        self.bus.clear_processed_messages()
+        in_memory = {message.id for message in self.bus.message_history}
+        self.assertEqual(set(self.bus._messages_by_id), in_memory)
+        self.assertEqual(self.bus._evicted_ids, set())
+        self.assertLess(len(in_memory), len(message_ids))
+
+    def test_unlimited_history_reads_a_bounded_archive_page(self):
+        """Test that history without a limit pages back at most archive_read_limit archived messages."""
+        self.bus.archive_read_limit = 5
+        message_ids = self._send_many(25)
+        history = self.bus.get_message_history()
+        in_memory = len(self.bus.message_history)
+        self.assertEqual([m.id for m in history], message_ids[-(in_memory + 5):])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,251 @@
+#!/usr/bin/env python3
+"""
+Tests for the simple orchestrator.
+"""
+import gc
+import os
+import sys
+import shutil
+import tempfile
+import threading
+import unittest
+import weakref
+
+# Add the project root to the path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from agents.registry import get_agent_instances
+from core.database import DatabaseConnector
+from core.messaging import Message
+from core.orchestration import Orchestrator
+from core.orchestration_simple import SimpleOrchestrator, merge_state_deltas
+
+REQUIREMENTS = """
+Create a pet diary app. The app should allow users to:
+1. Track pet activities like feeding and walking
+2. Set reminders for pet care tasks
+"""
+
+class TestSimpleOrchestrator(unittest.TestCase):
+    """Test case for SimpleOrchestrator scheduling."""
+
+    def setUp(self):
+        """Set up an orchestrator on a fresh database."""
+        self.test_dir = tempfile.mkdtemp()
+        self.db = DatabaseConnector(db_path=os.path.join(self.test_dir, "test.duckdb"))
+
+    def tearDown(self):
+        """Clean up after tests."""
+        self.db.close()
+        shutil.rmtree(self.test_dir)
+
+    def test_agents_are_shared_and_bound_once(self):
+        """Test that projects bind the shared agents without duplicating them."""
+        orchestrator = SimpleOrchestrator(db_connector=self.db)
+        other = SimpleOrchestrator(db_connector=self.db)
+        self.assertIs(orchestrator.agent_instances["developer"], other.agent_instances["developer"])
+        self.assertIs(orchestrator.agent_instances["developer"], get_agent_instances(self.db)["developer"])
+        self.assertIs(orchestrator.agent_instances["error_handling"].orchestrator, orchestrator)
+
+        orchestrator.initialize_project("First", "A project", REQUIREMENTS)
+        orchestrator.initialize_project("Second", "A project", REQUIREMENTS)
+        orchestrator.reset(orchestrator.system_state.project_id)
+        agent_types = [agent_state.agent_type for agent_state in orchestrator.system_state.agents.values()]
+        self.assertEqual(agent_types, list(orchestrator.agent_instances))
+        self.assertIs(orchestrator.system_state.get_agent_by_type("developer").agent_instance,
+                      orchestrator.agent_instances["developer"])
+
+    def test_registry_does_not_keep_connectors_alive(self):
+        """Test that a connector's shared agents do not outlive it."""
+        db = DatabaseConnector(db_path=os.path.join(self.test_dir, "other.duckdb"))
+        get_agent_instances(db)
+        db.close()
+        connector = weakref.ref(db)
+        del db
+        gc.collect()
+        self.assertIsNone(connector())
+
+    def test_merge_state_deltas(self):
+        """Test that deltas merge in the given order, concatenating lists."""
+        merged = merge_state_deltas([
+            {"tasks": [{"id": "t1"}], "next": "developer", "agent_processed": "project_manager"},
+            {"tasks": [], "implementations": [{"id": "i1"}], "next": "project_manager"},
+            {"tasks": [{"id": "t2"}], "agent_processed": "ui_ux"},
+        ])
+        self.assertEqual(merged, {"tasks": [{"id": "t1"}, {"id": "t2"}], "implementations": [{"id": "i1"}],
+                                  "next": "project_manager", "agent_processed": "ui_ux"})
+
+    def test_concurrent_step_processes_every_agent_with_messages(self):
+        """Test that a concurrent step handles every agent that has unread messages."""
+        orchestrator = SimpleOrchestrator(db_connector=self.db, concurrent=True, max_workers=4)
+        orchestrator.initialize_project("Pet Diary", "A pet care app", REQUIREMENTS)
+
+        # The first step only has requirements waiting for the project manager
+        orchestrator.run(steps=1)
+        waiting = orchestrator._agents_with_unread_messages()
+        self.assertTrue(waiting)
+        self.assertNotIn("project_manager", waiting)
+
+        # Add work for an agent the task breakdown may not use
+        documentation = orchestrator.system_state.get_agent_by_type("documentation")
+        orchestrator.message_bus.send_message(Message(
+            sender_id="system", receiver_id=documentation.agent_id, content={"title": "Docs"},
+            message_type="task", project_id=orchestrator.system_state.project_id))
+
+        state = orchestrator.run(steps=1)
+        self.assertEqual(orchestrator._agents_with_unread_messages(), [])
+        self.assertEqual(state["status"], "running")
+        checkpoint = self.db.get_latest_checkpoint(orchestrator.system_state.project_id)
+        self.assertEqual(checkpoint["id"], orchestrator.system_state.checkpoint_id)
+        # The merged delta takes scalar values from the last agent in creation order
+        self.assertEqual(checkpoint["checkpoint_data"]["agent_processed"], "documentation")
+
+    def test_failed_agent_transaction_requeues_messages(self):
+        """Test that an agent whose work is rolled back gets its messages again and sent nothing."""
+        orchestrator = SimpleOrchestrator(db_connector=self.db, concurrent=True)
+        project_id = orchestrator.initialize_project("Pet Diary", "A pet care app", REQUIREMENTS)
+        task_messages = lambda: [message for message in orchestrator.message_bus.message_history
+                                 if message.message_type == "task"]
+
+        process = orchestrator._process_agent_messages
+        failed = []
+
+        def fail_once(agent_type, claimed_messages=None):
+            result = process(agent_type, claimed_messages)
+            if agent_type == "project_manager" and not failed:
+                failed.append(agent_type)
+                raise RuntimeError("commit failed")
+            return result
+
+        orchestrator._process_agent_messages = fail_once
+        orchestrator.run(steps=1)
+        self.assertEqual(failed, ["project_manager"])
+        self.assertEqual(orchestrator._agents_with_unread_messages(), ["project_manager"])
+        # The rolled-back tasks were never announced
+        self.assertEqual(task_messages(), [])
+        self.assertEqual([task["title"] for task in self.db.get_tasks_by_project(project_id)], ["System Task"])
+
+        orchestrator.run(steps=1)
+        task_ids = {task["id"] for task in self.db.get_tasks_by_project(project_id)
+                    if task["assigned_agent"] != "system"}
+        self.assertTrue(task_ids)
+        self.assertEqual(sorted(message.task_id for message in task_messages()), sorted(task_ids))
+        orchestrator.run(steps=1)
+        self.assertEqual(orchestrator._agents_with_unread_messages(), [])
+        self.assertFalse([thread for thread in threading.enumerate() if thread.name.startswith("agent")])
+
+    def test_run_until_quiescent_stops_when_work_keeps_failing(self):
+        """Test that an event-driven run ends with an error when every step is rolled back."""
+        orchestrator = SimpleOrchestrator(db_connector=self.db, concurrent=True)
+        orchestrator.initialize_project("Pet Diary", "A pet care app", REQUIREMENTS)
+        attempts = []
+
+        def always_fail(agent_type, claimed_messages=None):
+            attempts.append(agent_type)
+            claimed_messages.extend(orchestrator.message_bus.get_messages(
+                orchestrator.system_state.get_agent_by_type(agent_type).agent_id))
+            raise RuntimeError("commit failed")
+
+        orchestrator._process_agent_messages = always_fail
+        state = orchestrator.run_until_quiescent()
+        self.assertEqual(state["status"], "error")
+        self.assertEqual(attempts, ["project_manager"])
+        # The messages stay queued for a later run
+        self.assertEqual(orchestrator._agents_with_unread_messages(), ["project_manager"])
+
+    def test_failed_step_leaves_state_unchanged(self):
+        """Test that a rolled-back sequential step requeues its messages and keeps the old checkpoint."""
+        orchestrator = SimpleOrchestrator(db_connector=self.db)
+        orchestrator.initialize_project("Pet Diary", "A pet care app", REQUIREMENTS)
+        checkpoint_id = orchestrator.system_state.checkpoint_id
+
+        save_checkpoint = orchestrator.save_checkpoint
+
+        def fail_once(state):
+            orchestrator.save_checkpoint = save_checkpoint
+            save_checkpoint(state)
+            raise RuntimeError("commit failed")
+
+        orchestrator.save_checkpoint = fail_once
+        state = orchestrator.run(steps=1)
+        self.assertEqual(state["status"], "error")
+        self.assertEqual(orchestrator.system_state.checkpoint_id, checkpoint_id)
+        self.assertEqual(orchestrator._agents_with_unread_messages(), ["project_manager"])
+        assigned = lambda: [task_id for agent in orchestrator.system_state.agents.values()
+                            for task_id in agent.task_history]
+        self.assertEqual(assigned(), [])
+
+        orchestrator.run(steps=1)
+        self.assertNotEqual(orchestrator.system_state.checkpoint_id, checkpoint_id)
+        self.assertEqual(orchestrator.load_checkpoint()["next"], "developer")
+        self.assertTrue(assigned())
+
+    def test_run_until_quiescent(self):
+        """Test that an event-driven run only steps while agents have messages."""
+        for concurrent in (False, True):
+            orchestrator = SimpleOrchestrator(db_connector=self.db, concurrent=concurrent)
+            project_id = orchestrator.initialize_project(f"Pet Diary {concurrent}", "A pet care app", REQUIREMENTS)
+            checkpoint_count = lambda: self.db.conn.execute(
+                "SELECT COUNT(*) FROM system_checkpoints WHERE project_id = ?", (project_id,)).fetchone()[0]
+            before = checkpoint_count()
+
+            state = orchestrator.run_until_quiescent()
+            self.assertEqual(state["status"], "idle")
+            self.assertEqual(orchestrator._agents_with_unread_messages(), [])
+            # One step for the project manager, then one for the agents it assigned tasks to
+            self.assertEqual(checkpoint_count() - before, 2)
+
+            # Nothing is waiting, so a second run ends without a step
+            orchestrator.run_until_quiescent()
+            self.assertEqual(checkpoint_count() - before, 2)
+
+class TestOrchestrator(unittest.TestCase):
+    """Test case for the LangGraph orchestrator."""
+
+    def setUp(self):
+        """Set up an orchestrator with a new project on a fresh database."""
+        self.test_dir = tempfile.mkdtemp()
+        self.db = DatabaseConnector(db_path=os.path.join(self.test_dir, "test.duckdb"))
+        self.orchestrator = Orchestrator(db_connector=self.db)
+        self.project_id = self.orchestrator.initialize_project("Pet Diary", "A pet care app", REQUIREMENTS)
+
+    def tearDown(self):
+        """Clean up after tests."""
+        self.db.close()
+        shutil.rmtree(self.test_dir)
+
+    def test_new_projects_reuse_agents_and_graph(self):
+        """Test that initializing another project rebinds agents and keeps the compiled graph."""
+        graph = self.orchestrator.graph
+        self.orchestrator.initialize_project("Other Project", "Another app", REQUIREMENTS)
+        self.assertIs(self.orchestrator.graph, graph)
+        self.assertEqual(len(self.orchestrator.system_state.agents), len(self.orchestrator.agent_types))
+        updates = list(self.orchestrator.stream(steps=1))
+        self.assertEqual(list(updates[0]), ["project_manager_agent"])
+
+    def test_graph_follows_next_in_parallel_branches(self):
+        """Test that the project manager's tasks fan out to their agents."""
+        updates = list(self.orchestrator.stream(steps=1))
+        self.assertEqual(list(updates[0]), ["project_manager_agent"])
+        receivers = updates[0]["project_manager_agent"]["next"]
+        # The message bus logs the requirements under a "System Task"
+        tasks = [task for task in self.db.get_tasks_by_project(self.project_id)
+                 if task["assigned_agent"] != "system"]
+        self.assertEqual(set(receivers), {task["assigned_agent"] for task in tasks})
+        self.assertEqual(self.orchestrator.system_state.status, "running")
+
+        # The next step runs every receiving agent; the run then continues until no branch routes on
+        checkpoint_id = self.orchestrator.system_state.checkpoint_id
+        updates = list(self.orchestrator.stream(steps=1))
+        self.assertEqual({node for update in updates for node in update},
+                         {f"{agent_type}_agent" for agent_type in receivers})
+        self.assertNotEqual(self.orchestrator.system_state.checkpoint_id, checkpoint_id)
+
+        state = self.orchestrator.run(steps=20)
+        self.assertEqual(state["status"], "idle")
+        checkpoint = self.db.get_latest_checkpoint(self.project_id)["checkpoint_data"]
+        self.assertEqual({task["id"] for task in checkpoint["tasks"]}, {task["id"] for task in tasks})
+        self.assertTrue(checkpoint["test_reports"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Tests for dependency-aware task scheduling.
+"""
+import os
+import sys
+import time
+import threading
+import unittest
+
+# Add the project root to the path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from agents.project_manager import ProjectManagerAgent
+from core.scheduling import TaskGraph, CycleError, link_task_ids
+
+def _task(task_id, dependencies=(), effort="medium"):
+    return {"id": task_id, "dependencies": list(dependencies), "estimated_effort": effort}
+
+# Shape of ProjectManagerAgent's default task breakdown
+DEFAULT_TASKS = [
+    _task("default-1", effort="high"),
+    _task("default-2"),
+    _task("default-3", ["default-1", "default-2"]),
+    _task("default-4", ["default-1", "default-2"], effort="low"),
+]
+
+class TestTaskGraph(unittest.TestCase):
+    """Test case for TaskGraph ordering, cycles and execution."""
+
+    def setUp(self):
+        """Set up a copy of the default task breakdown."""
+        self.tasks = [dict(task) for task in DEFAULT_TASKS]
+
+    def test_topological_order_and_critical_path(self):
+        """Test that dependencies come first and the heaviest chain is critical."""
+        graph = TaskGraph(self.tasks)
+        self.assertEqual(graph.order, ["default-1", "default-2", "default-3", "default-4"])
+        self.assertEqual(graph.critical_path(), ["default-1", "default-3"])
+        self.assertEqual(graph.ready_tasks(), ["default-1", "default-2"])
+        self.assertEqual(graph.ready_tasks(["default-1"]), ["default-2"])
+
+        progress = graph.progress(["default-1"])
+        self.assertEqual(progress["critical_path_completed"], 1)
+        self.assertEqual(progress["remaining_critical_effort"], 4)
+        self.assertAlmostEqual(progress["critical_path_progress"], 0.2)
+
+    def test_breakdown_dependencies(self):
+        """Test that testing and documentation wait for the implementation tasks."""
+        tasks = ProjectManagerAgent().create_task_breakdown(
+            {"components": ["frontend", "backend"], "features": ["reminders"]})
+        graph = TaskGraph(tasks)
+        self.assertEqual(graph.ready_tasks(), ["component-2", "component-1", "feature-1"])
+        self.assertEqual(graph.order[-2:], ["testing-1", "documentation-1"])
+        self.assertEqual(graph.critical_path(), ["component-2", "testing-1"])
+
+    def test_cycles_are_detected(self):
+        """Test that a dependency cycle is reported with its tasks."""
+        with self.assertRaises(CycleError) as context:
+            TaskGraph([_task("a", ["c"]), _task("b", ["a"]), _task("c", ["b"]), _task("d")])
+        self.assertEqual(context.exception.cycle, ["a", "c", "b", "a"])
+
+    def test_link_task_ids(self):
+        """Test that provisional dependency IDs follow the stored task IDs."""
+        link_task_ids(self.tasks, ["id1", "id2", "id3", "id4"])
+        self.assertEqual(self.tasks[2]["id"], "id3")
+        self.assertEqual(self.tasks[2]["dependencies"], ["id1", "id2"])
+
+    def test_run_respects_dependencies_and_limit(self):
+        """Test that ready tasks run in parallel, within the limit, after their dependencies."""
+        graph = TaskGraph([_task("a"), _task("b"), _task("c"), _task("d", ["a", "b", "c"])])
+        lock = threading.Lock()
+        started, running = [], []
+        peak = [0]
+
+        def execute(task_id):
+            with lock:
+                started.append(task_id)
+                running.append(task_id)
+                peak[0] = max(peak[0], len(running))
+            time.sleep(0.05)
+            with lock:
+                running.remove(task_id)
+            return True
+
+        statuses = graph.run(execute, max_workers=2)
+        self.assertEqual(statuses, dict.fromkeys("abcd", "completed"))
+        self.assertEqual(peak[0], 2)
+        self.assertEqual(started[-1], "d")
+
+    def test_failed_tasks_block_dependents(self):
+        """Test that dependents of a failed task never run."""
+        graph = TaskGraph(self.tasks)
+        ran = []
+
+        def execute(task_id):
+            ran.append(task_id)
+            if task_id == "default-2":
+                raise RuntimeError("build failed")
+            return True
+
+        statuses = graph.run(execute, completed=["default-1"])
+        self.assertEqual(ran, ["default-2"])
+        self.assertEqual(statuses, {"default-1": "completed", "default-2": "failed",
+                                    "default-3": "blocked", "default-4": "blocked"})
+
+    def test_completed_tasks_before_their_dependencies(self):
+        """Test that a task completed out of order is not run again after its dependency."""
+        graph = TaskGraph([_task("a"), _task("b", ["a"]), _task("c", ["b"])])
+        ran = []
+
+        def execute(task_id):
+            ran.append(task_id)
+            return True
+
+        statuses = graph.run(execute, completed=["b"])
+        self.assertCountEqual(ran, ["a", "c"])
+        self.assertEqual(statuses, dict.fromkeys("abc", "completed"))
+
+if __name__ == "__main__":
+    unittest.main()
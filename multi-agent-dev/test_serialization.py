@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Tests for state serialization.
+"""
+import os
+import sys
+import math
+import enum
+import uuid
+import datetime
+import unittest
+import dataclasses
+
+# Add the project root to the path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from utils import serialization, serialize_state, deserialize_state
+
+class Priority(enum.Enum):
+    HIGH = "high"
+
+@dataclasses.dataclass
+class Estimate:
+    hours: int
+    priority: Priority
+
+class TestStateSerialization(unittest.TestCase):
+    """Test case for serialize_state and deserialize_state."""
+
+    def test_timestamp_fields_round_trip(self):
+        """Test that datetimes under timestamp keys are restored."""
+        now = datetime.datetime(2024, 5, 11, 10, 30, 15, 123456)
+        state = {"tasks": [{"id": "t1", "created_at": now, "updated_at": now}],
+                 "messages": [{"timestamp": now}], "last_active": now, "analysis_time": now}
+        self.assertEqual(deserialize_state(serialize_state(state)), state)
+
+    def test_other_strings_are_not_parsed(self):
+        """Test that ISO-looking values under other keys stay strings."""
+        state = {"code": "2024-05-11", "title": "2024-05-11T10:30:00",
+                 "created_at": "not a date", "execution_time": 0.5}
+        self.assertEqual(deserialize_state(serialize_state(state)), state)
+
+    def test_native_types(self):
+        """Test that UUIDs, sets, bytes and dates are encoded natively."""
+        task_id = uuid.uuid4()
+        state = {"id": task_id, "tags": {"ui"}, "data": b"\x00\xff", "due": datetime.date(2024, 5, 11)}
+        self.assertEqual(deserialize_state(serialize_state(state)),
+                         {"id": str(task_id), "tags": ["ui"], "data": "AP8=", "due": "2024-05-11"})
+
+    def test_backends_agree(self):
+        """Test that every backend decodes to the same state."""
+        now = datetime.datetime(2024, 5, 11, 10, 30, 15)
+        state = {"tasks": [{"id": uuid.UUID(int=1), "created_at": now, "tags": {"a"}}],
+                 1: "non-string key", "big": 2 ** 70, "next": None,
+                 "priority": Priority.HIGH, "estimate": Estimate(3, Priority.HIGH)}
+        decoded = []
+        try:
+            for backend in serialization.BACKENDS:
+                serialization.set_backend(backend)
+                decoded.append(deserialize_state(serialize_state(state)))
+        finally:
+            serialization.set_backend("orjson" if "orjson" in serialization.BACKENDS else "json")
+        self.assertEqual(decoded[0]["tasks"][0]["created_at"], now)
+        self.assertEqual(decoded[0]["priority"], "high")
+        self.assertEqual(decoded[0]["estimate"], {"hours": 3, "priority": "high"})
+        self.assertTrue(all(d == decoded[0] for d in decoded))
+
+        with self.assertRaises(ValueError):
+            serialization.set_backend("unknown")
+
+    def test_backends_read_each_others_output(self):
+        """Test that non-finite floats and big integers round-trip the same way across backends."""
+        state = {"score": float("nan"), "limit": float("inf"), "big": 2 ** 70, "small": -2 ** 64,
+                 "ns": 1_715_000_000_000_000_000, "u64": 2 ** 64 - 1, "ref": "order-123456789012345678901234",
+                 "next": None}
+        encoded = {}
+        try:
+            for backend in serialization.BACKENDS:
+                serialization.set_backend(backend)
+                encoded[backend] = serialize_state(state)
+            for backend in serialization.BACKENDS:
+                serialization.set_backend(backend)
+                for text in encoded.values():
+                    decoded = deserialize_state(text)
+                    self.assertTrue(math.isnan(decoded.pop("score")))
+                    self.assertEqual(decoded, {key: value for key, value in state.items() if key != "score"})
+                    self.assertIs(type(decoded["big"]), int)
+        finally:
+            serialization.set_backend("orjson" if "orjson" in serialization.BACKENDS else "json")
+
+if __name__ == "__main__":
+    unittest.main()
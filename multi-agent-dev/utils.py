@@ -76,18 +76,5 @@ class DateTimeEncoder(json.JSONEncoder):
             return obj.isoformat()
         return super().default(obj)
 
-def serialize_state(state):
-    """Serialize state dictionary to JSON string with datetime handling"""
-    try:
-        return json.dumps(state, cls=DateTimeEncoder)
-    except Exception as e:
-        print(f"Error serializing state: {str(e)}")
-        return json.dumps({"error": f"Could not serialize state: {str(e)}"})
-
-def deserialize_state(state_json):
-    """Deserialize JSON string to state dictionary"""
-    try:
-        return json.loads(state_json)
-    except Exception as e:
-        print(f"Error deserializing state: {str(e)}")
-        return {"error": f"Could not deserialize state: {str(e)}"}
\ No newline at end of file
+# Serialization lives in utils.serialization so every entry point encodes state the same way
+from utils.serialization import serialize_state, deserialize_state
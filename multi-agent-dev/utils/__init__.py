@@ -1,9 +1,12 @@
 from datetime import datetime, timedelta
 import uuid
-import json
 import traceback
 from typing import Dict, Any, List, Optional, Union, Callable
 
+from utils.serialization import (
+    serialize_state, deserialize_state, is_datetime_field, DATETIME_FIELDS, DATETIME_FIELD_SUFFIXES
+)
+
 # Store for log function
 _log_agent_activity = None
 
@@ -51,34 +54,6 @@ def time_difference(start: datetime, end: Optional[datetime] = None) -> str:
     else:
         return f"{int(seconds / 86400)} days"
 
-def serialize_state(state: Dict[str, Any]) -> str:
-    """Serialize state to JSON string with datetime handling."""
-    def datetime_handler(obj):
-        if isinstance(obj, datetime):
-            return obj.isoformat()
-        # Handle other non-serializable types
-        try:
-            # Try to convert to string
-            return str(obj)
-        except:
-            # If all else fails
-            return f"<non-serializable: {type(obj).__name__}>"
-
-    return json.dumps(state, default=datetime_handler)
-
-def deserialize_state(state_json: str) -> Dict[str, Any]:
-    """Deserialize state from JSON string with datetime handling."""
-    def datetime_parser(dct):
-        for k, v in dct.items():
-            if isinstance(v, str):
-                try:
-                    dct[k] = datetime.fromisoformat(v)
-                except (ValueError, TypeError):
-                    pass
-        return dct
-    
-    return json.loads(state_json, object_hook=datetime_parser)
-
 def sanitize_input(input_str: str) -> str:
     """Sanitize user input."""
     # Simple sanitization - a real implementation would be more comprehensive
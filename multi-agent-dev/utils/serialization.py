@@ -0,0 +1,173 @@
+"""
+State serialization shared by every entry point.
+
+serialize_state and deserialize_state convert agent and checkpoint state to
+and from JSON text. datetimes, dates, UUIDs, sets, bytes, enums and
+dataclasses are encoded natively (ISO strings, strings, lists, base64,
+enum values and dicts), and timestamp fields are converted back to
+datetimes on load. The JSON backend is pluggable: orjson
+is used when it is installed, otherwise the standard library json module.
+"""
+import json
+import math
+import base64
+import dataclasses
+import datetime
+import enum
+import uuid
+from collections.abc import Mapping
+from typing import Dict, Any, Callable, Tuple
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# orjson decodes integer literals outside [-2**63, 2**64) as floats
+_INT64_LIMIT = float(2 ** 63)
+
+# Keys whose string values deserialize_state converts back to datetimes
+DATETIME_FIELDS = frozenset({"timestamp", "last_active"})
+DATETIME_FIELD_SUFFIXES = ("_at", "_time")
+
+def is_datetime_field(key: str) -> bool:
+    """Check whether a state key holds a timestamp."""
+    return key in DATETIME_FIELDS or key.endswith(DATETIME_FIELD_SUFFIXES)
+
+def _parse_datetime(key: str, value: Any) -> Any:
+    """Convert an ISO string under a timestamp key to a datetime, else return it unchanged."""
+    # Only ISO-looking strings under timestamp keys are parsed, never code or reports
+    if value.__class__ is str and len(value) >= 10 and value[4] == "-" and is_datetime_field(key):
+        try:
+            return datetime.datetime.fromisoformat(value)
+        except ValueError:
+            pass
+    return value
+
+def encode_default(obj: Any) -> Any:
+    """Encode values the JSON backends do not support natively."""
+    if isinstance(obj, (datetime.datetime, datetime.date, datetime.time)):
+        return obj.isoformat()
+    if isinstance(obj, uuid.UUID):
+        return str(obj)
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    if isinstance(obj, (bytes, bytearray, memoryview)):
+        return base64.b64encode(obj).decode("ascii")
+    if isinstance(obj, Mapping):
+        return dict(obj)
+    if isinstance(obj, enum.Enum):
+        return obj.value
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        return dataclasses.asdict(obj)
+    # Handle other non-serializable types
+    try:
+        # Try to convert to string
+        return str(obj)
+    except Exception:
+        # If all else fails
+        return f"<non-serializable: {type(obj).__name__}>"
+
+def _datetime_hook(dct: Dict[str, Any]) -> Dict[str, Any]:
+    for k, v in dct.items():
+        if v.__class__ is str:
+            dct[k] = _parse_datetime(k, v)
+    return dct
+
+def _restore_datetimes(obj: Any) -> bool:
+    """
+    Convert timestamp fields of a decoded JSON structure in place.
+
+    Returns:
+        True if the structure holds a whole float outside the 64-bit integer
+        range, which orjson produces for integer literals it cannot represent
+    """
+    big = False
+    if obj.__class__ is dict:
+        for k, v in obj.items():
+            if v.__class__ is str:
+                obj[k] = _parse_datetime(k, v)
+            elif v.__class__ is dict or v.__class__ is list:
+                big = _restore_datetimes(v) or big
+            elif v.__class__ is float and not -_INT64_LIMIT <= v < _INT64_LIMIT:
+                big = True
+    elif obj.__class__ is list:
+        for v in obj:
+            if v.__class__ is dict or v.__class__ is list:
+                big = _restore_datetimes(v) or big
+            elif v.__class__ is float and not -_INT64_LIMIT <= v < _INT64_LIMIT:
+                big = True
+    return big
+
+def _json_dumps(obj: Any) -> str:
+    return json.dumps(obj, default=encode_default)
+
+def _json_loads(text: str) -> Any:
+    return json.loads(text, object_hook=_datetime_hook)
+
+
+def _has_non_finite(obj: Any) -> bool:
+    """Check whether a structure contains NaN or infinite floats."""
+    if obj.__class__ is float:
+        return not math.isfinite(obj)
+    if isinstance(obj, Mapping):
+        return any(_has_non_finite(v) for v in obj.values())
+    if isinstance(obj, (list, tuple)):
+        return any(_has_non_finite(v) for v in obj)
+    return False
+
+def _orjson_dumps(obj: Any) -> str:
+    # datetime and UUID are encoded natively in the same form as encode_default
+    try:
+        text = orjson.dumps(obj, default=encode_default, option=orjson.OPT_NON_STR_KEYS).decode("utf-8")
+    except orjson.JSONEncodeError:
+        # Values orjson rejects, such as integers above 64 bits
+        return _json_dumps(obj)
+    # orjson writes NaN and infinities as null; keep them as the json backend writes them
+    if "null" in text and _has_non_finite(obj):
+        return _json_dumps(obj)
+    return text
+
+def _orjson_loads(text: str) -> Any:
+    try:
+        obj = orjson.loads(text)
+    except orjson.JSONDecodeError:
+        # NaN and Infinity, as written by the json backend, are not strict JSON
+        return _json_loads(text)
+    if _restore_datetimes(obj) or (obj.__class__ is float and not -_INT64_LIMIT <= obj < _INT64_LIMIT):
+        # Possibly an integer literal orjson turned into a float; json keeps it exact
+        return _json_loads(text)
+    return obj
+
+# Available backends by name, as (dumps, loads)
+BACKENDS: Dict[str, Tuple[Callable[[Any], str], Callable[[str], Any]]] = {"json": (_json_dumps, _json_loads)}
+if orjson is not None:
+    BACKENDS["orjson"] = (_orjson_dumps, _orjson_loads)
+
+_backend_name = "orjson" if "orjson" in BACKENDS else "json"
+_dumps, _loads = BACKENDS[_backend_name]
+
+def get_backend() -> str:
+    """Get the name of the JSON backend in use."""
+    return _backend_name
+
+def set_backend(name: str) -> None:
+    """
+    Select the JSON backend used by serialize_state and deserialize_state.
+
+    Args:
+        name: Backend name, "json" or "orjson"
+    """
+    global _backend_name, _dumps, _loads
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown serialization backend: {name}")
+    _backend_name = name
+    _dumps, _loads = BACKENDS[name]
+
+def serialize_state(state: Any) -> str:
+    """Serialize state to a JSON string with datetime, UUID, set and bytes handling."""
+    return _dumps(state)
+
+def deserialize_state(state_json: str) -> Any:
+    """Deserialize state from a JSON string, converting timestamp fields back to datetimes."""
+    return _loads(state_json)